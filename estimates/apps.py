@@ -5,3 +5,6 @@ class EstimatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'estimates'
 
+    def ready(self):
+        from . import signals  # noqa
+
@@ -8,7 +8,7 @@ This module provides post-estimation calculations for:
 - Person: BMI and body composition analysis
 """
 
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, Tuple
 from decimal import Decimal
 from django.db.models import Q
 from .models import FoodNutrition, ShippingCarrier, BreedReference, BMICategory
@@ -443,27 +443,3 @@ def calculate_bmi_insights(weight_kg: float, height_cm: float, age: Optional[int
         "health_recommendation": recommendation,
         "disclaimer": "This is an estimate for educational purposes only. Consult a healthcare professional for medical advice.",
     }
-
-
-# ============================================
-# HELPER FUNCTIONS
-# ============================================
-
-def extract_answer_value(answers: List[Dict], question_text: str, default: Any = None) -> Any:
-    """
-    Extract answer value from answers list by question text.
-    
-    Args:
-        answers: List of answer dictionaries
-        question_text: Question text to search for (case-insensitive partial match)
-        default: Default value if not found
-        
-    Returns:
-        Answer value or default
-    """
-    question_lower = question_text.lower()
-    for answer in answers:
-        q_text = answer.get("question", "").lower()
-        if question_lower in q_text or q_text in question_lower:
-            return answer.get("answer", default)
-    return default
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BreedReference, FoodNutrition
+from .taxonomy import invalidate_taxonomy
+
+@receiver([post_save, post_delete], sender=FoodNutrition)
+@receiver([post_save, post_delete], sender=BreedReference)
+def refresh_label_taxonomy(sender, **kwargs):
+    invalidate_taxonomy()
@@ -0,0 +1,182 @@
+"""
+Canonical object-label taxonomy.
+
+Vision-model labels are free text ("red apple", "Granny Smith apple",
+"apple (green)"). canonicalize_label maps them to a stable taxonomy id such as
+"food:apple" or "pet:dog:beagle" so caches, analytics and reference matching
+can key on one value per object.
+
+The lookup index is built in memory from:
+- FoodNutrition names and aliases  -> "food:<name>"
+- BreedReference breeds and aliases -> "pet:<species>:<breed>"
+- Category keywords and species synonyms -> "<category>:<keyword>"
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sessions.services import CATEGORY_KEYWORDS
+
+# Words that describe a label without changing what the object is
+MODIFIERS = {
+    "a", "an", "the", "of", "with", "and", "in", "on", "some",
+    "fresh", "ripe", "raw", "whole", "sliced", "half", "single", "piece", "pieces",
+    "small", "medium", "large", "big", "tiny", "huge",
+    "red", "green", "yellow", "brown", "white", "black", "purple", "pink",
+}
+
+# Species-level synonyms; keyword-derived ids fold onto these
+SPECIES_SYNONYMS = {
+    "dog": ["dog", "puppy", "canine"],
+    "cat": ["cat", "kitten", "feline"],
+    "rabbit": ["rabbit", "bunny"],
+    "bird": ["bird", "parrot"],
+}
+PERSON_SYNONYMS = ["person", "human", "people", "individual", "body"]
+
+# Rebuild at least this often so other worker processes pick up reference-data edits
+INDEX_TTL_SECONDS = 300
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _singular(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "xes", "sses", "oes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def normalize_tokens(label: str) -> List[str]:
+    """Lowercase, split on punctuation, singularize and drop descriptive modifiers."""
+    tokens = [_singular(t) for t in _TOKEN_RE.findall((label or "").lower())]
+    return [t for t in tokens if t not in MODIFIERS]
+
+
+def _slug(tokens: List[str]) -> str:
+    return "-".join(tokens)
+
+
+class LabelTaxonomy:
+    """In-memory index from normalized token sequences to canonical ids."""
+
+    def __init__(self):
+        self.index: Dict[Tuple[str, ...], str] = {}
+        self.max_ngram = 1
+
+    def add(self, canonical_id: str, phrase: str) -> None:
+        """Register a phrase; the first id registered for a phrase is kept."""
+        key = tuple(normalize_tokens(phrase))
+        if not key or key in self.index:
+            return
+        self.index[key] = canonical_id
+        self.max_ngram = max(self.max_ngram, len(key))
+
+    def lookup(self, tokens: List[str], category: str = "") -> Optional[str]:
+        """
+        Find the best canonical id for a token list.
+
+        Longer phrases win over shorter ones; among equal lengths the rightmost
+        (the head noun in English) wins. Ids in the detected category are
+        preferred over ids from other categories.
+        """
+        fallback = None
+        for n in range(min(self.max_ngram, len(tokens)), 0, -1):
+            for start in range(len(tokens) - n, -1, -1):
+                canonical_id = self.index.get(tuple(tokens[start:start + n]))
+                if not canonical_id:
+                    continue
+                if not category or category == "general" or canonical_id.startswith(category + ":"):
+                    return canonical_id
+                fallback = fallback or canonical_id
+        return fallback
+
+
+def build_taxonomy(food_model=None, breed_model=None) -> LabelTaxonomy:
+    """
+    Build the index from reference data and category keywords.
+
+    Args:
+        food_model: FoodNutrition model to read (migrations pass the historical model)
+        breed_model: BreedReference model to read
+
+    Returns:
+        A new LabelTaxonomy
+    """
+    from .models import BreedReference, FoodNutrition
+
+    FoodNutrition = food_model or FoodNutrition
+    BreedReference = breed_model or BreedReference
+
+    taxonomy = LabelTaxonomy()
+
+    # Reference data first: it is the most specific and wins over keywords
+    for name, aliases in FoodNutrition.objects.values_list("name", "aliases"):
+        canonical_id = f"food:{_slug(normalize_tokens(name))}"
+        for phrase in [name] + list(aliases or []):
+            taxonomy.add(canonical_id, phrase)
+
+    for species, breed, aliases in BreedReference.objects.values_list("species", "breed", "aliases"):
+        canonical_id = f"pet:{_slug(normalize_tokens(species))}:{_slug(normalize_tokens(breed))}"
+        for phrase in [breed] + list(aliases or []):
+            taxonomy.add(canonical_id, phrase)
+
+    for species, synonyms in SPECIES_SYNONYMS.items():
+        for phrase in synonyms:
+            taxonomy.add(f"pet:{species}", phrase)
+    for phrase in PERSON_SYNONYMS:
+        taxonomy.add("person:person", phrase)
+
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            taxonomy.add(f"{category}:{_slug(normalize_tokens(keyword))}", keyword)
+
+    return taxonomy
+
+
+_taxonomy: Optional[LabelTaxonomy] = None
+_built_at = 0.0
+
+
+def get_taxonomy() -> LabelTaxonomy:
+    """Return the process-wide index, rebuilding it when stale or invalidated."""
+    global _taxonomy, _built_at
+    if _taxonomy is None or time.monotonic() - _built_at > INDEX_TTL_SECONDS:
+        _taxonomy = build_taxonomy()
+        _built_at = time.monotonic()
+    return _taxonomy
+
+
+def invalidate_taxonomy() -> None:
+    """Force a rebuild on next use (called when reference data changes)."""
+    global _taxonomy
+    _taxonomy = None
+
+
+def canonicalize_label(object_label: str, category: str = "general",
+                       taxonomy: Optional[LabelTaxonomy] = None) -> str:
+    """
+    Map a free-text object label to a canonical taxonomy id.
+
+    Args:
+        object_label: Label from the vision model or user
+        category: Detected category, used to prefer ids in the same category
+        taxonomy: Index to look up in (defaults to the process-wide one)
+
+    Returns:
+        Canonical id like "food:apple"; labels not in the taxonomy get a
+        normalized "<category>:<tokens>" id so spelling variants still collapse.
+        Empty string for empty labels.
+    """
+    tokens = normalize_tokens(object_label)
+    if not tokens:
+        return ""
+
+    canonical_id = (taxonomy or get_taxonomy()).lookup(tokens, category)
+    if canonical_id:
+        return canonical_id
+    return f"{category or 'general'}:{_slug(tokens)}"[:120]
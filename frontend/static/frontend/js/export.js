@@ -1,99 +1,50 @@
 /**
- * CSV export functionality for session history
+ * Export functionality for session history (server-side CSV/NDJSON export)
  */
 
 /**
- * Convert sessions data to CSV format and trigger download
- * @param {Array} sessions - Array of session objects
- * @param {string} filename - Output filename (default: 'weight_estimates.csv')
+ * Download the history export streamed by the server (all matching sessions, not just loaded pages)
+ * @param {URLSearchParams} params - History filters (search, category, status, ...)
+ * @param {string} fileFormat - 'csv' or 'ndjson'
  */
-function exportHistoryToCSV(sessions, filename = 'weight_estimates.csv') {
-  if (!sessions || sessions.length === 0) {
-    alert('No data to export');
-    return;
+async function downloadHistoryExport(params, fileFormat = 'csv') {
+  const query = new URLSearchParams(params);
+  query.set('file_format', fileFormat);
+  const url = `${API.base}/sessions/export/?${query.toString()}`;
+
+  const send = () => {
+    const { access } = API.tokens.get();
+    return fetch(url, { headers: access ? { Authorization: `Bearer ${access}` } : {} });
+  };
+
+  let res = await send();
+  // If unauthorized, attempt refresh once
+  if (res.status === 401 && await API.refreshAccessToken()) {
+    res = await send();
   }
-  
-  // Define CSV headers
-  const headers = [
-    'Date',
-    'Object',
-    'Category',
-    'Status',
-    'Estimated Weight (g)',
-    'Weight Range',
-    'Confidence (%)',
-    'Rationale'
-  ];
-  
-  // Convert sessions to CSV rows
-  const rows = sessions.map(session => {
-    const estimate = session.estimate;
-    const date = new Date(session.created_at).toLocaleString();
-    const object = session.object_label || 'Unknown';
-    const category = session.object_json?.detected_category || 'general';
-    const status = session.status;
-    
-    if (!estimate) {
-      return [
-        date,
-        object,
-        category,
-        status,
-        'N/A',
-        'N/A',
-        'N/A',
-        'No estimate yet'
-      ];
-    }
-    
-    const weight = estimate.value_grams.toFixed(1);
-    const range = `${estimate.min_grams.toFixed(1)} - ${estimate.max_grams.toFixed(1)}`;
-    const confidence = Math.round(estimate.confidence * 100);
-    const rationale = estimate.rationale || '';
-    
-    return [
-      date,
-      object,
-      category,
-      status,
-      weight,
-      range,
-      confidence,
-      rationale
-    ];
-  });
-  
-  // Build CSV content
-  let csvContent = headers.join(',') + '\n';
-  
-  rows.forEach(row => {
-    // Escape commas and quotes in fields
-    const escapedRow = row.map(field => {
-      const str = String(field);
-      // If field contains comma, quote, or newline, wrap in quotes and escape quotes
-      if (str.includes(',') || str.includes('"') || str.includes('\n')) {
-        return '"' + str.replace(/"/g, '""') + '"';
-      }
-      return str;
-    });
-    csvContent += escapedRow.join(',') + '\n';
-  });
-  
-  // Create blob and trigger download
-  const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+  if (!res.ok) {
+    throw new Error('Export failed.');
+  }
+
+  // Use the server's filename (weight_estimates_<timestamp>.<format>)
+  const disposition = res.headers.get('Content-Disposition') || '';
+  const match = disposition.match(/filename="([^"]+)"/);
+  const filename = match ? match[1] : `weight_estimates.${fileFormat}`;
+
+  const blob = await res.blob();
   const link = document.createElement('a');
-  const url = URL.createObjectURL(blob);
-  
-  link.setAttribute('href', url);
+  const blobUrl = URL.createObjectURL(blob);
+
+  link.setAttribute('href', blobUrl);
   link.setAttribute('download', filename);
   link.style.visibility = 'hidden';
-  
+
   document.body.appendChild(link);
   link.click();
   document.body.removeChild(link);
-  
+
   // Clean up
-  URL.revokeObjectURL(url);
+  URL.revokeObjectURL(blobUrl);
 }
 
 /**
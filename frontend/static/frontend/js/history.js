@@ -13,21 +13,33 @@ document.addEventListener("DOMContentLoaded", async () => {
   const statusFilter = document.getElementById("statusFilter");
   const sortFilter = document.getElementById("sortFilter");
   const exportBtn = document.getElementById("exportBtn");
+  const loadMoreBtn = document.getElementById("loadMoreBtn");
 
-  // Load history with filters
-  async function loadHistory() {
+  // Cursor of the next page; null when the last page is loaded
+  let nextCursor = null;
+
+  // Query params for the current filters (shared by the list and the export)
+  function filterParams() {
+    const params = new URLSearchParams();
+    
+    const search = searchInput.value.trim();
+    if (search) params.append("search", search);
+    
+    const category = categoryFilter.value;
+    if (category) params.append("category", category);
+    
+    const status = statusFilter.value;
+    if (status) params.append("status", status);
+    
+    return params;
+  }
+
+  // Load history with filters; append=true fetches the next page
+  async function loadHistory(append = false) {
     try {
       // Build query params
-      const params = new URLSearchParams();
-      
-      const search = searchInput.value.trim();
-      if (search) params.append("search", search);
-      
-      const category = categoryFilter.value;
-      if (category) params.append("category", category);
-      
-      const status = statusFilter.value;
-      if (status) params.append("status", status);
+      const params = filterParams();
+      if (append && nextCursor) params.append("cursor", nextCursor);
       
       const sort = sortFilter.value;
       if (sort) params.append("sort_by", sort);
@@ -36,25 +48,24 @@ document.addEventListener("DOMContentLoaded", async () => {
       const url = `/sessions/${queryString ? '?' + queryString : ''}`;
       
       const response = await API.request(url, { method: "GET" }, { auth: true });
-      
-      // Handle both old format (array) and new format (object with sessions + statistics)
-      if (Array.isArray(response)) {
-        allSessions = response;
-        currentStatistics = null;
+      const page = response.sessions || [];
+      nextCursor = response.next_cursor || null;
+
+      if (append) {
+        allSessions = allSessions.concat(page);
       } else {
-        allSessions = response.sessions || [];
-        currentStatistics = response.statistics || null;
+        allSessions = page;
+        body.innerHTML = "";
       }
-      
-      body.innerHTML = "";
       empty.textContent = "";
+      if (nextCursor) show(loadMoreBtn); else hide(loadMoreBtn);
 
       if (!allSessions || allSessions.length === 0) {
         empty.textContent = "No sessions found. Start a new estimation from the dashboard.";
         return;
       }
 
-      allSessions.forEach(s => {
+      page.forEach(s => {
         const tr = document.createElement("tr");
 
         const dt = document.createElement("td");
@@ -62,7 +73,7 @@ document.addEventListener("DOMContentLoaded", async () => {
 
         const obj = document.createElement("td");
         // Add category badge
-        const category = s.object_json?.detected_category || 'general';
+        const category = s.category || 'general';
         const categoryBadge = `<span class="badge me-2 category-badge-${category}">${category}</span>`;
         obj.innerHTML = categoryBadge + (s.object_label || "(unlabeled)");
 
@@ -88,11 +99,7 @@ document.addEventListener("DOMContentLoaded", async () => {
         tr.appendChild(act);
         body.appendChild(tr);
       });
-      
-      // Update statistics if available
-      if (currentStatistics) {
-        updateStatistics(currentStatistics);
-      }
+
 
     } catch (err) {
       setAlert(errorBox, err.message || "Failed to load history.");
@@ -104,11 +111,22 @@ document.addEventListener("DOMContentLoaded", async () => {
       'ESTIMATED': '<span class="badge bg-success">Completed</span>',
       'QUESTIONS_ASKED': '<span class="badge bg-warning">Pending</span>',
       'IN_PROGRESS': '<span class="badge bg-info">In Progress</span>',
+      'PROCESSING': '<span class="badge bg-secondary">Processing</span>',
       'FAILED': '<span class="badge bg-danger">Failed</span>'
     };
     return badges[status] || `<span class="badge bg-secondary">${status}</span>`;
   }
   
+  // Statistics do not depend on the filters; loaded once from their own (cacheable) endpoint
+  async function loadStatistics() {
+    try {
+      currentStatistics = await API.request("/sessions/stats/", { method: "GET" }, { auth: true });
+      updateStatistics(currentStatistics);
+    } catch (err) {
+      // Statistics are optional; the history list still works without them
+    }
+  }
+
   function updateStatistics(stats) {
     const totalEl = document.getElementById("totalSessions");
     const completedEl = document.getElementById("completedSessions");
@@ -123,25 +141,32 @@ document.addEventListener("DOMContentLoaded", async () => {
   searchInput.addEventListener("input", () => {
     // Debounce search
     clearTimeout(searchInput.debounceTimer);
-    searchInput.debounceTimer = setTimeout(loadHistory, 500);
+    searchInput.debounceTimer = setTimeout(() => loadHistory(), 500);
   });
   
-  categoryFilter.addEventListener("change", loadHistory);
-  statusFilter.addEventListener("change", loadHistory);
-  sortFilter.addEventListener("change", loadHistory);
+  categoryFilter.addEventListener("change", () => loadHistory());
+  statusFilter.addEventListener("change", () => loadHistory());
+  sortFilter.addEventListener("change", () => loadHistory());
+  loadMoreBtn.addEventListener("click", () => loadHistory(true));
   
-  // Export button
-  exportBtn.addEventListener("click", () => {
+  // Export button: the server streams every matching session, not just the loaded pages
+  exportBtn.addEventListener("click", async () => {
     if (allSessions.length === 0) {
       alert("No data to export");
       return;
     }
     
-    const timestamp = new Date().toISOString().split('T')[0];
-    exportHistoryToCSV(allSessions, `weight_estimates_${timestamp}.csv`);
+    exportBtn.disabled = true;
+    try {
+      await downloadHistoryExport(filterParams(), "csv");
+    } catch (err) {
+      alert(err.message || "Export failed.");
+    } finally {
+      exportBtn.disabled = false;
+    }
   });
 
   // Initial load
-  await loadHistory();
+  await Promise.all([loadHistory(), loadStatistics()]);
 });
 
@@ -92,6 +92,55 @@ document.addEventListener("DOMContentLoaded", async () => {
     return wrap;
   }
 
+  function readValue(inp) {
+    const type = inp.dataset.type;
+    const raw = (inp.value || "").trim();
+    if (raw === "") return undefined;
+
+    if (type === "number") return Number(raw);
+    if (type === "boolean") return (raw.toLowerCase() === "true");
+    return raw;
+  }
+
+  function prefillAnswers(answers) {
+    answers.forEach(a => {
+      const inp = container.querySelector(`[data-qid="${a.question_id}"]`);
+      if (!inp) return;
+      if (inp.dataset.type === "number") {
+        if (a.value_number !== null) inp.value = a.value_number;
+      } else if (inp.dataset.type === "boolean") {
+        if (a.value_boolean !== null) inp.value = a.value_boolean ? "true" : "false";
+      } else {
+        inp.value = a.value_text || "";
+      }
+    });
+  }
+
+  // Each answer is saved as soon as it changes; the submit button only finalizes
+  const pendingSaves = new Set();
+
+  function autosave(inp) {
+    const value = readValue(inp);
+    if (value === undefined) return;
+
+    const save = API.request(`/sessions/${sessionId}/answers/${inp.dataset.qid}/`, {
+      method: "PATCH",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ value })
+    }, { auth: true })
+      .then(resp => {
+        clearAlert(errorBox);
+        setAlert(infoBox, `Saved (${resp.required_answered}/${resp.required_total} required answered).`);
+      })
+      .catch(err => setAlert(errorBox, err.message || "Failed to save answer."))
+      .finally(() => pendingSaves.delete(save));
+    pendingSaves.add(save);
+  }
+
+  container.addEventListener("change", (e) => {
+    if (e.target.dataset && e.target.dataset.qid) autosave(e.target);
+  });
+
   try {
     const session = await API.request(`/sessions/${sessionId}/`, { method: "GET" }, { auth: true });
 
@@ -107,6 +156,7 @@ document.addEventListener("DOMContentLoaded", async () => {
     }
 
     session.questions.forEach(q => container.appendChild(renderQuestion(q)));
+    prefillAnswers(session.answers || []);
   } catch (err) {
     setAlert(errorBox, err.message || "Failed to load session.");
     return;
@@ -120,21 +170,16 @@ document.addEventListener("DOMContentLoaded", async () => {
     btn.disabled = true;
     show(loading);
 
+    // Let in-flight autosaves land before the final submit
+    await Promise.allSettled([...pendingSaves]);
+
     const inputs = container.querySelectorAll("[data-qid]");
     const answers = [];
 
     inputs.forEach(inp => {
-      const qid = inp.dataset.qid;
-      const type = inp.dataset.type;
-      const raw = (inp.value || "").trim();
-
-      if (raw === "") return;
-
-      let value = raw;
-      if (type === "number") value = Number(raw);
-      if (type === "boolean") value = (raw.toLowerCase() === "true");
-
-      answers.push({ question_id: qid, value });
+      const value = readValue(inp);
+      if (value === undefined) return;
+      answers.push({ question_id: inp.dataset.qid, value });
     });
 
     try {
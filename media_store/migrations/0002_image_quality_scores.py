@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='blur_score',
+            field=models.FloatField(blank=True, help_text='Laplacian variance; low = blurry', null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='bright_ratio',
+            field=models.FloatField(blank=True, help_text='Share of near-white pixels', null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='brightness',
+            field=models.FloatField(blank=True, help_text='Mean grayscale level 0-255', null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='contrast',
+            field=models.FloatField(blank=True, help_text='Grayscale standard deviation', null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='dark_ratio',
+            field=models.FloatField(blank=True, help_text='Share of near-black pixels', null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='height',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='quality_grade',
+            field=models.CharField(blank=True, help_text='good, fair or poor', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='uploadedimage',
+            name='width',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -9,6 +9,16 @@ class UploadedImage(models.Model):
     original_filename = models.CharField(max_length=255, blank=True)
     size_bytes = models.PositiveIntegerField(default=0)
     mime_type = models.CharField(max_length=64, blank=True)
+
+    # Local quality pre-check (see media_store.quality)
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    blur_score = models.FloatField(null=True, blank=True, help_text="Laplacian variance; low = blurry")
+    brightness = models.FloatField(null=True, blank=True, help_text="Mean grayscale level 0-255")
+    contrast = models.FloatField(null=True, blank=True, help_text="Grayscale standard deviation")
+    dark_ratio = models.FloatField(null=True, blank=True, help_text="Share of near-black pixels")
+    bright_ratio = models.FloatField(null=True, blank=True, help_text="Share of near-white pixels")
+    quality_grade = models.CharField(max_length=8, blank=True, help_text="good, fair or poor")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
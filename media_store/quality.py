@@ -0,0 +1,133 @@
+"""
+Local image-quality checks run at upload time.
+
+Scores are computed on the CPU with Pillow only, on a downscaled grayscale
+copy of the image, so the whole check takes a few milliseconds:
+- Blur: variance of the Laplacian (low variance = few edges = blurry)
+- Exposure: mean brightness and share of crushed shadows / blown highlights
+- Contrast: standard deviation of grayscale intensities
+- Resolution: original width and height
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from PIL import Image, ImageFilter, ImageOps, ImageStat
+
+# Downscale before analysis; blur and exposure are stable at this size
+ANALYSIS_MAX_SIDE = 512
+
+# 3x3 Laplacian kernel; offset keeps negative responses inside 0-255
+LAPLACIAN_KERNEL = ImageFilter.Kernel((3, 3), [0, 1, 0, 1, -4, 1, 0, 1, 0], scale=1, offset=128)
+
+DARK_LEVEL = 16
+BRIGHT_LEVEL = 240
+
+
+class QualityGrade:
+    GOOD = "good"
+    FAIR = "fair"
+    POOR = "poor"
+
+
+class ImageComplexity:
+    SIMPLE = "simple"
+    COMPLEX = "complex"
+
+
+def _threshold(name: str) -> float:
+    return settings.IMAGE_QUALITY_THRESHOLDS[name]
+
+
+def assess_image_quality(img: Image.Image) -> Dict[str, Any]:
+    """
+    Score an opened Pillow image for blur, exposure, contrast and resolution.
+
+    Args:
+        img: Opened (not verified) Pillow image
+
+    Returns:
+        Dictionary with the raw scores, a grade ("good", "fair", "poor")
+        and the list of issues that caused a poor/fair grade
+    """
+    width, height = img.size
+
+    # Let JPEG decode at a reduced scale; much faster for camera-sized photos
+    img.draft("L", (ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+    gray = ImageOps.exif_transpose(img).convert("L")
+    gray.thumbnail((ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+
+    stat = ImageStat.Stat(gray)
+    brightness = stat.mean[0]
+    contrast = stat.stddev[0]
+
+    hist = gray.histogram()
+    total = float(sum(hist)) or 1.0
+    dark_ratio = sum(hist[:DARK_LEVEL + 1]) / total
+    bright_ratio = sum(hist[BRIGHT_LEVEL:]) / total
+
+    # Pillow copies border pixels through unfiltered, so drop them
+    lap = gray.filter(LAPLACIAN_KERNEL).crop((1, 1, gray.width - 1, gray.height - 1))
+    blur_score = ImageStat.Stat(lap).var[0]
+
+    scores = {
+        "width": width,
+        "height": height,
+        "blur_score": round(blur_score, 2),
+        "brightness": round(brightness, 2),
+        "contrast": round(contrast, 2),
+        "dark_ratio": round(dark_ratio, 4),
+        "bright_ratio": round(bright_ratio, 4),
+    }
+    grade, issues = grade_quality(scores)
+    scores["grade"] = grade
+    scores["issues"] = issues
+    return scores
+
+
+def grade_quality(scores: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """
+    Grade quality scores against the configured thresholds.
+
+    Poor images are rejected at upload. Good images are clear enough to skip
+    the vision-model quality validation.
+    """
+    issues = []
+
+    if min(scores["width"], scores["height"]) < _threshold("min_side_px"):
+        issues.append(f"Resolution too low ({scores['width']}x{scores['height']})")
+    if scores["blur_score"] < _threshold("min_blur_score"):
+        issues.append("Image is too blurry")
+    if scores["brightness"] < _threshold("min_brightness") or scores["dark_ratio"] > _threshold("max_dark_ratio"):
+        issues.append("Image is too dark")
+    if scores["brightness"] > _threshold("max_brightness") or scores["bright_ratio"] > _threshold("max_bright_ratio"):
+        issues.append("Image is overexposed")
+    if scores["contrast"] < _threshold("min_contrast"):
+        issues.append("Image has too little contrast")
+
+    if issues:
+        return QualityGrade.POOR, issues
+
+    if (
+        min(scores["width"], scores["height"]) >= _threshold("good_min_side_px")
+        and scores["blur_score"] >= _threshold("good_blur_score")
+        and scores["contrast"] >= _threshold("good_contrast")
+    ):
+        return QualityGrade.GOOD, []
+
+    return QualityGrade.FAIR, []
+
+
+def image_complexity(blur_score: Optional[float]) -> str:
+    """
+    Classify visual complexity from the stored edge-energy (blur) score.
+
+    Busy scenes (meals, clutter, fur) have far more edge energy than a single
+    object on a plain background; the model router sends them to stronger
+    models. Returns "" when the image was never scored.
+    """
+    if blur_score is None:
+        return ""
+    if blur_score >= _threshold("complex_detail_score"):
+        return ImageComplexity.COMPLEX
+    return ImageComplexity.SIMPLE
@@ -4,7 +4,12 @@ from .models import UploadedImage
 class UploadedImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = UploadedImage
-        fields = ["id", "image", "original_filename", "size_bytes", "mime_type", "created_at"]
+        fields = [
+            "id", "image", "original_filename", "size_bytes", "mime_type",
+            "width", "height", "blur_score", "brightness", "contrast",
+            "dark_ratio", "bright_ratio", "quality_grade",
+            "created_at",
+        ]
 
 class UploadImageSerializer(serializers.Serializer):
     image = serializers.ImageField()
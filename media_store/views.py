@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 from PIL import Image
 
 from .models import UploadedImage
+from .quality import QualityGrade, assess_image_quality
 from .serializers import UploadedImageSerializer, UploadImageSerializer
 
 ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP"}
@@ -76,12 +77,35 @@ class ImageUploadAPIView(APIView):
                 "detail": f"Error validating image: {str(e)}"
             }, status=400)
 
+        # Local quality pre-check: reject unusable photos before any paid vision call
+        quality = {}
+        try:
+            # verify() leaves the image unusable, so open a fresh copy
+            quality = assess_image_quality(Image.open(BytesIO(image_data)))
+        except Exception:
+            # Unreadable by Pillow (filename-based fallback above); leave unscored
+            quality = {}
+
+        if quality.get("grade") == QualityGrade.POOR:
+            return Response({
+                "detail": f"Image quality too low: {'; '.join(quality['issues'])}.",
+                "quality": quality,
+            }, status=400)
+
         obj = UploadedImage.objects.create(
             uploaded_by=request.user,
             image=f,
             original_filename=getattr(f, "name", "") or "",
             size_bytes=getattr(f, "size", 0) or 0,
             mime_type=mime_type,
+            width=quality.get("width", 0),
+            height=quality.get("height", 0),
+            blur_score=quality.get("blur_score"),
+            brightness=quality.get("brightness"),
+            contrast=quality.get("contrast"),
+            dark_ratio=quality.get("dark_ratio"),
+            bright_ratio=quality.get("bright_ratio"),
+            quality_grade=quality.get("grade", ""),
         )
         return Response(UploadedImageSerializer(obj).data, status=201)
 
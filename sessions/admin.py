@@ -1,18 +1,36 @@
 from django.contrib import admin
-from .models import EstimationSession, Question, Answer
+from .models import EstimationSession, Question, QuestionTemplate, Answer, PipelineCheckpoint, IdempotencyKey
 
 @admin.register(EstimationSession)
 class EstimationSessionAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "status", "object_label", "created_at")
-    search_fields = ("user__username", "object_label")
-    list_filter = ("status", "created_at")
+    list_display = ("id", "user", "status", "object_label", "canonical_label", "created_at")
+    search_fields = ("user__username", "object_label", "canonical_label")
+    list_filter = ("status", "vision_model", "text_model", "created_at")
+
+@admin.register(QuestionTemplate)
+class QuestionTemplateAdmin(admin.ModelAdmin):
+    list_display = ("content_hash", "text", "answer_type", "required", "created_at")
+    search_fields = ("text",)
+    list_filter = ("answer_type", "required")
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ("id", "session", "order", "answer_type", "required")
-    search_fields = ("text",)
+    search_fields = ("template__text",)
+    raw_id_fields = ("session", "template")
 
 @admin.register(Answer)
 class AnswerAdmin(admin.ModelAdmin):
     list_display = ("id", "session", "question", "created_at")
 
+
+@admin.register(PipelineCheckpoint)
+class PipelineCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("id", "session", "stage", "status", "attempts", "duration_ms", "finished_at")
+    list_filter = ("stage", "status")
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("key", "user", "scope", "state", "response_status", "created_at", "expires_at")
+    search_fields = ("key", "scope", "user__username")
+    list_filter = ("state",)
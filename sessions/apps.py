@@ -6,3 +6,5 @@ class SessionsConfig(AppConfig):
     name = 'sessions'
     label = 'estimation_sessions'
 
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,111 @@
+"""
+Compiled multi-keyword matcher for category detection.
+
+All keywords of all categories are compiled into one trie-shaped regular
+expression with word boundaries, so a label is scanned once no matter how many
+keywords there are ("scatter cushion" no longer matches "cat"). Every match
+adds its keyword weight to its categories; the highest total wins.
+"""
+
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Union
+
+KeywordTable = Dict[str, Dict[str, float]]
+
+# The rightmost match is usually the head noun ("cat food" is food, "apple box"
+# is a package), so it counts a bit more than modifiers before it
+HEAD_NOUN_BONUS = 1.5
+
+
+def normalize_keyword_table(raw: Dict[str, Union[List[str], Dict[str, float]]]) -> KeywordTable:
+    """Accept {category: [keywords]} or {category: {keyword: weight}} and return the weighted form."""
+    table = {}
+    for category, keywords in raw.items():
+        if isinstance(keywords, dict):
+            table[category] = {k.lower().strip(): float(w) for k, w in keywords.items()}
+        else:
+            table[category] = {k.lower().strip(): 1.0 for k in keywords}
+    return table
+
+
+def load_keyword_table(path: str) -> KeywordTable:
+    """Load a keyword table from a JSON file (list or weighted form per category)."""
+    with open(path, encoding="utf-8") as f:
+        return normalize_keyword_table(json.load(f))
+
+
+def _plural_forms(keyword: str) -> List[str]:
+    # "puppy" -> "puppies"; other plurals are covered by the optional (e)s suffix
+    if len(keyword) > 2 and keyword.endswith("y") and keyword[-2] not in "aeiou":
+        return [keyword, keyword[:-1] + "ies"]
+    return [keyword]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie; greedy optionals prefer the longest word."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """Weighted category classifier over a compiled keyword automaton."""
+
+    def __init__(self, table: KeywordTable, default: str = "general"):
+        self.default = default
+        # Dict order of the table breaks ties between equal scores
+        self.priority = {category: i for i, category in enumerate(table)}
+        self.weights: Dict[str, Dict[str, float]] = {}
+
+        for category, keywords in table.items():
+            for keyword, weight in keywords.items():
+                for form in _plural_forms(keyword):
+                    self.weights.setdefault(form, {})
+                    self.weights[form][category] = max(weight, self.weights[form].get(category, 0.0))
+
+        if self.weights:
+            self._regex: Optional[re.Pattern] = re.compile(
+                r"\b(" + _trie_pattern(self.weights) + r")(?:e?s)?\b"
+            )
+        else:
+            self._regex = None
+
+    def scores(self, label: str) -> Dict[str, float]:
+        """Return the weighted score of every category that matched the label."""
+        if not label or self._regex is None:
+            return {}
+
+        matches = [m.group(1) for m in self._regex.finditer(label.lower())]
+        totals: Dict[str, float] = {}
+        for i, keyword in enumerate(matches):
+            bonus = HEAD_NOUN_BONUS if i == len(matches) - 1 else 1.0
+            for category, weight in self.weights[keyword].items():
+                totals[category] = totals.get(category, 0.0) + weight * bonus
+        return totals
+
+    def classify(self, label: str) -> str:
+        """Return the best-scoring category, or the default when nothing matched."""
+        totals = self.scores(label)
+        if not totals:
+            return self.default
+        return min(totals, key=lambda c: (-totals[c], self.priority[c]))
+
+    def classify_many(self, labels: Iterable[str]) -> List[str]:
+        """Classify a batch of labels, reusing the compiled automaton."""
+        return [self.classify(label) for label in labels]
@@ -0,0 +1,161 @@
+"""
+Streaming export of the session history as CSV or NDJSON.
+
+Rows come from SessionSummary via .iterator(chunk_size=EXPORT_CHUNK_SIZE), so
+only one chunk of sessions is held in memory at a time. For each chunk the
+category details (food, package, pet, person) and the feedback are loaded
+with one query per table that the chunk needs, keyed by session id.
+"""
+
+import csv
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from estimates.models import (
+    BodyCompositionEstimate,
+    FoodEstimate,
+    PackageEstimate,
+    PetEstimate,
+    WeightFeedback,
+)
+
+from .models import SessionSummary
+
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Estimate category -> (details model, exported fields)
+CATEGORY_DETAILS = {
+    "food": (FoodEstimate, [
+        "estimated_calories", "estimated_protein", "estimated_carbs", "estimated_fat", "estimated_fiber",
+        "is_cooked", "portion_status",
+    ]),
+    "package": (PackageEstimate, [
+        "length_cm", "width_cm", "height_cm", "volumetric_weight_g", "chargeable_weight_g",
+        "estimated_shipping_costs", "is_fragile", "destination_type",
+    ]),
+    "pet": (PetEstimate, [
+        "species", "breed", "age_category", "gender", "is_neutered", "health_status",
+        "ideal_weight_min", "ideal_weight_max",
+    ]),
+    "person": (BodyCompositionEstimate, [
+        "height_cm", "age", "gender", "activity_level", "bmi", "bmi_category",
+        "ideal_weight_min_kg", "ideal_weight_max_kg", "body_fat_estimate", "lean_mass_estimate",
+    ]),
+}
+
+FEEDBACK_FIELDS = ["actual_weight_grams", "accuracy_rating", "helpful", "user_notes", "error_grams", "error_percentage"]
+
+CSV_HEADER = [
+    "Session ID", "Date", "Object", "Category", "Status",
+    "Estimated Weight (g)", "Min (g)", "Max (g)", "Confidence (%)", "Rationale",
+    "Category Details",
+    "Actual Weight (g)", "Error (%)", "Accuracy Rating", "Feedback Notes",
+]
+
+
+def _by_session(model, session_ids: List[Any], fields: List[str]) -> Dict[Any, Dict[str, Any]]:
+    rows = model.objects.filter(estimate__session_id__in=session_ids).values("estimate__session_id", *fields)
+    return {row.pop("estimate__session_id"): row for row in rows}
+
+
+def _chunk_extras(chunk: List[SessionSummary]) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, Dict[str, Any]]]:
+    """Category details and feedback for the estimated sessions of a chunk."""
+    estimated = [s for s in chunk if s.value_grams is not None]
+    if not estimated:
+        return {}, {}
+
+    details: Dict[Any, Dict[str, Any]] = {}
+    for category, (model, fields) in CATEGORY_DETAILS.items():
+        ids = [s.pk for s in estimated if s.estimate_category == category]
+        if ids:
+            details.update(_by_session(model, ids, fields))
+    feedback = _by_session(WeightFeedback, [s.pk for s in estimated], FEEDBACK_FIELDS)
+    return details, feedback
+
+
+def export_records(qs: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one export record per session, reading the queryset chunk by chunk.
+
+    Args:
+        qs: SessionSummary queryset, already filtered and ordered
+        chunk_size: Sessions fetched (and held in memory) at a time
+
+    Returns:
+        Iterator of dicts with the session, estimate, details and feedback
+    """
+    sessions = qs.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(sessions, chunk_size))
+        if not chunk:
+            return
+        details, feedback = _chunk_extras(chunk)
+        for s in chunk:
+            estimate = None
+            if s.value_grams is not None:
+                estimate = {
+                    "value_grams": s.value_grams,
+                    "min_grams": s.min_grams,
+                    "max_grams": s.max_grams,
+                    "confidence": s.confidence,
+                    "category": s.estimate_category,
+                    "rationale": s.rationale,
+                }
+            yield {
+                "id": s.pk,
+                "created_at": s.created_at,
+                "object_label": s.label,
+                "category": s.category or "general",
+                "status": s.status,
+                "estimate": estimate,
+                "details": details.get(s.pk),
+                "feedback": feedback.get(s.pk),
+            }
+
+
+def ndjson_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+
+
+class _Echo:
+    """File-like object whose write returns the line, so csv.writer rows can be streamed."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for r in records:
+        est = r["estimate"] or {}
+        fb = r["feedback"] or {}
+        details = json.dumps(r["details"], cls=DjangoJSONEncoder, separators=(",", ":")) if r["details"] else ""
+        yield writer.writerow([
+            r["id"], r["created_at"].isoformat(), r["object_label"], r["category"], r["status"],
+            est.get("value_grams", ""), est.get("min_grams", ""), est.get("max_grams", ""),
+            round(est["confidence"] * 100) if est else "", est.get("rationale", ""),
+            details,
+            fb.get("actual_weight_grams", ""), _blank_none(fb.get("error_percentage")),
+            _blank_none(fb.get("accuracy_rating")), fb.get("user_notes", ""),
+        ])
+
+
+def _blank_none(value: Any) -> Any:
+    return "" if value is None else value
+
+
+def export_lines(qs: QuerySet, export_format: str) -> Iterator[str]:
+    """Stream the queryset in one of EXPORT_FORMATS."""
+    records = export_records(qs)
+    return csv_lines(records) if export_format == "csv" else ndjson_lines(records)
@@ -0,0 +1,204 @@
+"""
+Idempotency keys for the paid session endpoints.
+
+A client sends an Idempotency-Key header with a POST. The first request with
+a key claims it in the IdempotencyKey table (a unique row, so the claim is
+safe across worker processes) and its response is stored. Repeats of the same
+key within the TTL replay the stored response; repeats that arrive while the
+original is still running wait for it. Provider failures (5xx) are not stored
+so the client can retry them with the same key.
+
+The same claim table backs single_flight, which coalesces concurrent
+identical work (double clicks, parallel tabs) under a server-derived key.
+
+Expired rows are removed by the purge_idempotency_keys command.
+"""
+
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+from typing import Any, Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+POLL_INTERVAL_SECONDS = 0.25
+
+
+def request_fingerprint(data: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode("utf-8")
+    ).hexdigest()
+
+
+def reclaimable(now) -> Q:
+    """
+    Rows that may be deleted: completed and past expiry, or in flight past the lock timeout.
+
+    An in-flight claim is never expired by its TTL alone, since the request
+    holding it may still be running.
+    """
+    lock_cutoff = now - timedelta(seconds=settings.IDEMPOTENCY["LOCK_SECONDS"])
+    return (
+        Q(state=IdempotencyKey.COMPLETED, expires_at__lte=now)
+        | Q(state=IdempotencyKey.IN_FLIGHT, claimed_at__lte=lock_cutoff)
+    )
+
+
+def claim(user, scope: str, key: str, fingerprint: str, ttl_seconds: int) -> Optional[IdempotencyKey]:
+    """
+    Try to claim a key.
+
+    Returns:
+        The new in-flight row when this caller owns the key, or None when
+        another request already holds (or completed) it
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    # Expired responses and abandoned in-flight claims (crashed worker) can be taken over
+    IdempotencyKey.objects.filter(user=user, scope=scope, key=key).filter(reclaimable(now)).delete()
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, scope=scope, key=key, fingerprint=fingerprint,
+                claimed_at=now, expires_at=expires_at,
+            )
+    except IntegrityError:
+        return None
+
+
+def wait_for(user, scope: str, key: str, timeout: float) -> Optional[IdempotencyKey]:
+    """Poll until the row for a key is completed; None if it disappears or the wait times out."""
+    deadline = time.monotonic() + timeout
+    while True:
+        record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+        if record is None or record.state == IdempotencyKey.COMPLETED:
+            return record
+        if time.monotonic() >= deadline:
+            return record
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def complete(record: IdempotencyKey, response: Response) -> None:
+    """Store a finished response, or release the claim when it should not be replayed."""
+    if response.status_code >= 500:
+        # Provider outages are retryable: let the next request with this key run again
+        record.delete()
+        return
+    # The TTL counts from completion, so a slow original is still shared (or
+    # replayed) for the whole window instead of expiring while it runs
+    ttl = record.expires_at - record.claimed_at
+    record.state = IdempotencyKey.COMPLETED
+    record.response_status = response.status_code
+    record.response_body = response.data
+    record.expires_at = timezone.now() + ttl
+    record.save(update_fields=["state", "response_status", "response_body", "expires_at"])
+
+
+def replay(record: IdempotencyKey, header: str = "Idempotent-Replayed") -> Response:
+    response = Response(record.response_body, status=record.response_status)
+    response[header] = "true"
+    return response
+
+
+def _claim_or_wait(user, scope: str, key: str, fingerprint: str, ttl_seconds: int,
+                   replay_header: str) -> Tuple[Optional[IdempotencyKey], Optional[Response]]:
+    """
+    Claim a key, or wait for whoever holds it.
+
+    Returns:
+        (row, None) when this caller owns the key and must do the work, or
+        (None, response) with the replayed or error response otherwise
+    """
+    while True:
+        record = claim(user, scope, key, fingerprint, ttl_seconds)
+        if record is not None:
+            return record, None
+
+        existing = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+        if existing is not None and existing.fingerprint != fingerprint:
+            return None, Response(
+                {"detail": f"{HEADER} was already used with a different request body."},
+                status=422
+            )
+        if existing is not None and existing.state != IdempotencyKey.COMPLETED:
+            existing = wait_for(user, scope, key, settings.IDEMPOTENCY["WAIT_SECONDS"])
+        if existing is None:
+            # The original failed and released the key; run this one
+            continue
+        if existing.state == IdempotencyKey.COMPLETED:
+            return None, replay(existing, replay_header)
+        return None, Response(
+            {"detail": "An identical request is still in progress. Retry later."},
+            status=409
+        )
+
+
+def _run_claimed(record: IdempotencyKey, fn: Callable[[], Response]) -> Response:
+    try:
+        response = fn()
+    except Exception:
+        record.delete()
+        raise
+    complete(record, response)
+    return response
+
+
+def idempotent(scope_name: str) -> Callable:
+    """
+    Decorate an APIView handler to honour the Idempotency-Key header.
+
+    The scope is the given name plus the URL kwargs (e.g. the session id), so
+    the same key used on two different sessions does not collide. Requests
+    without the header run unchanged.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER, "").strip()
+            if not key:
+                return handler(view, request, *args, **kwargs)
+            if len(key) > 255:
+                return Response({"detail": f"{HEADER} must be at most 255 characters."}, status=400)
+
+            scope = ":".join([scope_name] + [str(v) for v in kwargs.values()])
+            record, response = _claim_or_wait(
+                request.user, scope, key, request_fingerprint(request.data),
+                settings.IDEMPOTENCY["TTL_SECONDS"], "Idempotent-Replayed",
+            )
+            if response is not None:
+                return response
+            return _run_claimed(record, lambda: handler(view, request, *args, **kwargs))
+
+        return wrapper
+    return decorator
+
+
+def single_flight(user, name: str, key: str, fn: Callable[[], Response]) -> Response:
+    """
+    Coalesce concurrent identical work without a client-supplied key.
+
+    The first caller for (name, key) runs fn; callers arriving while it runs,
+    or within SINGLE_FLIGHT_TTL_SECONDS after, wait and receive its response
+    (marked Single-Flight-Shared) instead of starting another provider call.
+    The claim lives in the same table as idempotency keys, so this holds
+    across worker processes.
+    """
+    record, response = _claim_or_wait(
+        user, f"single-flight:{name}", key, request_fingerprint(key),
+        settings.IDEMPOTENCY["SINGLE_FLIGHT_TTL_SECONDS"], "Single-Flight-Shared",
+    )
+    if response is not None:
+        return response
+    return _run_claimed(record, fn)
@@ -0,0 +1,196 @@
+"""
+Pluggable on-CPU image classifier used alongside the remote vision model.
+
+The classifier is a fast path when it is confident and a fallback while the
+provider circuit is open. Backends are selected with settings.LOCAL_CLASSIFIER:
+- "" (default): disabled
+- "onnx": ONNX Runtime on CPU (requires the optional onnxruntime + numpy packages)
+- any dotted path to a LocalClassifier subclass
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+
+from .services import detect_category
+
+# ImageNet normalisation used by most small pretrained classifiers
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+# ImageNet-1k class index ranges (inclusive) for the categories we have
+# questions for. Class names such as "Granny Smith" or "Labrador retriever"
+# do not contain the keywords detect_category looks for.
+IMAGENET_CATEGORY_RANGES = {
+    "pet": [(151, 268), (281, 285), (330, 333), (338, 338)],  # dogs, cats, rabbits, hamster, guinea pig
+    "food": [(924, 957), (959, 965)],  # dishes, vegetables and fruit, excluding hay
+    "package": [(478, 478), (549, 549)],  # carton, envelope
+}
+IMAGENET_CLASSES = 1000
+
+
+def imagenet_category(index: int) -> Optional[str]:
+    """Return the category of an ImageNet-1k class index, or None if it has none."""
+    for category, ranges in IMAGENET_CATEGORY_RANGES.items():
+        if any(low <= index <= high for low, high in ranges):
+            return category
+    return None
+
+
+class LocalClassifierError(RuntimeError):
+    pass
+
+
+class LocalClassifier:
+    """Base interface: classify an image file into a label and category."""
+
+    name = "base"
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+
+    def predict(self, image: Image.Image) -> List[Dict[str, Any]]:
+        """
+        Return candidates as [{"label": str, "score": float}] sorted by score.
+
+        A candidate may also carry a "category"; otherwise it is detected from the label.
+        """
+        raise NotImplementedError
+
+    def classify(self, image_path: str) -> Dict[str, Any]:
+        """
+        Classify an image file.
+
+        Returns:
+            Dictionary with object_label, category, confidence, backend and latency_ms
+        """
+        started = time.perf_counter()
+        with Image.open(image_path) as image:
+            candidates = self.predict(ImageOps.exif_transpose(image).convert("RGB"))
+        if not candidates:
+            raise LocalClassifierError("Classifier returned no candidates.")
+
+        top = candidates[0]
+        return {
+            "object_label": top["label"],
+            "category": top.get("category") or detect_category(top["label"]),
+            "confidence": round(float(top["score"]), 4),
+            "candidates": candidates[:5],
+            "backend": self.name,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+class OnnxClassifier(LocalClassifier):
+    """ImageNet-style classifier (e.g. MobileNetV3) served by ONNX Runtime on CPU."""
+
+    name = "onnx"
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        try:
+            import numpy
+            import onnxruntime
+        except ImportError as e:
+            raise LocalClassifierError(f"ONNX backend requires onnxruntime and numpy: {e}")
+
+        self._np = numpy
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = int(config.get("THREADS", 1))
+        self._session = onnxruntime.InferenceSession(
+            config["MODEL_PATH"], sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+        self._labels = self._load_labels(config["LABELS_PATH"])
+
+    @staticmethod
+    def _load_labels(path: str) -> List[str]:
+        # One class per line; ImageNet files list synonyms as "tabby, tabby cat"
+        with open(path, encoding="utf-8") as f:
+            return [line.strip().split(",")[0].strip() for line in f if line.strip()]
+
+    def predict(self, image: Image.Image) -> List[Dict[str, Any]]:
+        np = self._np
+        size = int(self.config.get("INPUT_SIZE", 224))
+
+        image = ImageOps.fit(image, (size, size), Image.BILINEAR)
+        x = np.asarray(image, dtype=np.float32) / 255.0
+        x = (x - np.array(IMAGENET_MEAN, dtype=np.float32)) / np.array(IMAGENET_STD, dtype=np.float32)
+        x = x.transpose(2, 0, 1)[np.newaxis, ...]
+
+        logits = self._session.run(None, {self._input_name: x})[0][0]
+        exp = np.exp(logits - logits.max())
+        probs = exp / exp.sum()
+
+        top = probs.argsort()[::-1][:5]
+        imagenet = len(self._labels) == IMAGENET_CLASSES
+        candidates = []
+        for i in top:
+            candidate = {"label": self._labels[i] if i < len(self._labels) else str(i), "score": float(probs[i])}
+            if imagenet:
+                candidate["category"] = imagenet_category(int(i))
+            candidates.append(candidate)
+        return candidates
+
+
+BACKENDS = {
+    "onnx": OnnxClassifier,
+}
+
+_classifier: Optional[LocalClassifier] = None
+_classifier_loaded = False
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """Return the configured classifier (loaded once per process), or None if disabled."""
+    global _classifier, _classifier_loaded
+    if _classifier_loaded:
+        return _classifier
+
+    # Mark as loaded first so a broken backend is not re-initialised per request
+    _classifier_loaded = True
+    config = settings.LOCAL_CLASSIFIER
+    backend = config.get("BACKEND", "")
+    if backend:
+        cls = BACKENDS.get(backend) or import_string(backend)
+        _classifier = cls(config)
+    return _classifier
+
+
+def classify_locally(image_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Classify an image with the local backend.
+
+    Never raises: a missing or broken local model must not break the request,
+    so any failure returns None and the remote vision model is used as usual.
+    """
+    try:
+        classifier = get_local_classifier()
+        if classifier is None:
+            return None
+        return classifier.classify(image_path)
+    except Exception as e:
+        print(f"Local classifier error: {str(e)}")
+        return None
+
+
+def is_fast_path(local: Optional[Dict[str, Any]]) -> bool:
+    """
+    Confident enough to skip the vision model entirely.
+
+    Only for a known category: a "general" label would get generic questions
+    and skip content validation, which the vision model is needed for.
+    """
+    return (
+        bool(local)
+        and local.get("category", "general") != "general"
+        and local["confidence"] >= settings.LOCAL_CLASSIFIER["FAST_PATH_CONFIDENCE"]
+    )
+
+
+def is_usable_fallback(local: Optional[Dict[str, Any]]) -> bool:
+    """Confident enough to stand in for the vision model while it is unavailable."""
+    return bool(local) and local["confidence"] >= settings.LOCAL_CLASSIFIER["FALLBACK_CONFIDENCE"]
@@ -0,0 +1,175 @@
+"""
+Management command to benchmark the history list queries on a synthetic dataset.
+
+Usage: python manage.py benchmark_history_queries [--sessions N] [--users N] [--repeat N]
+
+Inserts N synthetic sessions (1,000,000 by default) spread over --users users,
+each with its SessionSummary row, inside a transaction that is rolled back at
+the end, so nothing is kept. For the queries the history list runs against
+SessionSummary (the date, weight and confidence sorts, and the status and
+category filters) it prints the query plan and the median latency twice:
+
+- after:  with the summary_user_* indexes (the three sorts and the two filters)
+- before: the same data with those indexes dropped
+
+Index drops use plain DROP INDEX, so this runs on SQLite and PostgreSQL.
+"""
+
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sessions.models import MISSING_SORT_VALUE, EstimationSession, SessionStatus, SessionSummary
+from sessions.pagination import SORT_FIELDS
+
+CATEGORIES = ["food", "package", "pet", "person", "general"]
+SUMMARY_INDEXES = [
+    "summary_user_date_idx", "summary_user_weight_idx", "summary_user_confidence_idx",
+    "summary_user_status_idx", "summary_user_category_idx",
+]
+PAGE_SIZE = 20
+
+# Share of synthetic sessions that have an estimate
+ESTIMATED_SHARE = 0.7
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare history query plans and latency with and without the summary indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=1_000_000,
+                            help='Synthetic sessions to insert')
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Users the sessions are spread over')
+        parser.add_argument('--batch-size', type=int, default=10_000,
+                            help='Rows per INSERT')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError('Only SQLite and PostgreSQL are supported.')
+        if options['sessions'] < 1 or options['users'] < 1:
+            raise CommandError('--sessions and --users must be positive.')
+
+        try:
+            with transaction.atomic():
+                user = self.seed(options['sessions'], options['users'], options['batch_size'])
+                self.analyze()
+
+                self.stdout.write(self.style.SUCCESS('After: summary_user_* indexes'))
+                self.report(self.queries(user), options['repeat'])
+
+                self.drop_indexes()
+                self.analyze()
+                self.stdout.write(self.style.SUCCESS('Before: no summary indexes'))
+                self.report(self.queries(user), options['repeat'])
+
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Synthetic data rolled back.')
+
+    def seed(self, n_sessions, n_users, batch_size):
+        started = time.perf_counter()
+        User.objects.bulk_create(
+            [User(username=f'history-benchmark-{i}', password='!') for i in range(n_users)]
+        )
+        # Reloaded because not every backend returns primary keys from a bulk insert
+        users = list(User.objects.filter(username__startswith='history-benchmark-'))
+
+        rng = random.Random(0)
+        statuses = [choice for choice, _ in SessionStatus.choices]
+        now = timezone.now()
+        for offset in range(0, n_sessions, batch_size):
+            sessions, summaries = [], []
+            for _ in range(min(batch_size, n_sessions - offset)):
+                category = rng.choice(CATEGORIES)
+                status = rng.choice(statuses)
+                # Session primary keys are generated client-side (UUIDs)
+                session = EstimationSession(
+                    user=rng.choice(users),
+                    object_label=f'{category} item',
+                    object_json={'detected_category': category},
+                    category=category,
+                    status=status,
+                )
+                sessions.append(session)
+
+                estimated = rng.random() < ESTIMATED_SHARE
+                value = round(rng.uniform(5, 50_000), 1) if estimated else None
+                confidence = round(rng.random(), 3) if estimated else None
+                created_at = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                summaries.append(SessionSummary(
+                    session=session,
+                    user_id=session.user_id,
+                    label=session.object_label,
+                    category=category,
+                    status=status,
+                    value_grams=value,
+                    min_grams=value,
+                    max_grams=value,
+                    confidence=confidence,
+                    estimate_category=category if estimated else '',
+                    weight_sort=value if estimated else MISSING_SORT_VALUE,
+                    confidence_sort=confidence if estimated else MISSING_SORT_VALUE,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            # bulk_create sends no signals, so the summary rows are inserted here as well
+            EstimationSession.objects.bulk_create(sessions)
+            SessionSummary.objects.bulk_create(summaries)
+
+        self.stdout.write(
+            f'Inserted {n_sessions} sessions with summaries for {n_users} users '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+        return users[0]
+
+    def queries(self, user):
+        """The history list queries, one page each, ordered as SessionKeysetPagination orders them."""
+        base = SessionSummary.objects.filter(user=user)
+        by_date = base.order_by('-created_at', '-pk')
+        sorted_by = {
+            sort: base.annotate(sort_value=F(SORT_FIELDS[sort])).order_by('-sort_value', '-created_at', '-pk')
+            for sort in ('weight', 'confidence')
+        }
+        return {
+            'date': by_date,
+            **sorted_by,
+            'status': by_date.filter(status=SessionStatus.ESTIMATED),
+            'category': by_date.filter(category='food'),
+        }
+
+    def report(self, queries, repeat):
+        for name, qs in queries.items():
+            page = qs[:PAGE_SIZE + 1]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(page.all())
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(f'  {name}: median {statistics.median(timings):.2f} ms over {repeat} runs')
+            for line in page.explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for name in SUMMARY_INDEXES:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            for model in (EstimationSession, SessionSummary):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
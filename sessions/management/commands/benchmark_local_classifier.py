@@ -0,0 +1,106 @@
+"""
+Management command to benchmark the local classifier's accuracy and latency.
+
+Usage: python manage.py benchmark_local_classifier [--images DIR] [--manifest CSV] [--repeat N]
+
+Without a manifest, the expected label is taken from the file name
+("test images/apple.jpg" -> "apple") and the expected category from
+detect_category on that label. A manifest is a CSV with the columns
+filename,label,category.
+"""
+
+import csv
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sessions.local_classifier import get_local_classifier
+from sessions.services import detect_category
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the configured local classifier for label/category accuracy and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', default=str(settings.BASE_DIR / 'test images'),
+                            help='Directory of images to classify')
+        parser.add_argument('--manifest', default='',
+                            help='Optional CSV with filename,label,category columns')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per image (after one warm-up run)')
+
+    def handle(self, *args, **options):
+        try:
+            classifier = get_local_classifier()
+        except Exception as e:
+            raise CommandError(f'Could not load local classifier: {e}')
+        if classifier is None:
+            raise CommandError('No local classifier configured. Set LOCAL_CLASSIFIER_BACKEND.')
+
+        samples = self.load_samples(options['images'], options['manifest'])
+        if not samples:
+            raise CommandError('No images found to benchmark.')
+
+        label_hits = 0
+        category_hits = 0
+        latencies = []
+
+        for path, expected_label, expected_category in samples:
+            classifier.classify(path)  # warm-up
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                result = classifier.classify(path)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            label_ok = self.labels_match(expected_label, result['object_label'])
+            category_ok = expected_category == result['category']
+            label_hits += label_ok
+            category_hits += category_ok
+
+            self.stdout.write(
+                f"  {os.path.basename(path)}: {result['object_label']} ({result['category']}, "
+                f"{result['confidence']:.2f}) expected {expected_label} ({expected_category}) "
+                f"{'OK' if label_ok else 'MISS'}/{'OK' if category_ok else 'MISS'}"
+            )
+
+        n = len(samples)
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+        self.stdout.write(self.style.SUCCESS(f'Backend: {classifier.name}, {n} images x {options["repeat"]} runs'))
+        self.stdout.write(f'  Label accuracy:    {label_hits / n:.1%} ({label_hits}/{n})')
+        self.stdout.write(f'  Category accuracy: {category_hits / n:.1%} ({category_hits}/{n})')
+        self.stdout.write(
+            f'  Latency ms: mean {statistics.mean(latencies):.1f}, '
+            f'p50 {statistics.median(latencies):.1f}, p95 {p95:.1f}, max {latencies[-1]:.1f}'
+        )
+
+    def load_samples(self, images_dir, manifest):
+        """Return [(path, expected_label, expected_category)]."""
+        if manifest:
+            samples = []
+            with open(manifest, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    label = row['label'].strip()
+                    category = (row.get('category') or '').strip() or detect_category(label)
+                    samples.append((os.path.join(images_dir, row['filename']), label, category))
+            return samples
+
+        samples = []
+        for name in sorted(os.listdir(images_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in IMAGE_EXTENSIONS:
+                samples.append((os.path.join(images_dir, name), stem, detect_category(stem)))
+        return samples
+
+    @staticmethod
+    def labels_match(expected, predicted):
+        """Loose match: any shared word counts ("granny smith" vs "apple" does not)."""
+        expected_words = set(expected.lower().replace('_', ' ').split())
+        predicted_words = set(predicted.lower().replace('_', ' ').split())
+        return bool(expected_words & predicted_words)
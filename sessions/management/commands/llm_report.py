@@ -0,0 +1,92 @@
+"""
+Management command to report LLM call health from stored sessions and estimates.
+
+Usage: python manage.py llm_report [--days N]
+
+Reads the "_llm" call metadata saved with identification (session.object_json)
+and estimation (estimate.raw_json) outputs, and the "_cascade" record of
+estimates made with the fast/strong model cascade.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from estimates.models import WeightEstimate
+from sessions.models import EstimationSession
+
+
+class Command(BaseCommand):
+    help = 'Report LLM attempts, structured-output use and retries avoided by local schema repair'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Look-back window in days')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'])
+
+        calls = {
+            'identification': EstimationSession.objects.filter(created_at__gte=since)
+                .values_list('object_json', flat=True),
+            'estimation': WeightEstimate.objects.filter(created_at__gte=since)
+                .values_list('raw_json', flat=True),
+        }
+
+        self.stdout.write(self.style.SUCCESS(f'LLM report for the last {options["days"]} days'))
+        for purpose, blobs in calls.items():
+            self.report(purpose, [(blob or {}).get('_llm') for blob in blobs.iterator()])
+
+        self.report_cascade([
+            (blob or {}).get('_cascade')
+            for blob in WeightEstimate.objects.filter(created_at__gte=since)
+                .values_list('raw_json', flat=True).iterator()
+        ])
+
+    def report(self, purpose, metas):
+        metas = [m for m in metas if m]
+        self.stdout.write(f'\n{purpose.title()}: {len(metas)} calls with metadata')
+        if not metas:
+            return
+
+        attempts = Counter(m.get('attempts', 1) for m in metas)
+        retries = sum((a - 1) * n for a, n in attempts.items())
+        structured = sum(1 for m in metas if m.get('structured'))
+        repaired = sum(1 for m in metas if m.get('repairs'))
+        rescued = sum(1 for m in metas if m.get('rescued'))
+        repaired_paths = Counter(p for m in metas for p in m.get('repairs', []))
+
+        self.stdout.write(f'  Structured outputs:  {structured / len(metas):.1%}')
+        self.stdout.write(f'  Retries performed:   {retries}')
+        self.stdout.write(f'  Outputs repaired:    {repaired}')
+        self.stdout.write(f'  Retries avoided:     {rescued} (outputs unusable without a local repair)')
+        self.stdout.write('  Attempts per call:   ' + ', '.join(f'{a}: {n}' for a, n in sorted(attempts.items())))
+        for path, n in repaired_paths.most_common(5):
+            self.stdout.write(f'    repaired {path}: {n}')
+
+    def report_cascade(self, cascades):
+        cascades = [c for c in cascades if c]
+        self.stdout.write(f'\nEstimation cascade: {len(cascades)} requests')
+        if not cascades:
+            return
+
+        tiers = Counter(c['tier'] for c in cascades)
+        reasons = Counter(r.split(':')[0] for c in cascades for r in c.get('escalation_reasons', []))
+        for tier in ('fast', 'strong'):
+            # End-to-end latency of requests resolved at this tier (all attempts)
+            latencies = sorted(c.get('latency_ms', 0) for c in cascades if c['tier'] == tier)
+            self.stdout.write(
+                f'  Resolved by {tier:<6} {tiers[tier] / len(cascades):6.1%} ({tiers[tier]})'
+                + (f'  latency ms p50 {percentile(latencies, 50):.0f}, '
+                   f'p90 {percentile(latencies, 90):.0f}, p99 {percentile(latencies, 99):.0f}'
+                   if latencies else '')
+            )
+        for reason, n in reasons.most_common():
+            self.stdout.write(f'    escalated for {reason}: {n}')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * pct // 100) - 1))
+    return sorted_values[int(index)]
@@ -0,0 +1,72 @@
+"""
+Management command to count prompt tokens per template and catch prompt regressions.
+
+Usage: python manage.py prompt_token_report
+
+Counts the static (cacheable) system prefix and a representative dynamic user
+part for each template in sessions.prompts, and fails if a template exceeds its
+token_budget. Image tokens are not included. Uses tiktoken when installed,
+otherwise a characters/4 approximation.
+"""
+
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sessions.prompts import PROMPTS
+from sessions.services import CATEGORY_SPECIFIC_QUESTIONS
+
+# Representative per-request data for each template
+SAMPLE_INPUTS = {
+    "image_validation": {"image": "attached"},
+    "object_identification": {"user_hint": "it's a cardboard shipping box"},
+    "express_estimation": {"user_hint": "it's a cardboard shipping box"},
+    "weight_estimation": {
+        "object_label": "Cardboard shipping box",
+        "object_summary": "A medium brown cardboard box, taped shut, on a wooden floor.",
+        "qa": {"items": [
+            {
+                "question": q["question"],
+                "answer_type": q["answer_type"],
+                "unit": q.get("unit", ""),
+                "answer": 30 if q["answer_type"] == "number" else "Domestic",
+                "options": q.get("options", []),
+                "required": q["required"],
+            }
+            for q in CATEGORY_SPECIFIC_QUESTIONS["package"]
+        ]},
+    },
+}
+
+
+def _token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return "tiktoken/o200k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        return "approx (chars/4)", lambda text: math.ceil(len(text) / 4)
+
+
+class Command(BaseCommand):
+    help = 'Report static/dynamic prompt token counts per template and enforce token budgets'
+
+    def handle(self, *args, **options):
+        counter_name, count = _token_counter()
+        self.stdout.write(self.style.SUCCESS(f'Prompt token report ({counter_name})'))
+        self.stdout.write(f'  {"template":<28} {"static":>7} {"dynamic":>8} {"total":>7} {"budget":>7}')
+
+        over_budget = []
+        for name, template in PROMPTS.items():
+            static = count(template.system)
+            dynamic = count(template.render_user(**SAMPLE_INPUTS.get(name, {})))
+            total = static + dynamic
+            flag = '' if total <= template.token_budget else '  OVER BUDGET'
+            if flag:
+                over_budget.append(template.id)
+            self.stdout.write(
+                f'  {template.id:<28} {static:>7} {dynamic:>8} {total:>7} {template.token_budget:>7}{flag}'
+            )
+
+        if over_budget:
+            raise CommandError(f'Prompt token budget exceeded: {", ".join(over_budget)}')
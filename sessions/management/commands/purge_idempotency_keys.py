@@ -0,0 +1,36 @@
+"""
+Management command to delete expired idempotency keys and abandoned claims.
+
+Usage: python manage.py purge_idempotency_keys [--batch-size N]
+
+Run it periodically (e.g. hourly from cron); expired keys are also ignored and
+replaced on use, so this only keeps the table small.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sessions.idempotency import reclaimable
+from sessions.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys past their expiry and in-flight claims past the lock timeout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            # Delete in batches to keep write locks short
+            ids = list(
+                IdempotencyKey.objects.filter(reclaimable(now))
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            total += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} expired idempotency keys'))
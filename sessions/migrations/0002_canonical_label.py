@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estimationsession',
+            name='canonical_label',
+            field=models.CharField(blank=True, db_index=True, max_length=120),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0002_canonical_label'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estimationsession',
+            name='text_model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='estimationsession',
+            name='vision_model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
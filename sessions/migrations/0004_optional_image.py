@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0003_session_models'),
+        ('media_store', '0002_image_quality_scores'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='estimationsession',
+            name='image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sessions', to='media_store.uploadedimage'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0004_optional_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estimationsession',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forks', to='estimation_sessions.estimationsession'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0005_session_parent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='estimationsession',
+            name='status',
+            field=models.CharField(choices=[('PROCESSING', 'Processing'), ('QUESTIONS_ASKED', 'Questions Asked'), ('IN_PROGRESS', 'In Progress'), ('ESTIMATED', 'Estimated'), ('FAILED', 'Failed')], default='QUESTIONS_ASKED', max_length=32),
+        ),
+        migrations.CreateModel(
+            name='PipelineCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('stage', models.CharField(choices=[('validation', 'Validation'), ('identification', 'Identification'), ('estimation', 'Estimation'), ('category', 'Category post-processing')], max_length=16)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('SKIPPED', 'Skipped'), ('FAILED', 'Failed')], default='RUNNING', max_length=16)),
+                ('fingerprint', models.CharField(blank=True, max_length=64)),
+                ('output', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.FloatField(blank=True, null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='estimation_sessions.estimationsession')),
+            ],
+            options={
+                'ordering': ['started_at'],
+                'unique_together': {('session', 'stage')},
+            },
+        ),
+    ]
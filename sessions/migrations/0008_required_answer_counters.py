@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:42
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+BATCH_SIZE = 1000
+
+
+def backfill_counters(apps, schema_editor):
+    EstimationSession = apps.get_model("estimation_sessions", "EstimationSession")
+    Answer = apps.get_model("estimation_sessions", "Answer")
+
+    sessions = EstimationSession.objects.annotate(
+        n_required=Count("questions", filter=Q(questions__required=True)),
+    ).filter(n_required__gt=0).only("id")
+
+    batch = []
+    for session in sessions.iterator(chunk_size=BATCH_SIZE):
+        session.required_question_count = session.n_required
+        session.required_answered_count = Answer.objects.filter(
+            session_id=session.id, question__required=True
+        ).count()
+        batch.append(session)
+        if len(batch) >= BATCH_SIZE:
+            EstimationSession.objects.bulk_update(batch, ["required_question_count", "required_answered_count"])
+            batch = []
+    if batch:
+        EstimationSession.objects.bulk_update(batch, ["required_question_count", "required_answered_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0007_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estimationsession',
+            name='required_answered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='estimationsession',
+            name='required_question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:58
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def content_hash(question):
+    # Frozen copy of models.question_content_hash
+    content = json.dumps(
+        [question.text, question.answer_type, question.unit, list(question.options or []), bool(question.required)],
+        separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def deduplicate_questions(apps, schema_editor):
+    """Point every question at a shared template, one batch of rows at a time."""
+    Question = apps.get_model("estimation_sessions", "Question")
+    QuestionTemplate = apps.get_model("estimation_sessions", "QuestionTemplate")
+
+    last_pk = None
+    while True:
+        batch = Question.objects.filter(template__isnull=True).order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+
+        templates = {}
+        for q in batch:
+            q.template_id = content_hash(q)
+            templates.setdefault(q.template_id, QuestionTemplate(
+                content_hash=q.template_id,
+                text=q.text,
+                answer_type=q.answer_type,
+                unit=q.unit,
+                options=list(q.options or []),
+                required=q.required,
+            ))
+
+        QuestionTemplate.objects.bulk_create(templates.values(), ignore_conflicts=True)
+        Question.objects.bulk_update(batch, ["template"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0008_required_answer_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTemplate',
+            fields=[
+                ('content_hash', models.CharField(editable=False, max_length=64, primary_key=True, serialize=False)),
+                ('text', models.TextField()),
+                ('answer_type', models.CharField(choices=[('text', 'Text'), ('number', 'Number'), ('boolean', 'Boolean'), ('select', 'Select')], default='text', max_length=16)),
+                ('unit', models.CharField(blank=True, max_length=32)),
+                ('options', models.JSONField(blank=True, default=list)),
+                ('required', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='template',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='questions', to='estimation_sessions.questiontemplate'),
+        ),
+        migrations.RunPython(deduplicate_questions, migrations.RunPython.noop),
+    ]
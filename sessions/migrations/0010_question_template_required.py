@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0009_question_templates'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='question',
+            name='answer_type',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='options',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='required',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='text',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='unit',
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='questions', to='estimation_sessions.questiontemplate'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:46
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Frozen copy of the question keys in services.GENERIC_QUESTIONS (None) and
+# services.CATEGORY_SPECIFIC_QUESTIONS, by category and exact question text
+KEYS_BY_CATEGORY = {
+    None: {
+        "How many items are shown in the photo?": "item_count",
+        "Approximate size of the longest side in cm?": "longest_side",
+    },
+    "food": {
+        "Is this food raw or cooked?": "is_cooked",
+        "Is any portion missing or already eaten?": "portion_status",
+        "Does it have skin, peel, or shell on?": "peel",
+    },
+    "package": {
+        "Estimated length in cm?": "length",
+        "Estimated width in cm?": "width",
+        "Estimated height in cm?": "height",
+        "Is the package fragile?": "fragile",
+        "Shipping destination?": "destination",
+    },
+    "pet": {
+        "What breed is this pet? (if known)": "breed",
+        "What is the pet's age category?": "age_category",
+        "Is the pet male or female?": "gender",
+        "Is the pet spayed or neutered?": "neutered",
+    },
+    "person": {
+        "What is the person's height in cm?": "height",
+        "What is the person's age? (optional)": "age",
+        "Gender?": "gender",
+        "Activity level?": "activity",
+    },
+}
+
+
+def backfill_keys(apps, schema_editor):
+    """
+    Key the built-in questions the way services.question_keys_by_text does.
+
+    Generic questions are keyed in any session; category questions only in
+    sessions of that category. The category still lives in
+    object_json["detected_category"] at this point (0015 copies it into a column).
+    """
+    Question = apps.get_model("estimation_sessions", "Question")
+
+    for category, keys_by_text in KEYS_BY_CATEGORY.items():
+        questions = Question.objects.filter(key="")
+        if category is not None:
+            questions = questions.filter(session__object_json__detected_category=category)
+        for text, key in keys_by_text.items():
+            questions.filter(template__text=text).update(key=key)
+
+    # A session that asked the same keyed question twice keeps the key on the first one only
+    duplicates = (
+        Question.objects.exclude(key="")
+        .values("session_id", "key")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+    )
+    for dup in duplicates:
+        rows = Question.objects.filter(session_id=dup["session_id"], key=dup["key"]).order_by("order", "pk")
+        keep = rows.values_list("pk", flat=True).first()
+        rows.exclude(pk=keep).update(key="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0010_question_template_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='key',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.RunPython(backfill_keys, migrations.RunPython.noop),
+    ]
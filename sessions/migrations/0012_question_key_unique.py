@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0011_question_keys'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(condition=models.Q(('key', ''), _negated=True), fields=('session', 'key'), name='unique_question_key_per_session'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('estimation_sessions', '0012_question_key_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSessionStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='session_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_sessions', models.IntegerField(default=0)),
+                ('completed_sessions', models.IntegerField(default=0)),
+                ('estimate_count', models.IntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0.0)),
+                ('food_sessions', models.IntegerField(default=0)),
+                ('package_sessions', models.IntegerField(default=0)),
+                ('pet_sessions', models.IntegerField(default=0)),
+                ('person_sessions', models.IntegerField(default=0)),
+                ('general_sessions', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
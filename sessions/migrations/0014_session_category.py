@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0013_user_session_stats'),
+        ('media_store', '0002_image_quality_scores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estimationsession',
+            name='category',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='estimationsession',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='session_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estimationsession',
+            index=models.Index(fields=['user', 'status'], name='session_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:02
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_category(apps, schema_editor):
+    """Copy object_json["detected_category"] into the column, one committed batch at a time."""
+    EstimationSession = apps.get_model("estimation_sessions", "EstimationSession")
+
+    last_pk = None
+    while True:
+        batch = EstimationSession.objects.filter(category="").order_by("pk").only("pk", "object_json")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+
+        changed = []
+        for session in batch:
+            category = str((session.object_json or {}).get("detected_category") or "")[:20]
+            if category:
+                session.category = category
+                changed.append(session)
+        EstimationSession.objects.bulk_update(changed, ["category"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # Each batch commits on its own so a large table is not locked for the whole backfill
+    atomic = False
+
+    dependencies = [
+        ('estimation_sessions', '0014_session_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_category, migrations.RunPython.noop),
+    ]
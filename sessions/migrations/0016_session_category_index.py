@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Built after the backfill so the index is not updated row by row
+    dependencies = [
+        ('estimation_sessions', '0015_backfill_session_category'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='estimationsession',
+            index=models.Index(fields=['user', 'category'], name='session_user_category_idx'),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:00
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+BATCH_SIZE = 1000
+
+DOCUMENT_TABLE = "estimation_sessions_sessionsearchdocument"
+FTS_TABLE = "estimation_sessions_search_fts"
+
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        label, summary, rationale,
+        content='{DOCUMENT_TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, label, summary, rationale)
+        VALUES (new.id, new.label, new.summary, new.rationale);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, label, summary, rationale)
+        VALUES ('delete', old.id, old.label, old.summary, old.rationale);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, label, summary, rationale)
+        VALUES ('delete', old.id, old.label, old.summary, old.rationale);
+        INSERT INTO {FTS_TABLE}(rowid, label, summary, rationale)
+        VALUES (new.id, new.label, new.summary, new.rationale);
+    END""",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_CREATE = [
+    f"""ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(label, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(rationale, '')), 'C')
+    ) STORED""",
+    f"CREATE INDEX {DOCUMENT_TABLE}_search_idx ON {DOCUMENT_TABLE} USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    f"DROP INDEX IF EXISTS {DOCUMENT_TABLE}_search_idx",
+    f"ALTER TABLE {DOCUMENT_TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5 table + sync triggers on SQLite, tsvector column + GIN index on PostgreSQL."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for sql in POSTGRES_CREATE:
+            schema_editor.execute(sql)
+    elif vendor == "sqlite":
+        try:
+            for sql in SQLITE_CREATE:
+                schema_editor.execute(sql)
+        except OperationalError as e:
+            # SQLite built without FTS5: search falls back to substring matching
+            print(f"Session search index not created: {e}")
+            for sql in SQLITE_DROP:
+                schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for sql in POSTGRES_DROP:
+            schema_editor.execute(sql)
+    elif vendor == "sqlite":
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+
+
+def create_documents(apps, schema_editor):
+    """One search document per existing session, one batch of sessions at a time."""
+    EstimationSession = apps.get_model("estimation_sessions", "EstimationSession")
+    SessionSearchDocument = apps.get_model("estimation_sessions", "SessionSearchDocument")
+    WeightEstimate = apps.get_model("estimates", "WeightEstimate")
+
+    last_pk = None
+    while True:
+        batch = EstimationSession.objects.order_by("pk").values_list("pk", "object_label", "object_summary")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+
+        rationales = dict(
+            WeightEstimate.objects.filter(session_id__in=[pk for pk, _, _ in batch])
+            .values_list("session_id", "rationale")
+        )
+        SessionSearchDocument.objects.bulk_create([
+            SessionSearchDocument(
+                session_id=pk, label=label, summary=summary, rationale=rationales.get(pk, ""),
+            )
+            for pk, label, summary in batch
+        ])
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0016_session_category_index'),
+        ('estimates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(blank=True, max_length=200)),
+                ('summary', models.TextField(blank=True)),
+                ('rationale', models.TextField(blank=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='estimation_sessions.estimationsession')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(create_documents, migrations.RunPython.noop),
+    ]
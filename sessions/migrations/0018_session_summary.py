@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Frozen copy of models.MISSING_SORT_VALUE
+MISSING_SORT_VALUE = -1.0
+
+
+def create_summaries(apps, schema_editor):
+    """One summary row per existing session, one batch of sessions at a time."""
+    EstimationSession = apps.get_model("estimation_sessions", "EstimationSession")
+    SessionSummary = apps.get_model("estimation_sessions", "SessionSummary")
+    WeightEstimate = apps.get_model("estimates", "WeightEstimate")
+
+    last_pk = None
+    while True:
+        batch = EstimationSession.objects.order_by("pk").defer("object_json", "object_summary").select_related("image")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+
+        estimates = {e.session_id: e for e in WeightEstimate.objects.filter(session_id__in=[s.pk for s in batch])}
+        summaries = []
+        for session in batch:
+            est = estimates.get(session.pk)
+            summaries.append(SessionSummary(
+                session_id=session.pk,
+                user_id=session.user_id,
+                parent_id=session.parent_id,
+                image_id=session.image_id,
+                thumbnail=session.image.image.name if session.image_id else "",
+                label=session.object_label,
+                canonical_label=session.canonical_label,
+                category=session.category,
+                status=session.status,
+                value_grams=est.value_grams if est else None,
+                min_grams=est.min_grams if est else None,
+                max_grams=est.max_grams if est else None,
+                confidence=est.confidence if est else None,
+                estimate_category=est.category if est else "",
+                rationale=est.rationale if est else "",
+                weight_sort=est.value_grams if est else MISSING_SORT_VALUE,
+                confidence_sort=est.confidence if est else MISSING_SORT_VALUE,
+                created_at=session.created_at,
+                updated_at=session.updated_at,
+            ))
+        SessionSummary.objects.bulk_create(summaries)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0017_session_search'),
+        ('estimates', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionSummary',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='estimation_sessions.estimationsession')),
+                ('parent_id', models.UUIDField(blank=True, null=True)),
+                ('image_id', models.UUIDField(blank=True, null=True)),
+                ('thumbnail', models.CharField(blank=True, max_length=255)),
+                ('label', models.CharField(blank=True, max_length=200)),
+                ('canonical_label', models.CharField(blank=True, max_length=120)),
+                ('category', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(choices=[('PROCESSING', 'Processing'), ('QUESTIONS_ASKED', 'Questions Asked'), ('IN_PROGRESS', 'In Progress'), ('ESTIMATED', 'Estimated'), ('FAILED', 'Failed')], max_length=32)),
+                ('value_grams', models.FloatField(blank=True, null=True)),
+                ('min_grams', models.FloatField(blank=True, null=True)),
+                ('max_grams', models.FloatField(blank=True, null=True)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('estimate_category', models.CharField(blank=True, max_length=20)),
+                ('rationale', models.TextField(blank=True)),
+                ('weight_sort', models.FloatField(default=-1.0)),
+                ('confidence_sort', models.FloatField(default=-1.0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-session'], name='summary_user_date_idx'), models.Index(fields=['user', '-weight_sort', '-created_at', '-session'], name='summary_user_weight_idx'), models.Index(fields=['user', '-confidence_sort', '-created_at', '-session'], name='summary_user_confidence_idx')],
+            },
+        ),
+        migrations.RunPython(create_summaries, migrations.RunPython.noop),
+    ]
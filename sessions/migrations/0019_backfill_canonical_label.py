@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.db import migrations
+
+from estimates.taxonomy import build_taxonomy, canonicalize_label
+
+BATCH_SIZE = 1000
+
+
+def backfill_canonical_label(apps, schema_editor):
+    """Canonicalize the labels of sessions created before the column existed, one committed batch at a time."""
+    EstimationSession = apps.get_model("estimation_sessions", "EstimationSession")
+    SessionSummary = apps.get_model("estimation_sessions", "SessionSummary")
+    taxonomy = build_taxonomy(
+        apps.get_model("estimates", "FoodNutrition"),
+        apps.get_model("estimates", "BreedReference"),
+    )
+
+    last_pk = None
+    while True:
+        batch = (
+            EstimationSession.objects.filter(canonical_label="").exclude(object_label="")
+            .order_by("pk").only("pk", "object_label", "category")
+        )
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+
+        changed = []
+        for session in batch:
+            canonical_label = canonicalize_label(session.object_label, session.category or "general", taxonomy)
+            if canonical_label:
+                session.canonical_label = canonical_label
+                changed.append(session)
+        EstimationSession.objects.bulk_update(changed, ["canonical_label"])
+        # The summary rows were copied from the sessions by 0018
+        SessionSummary.objects.bulk_update(
+            [SessionSummary(session_id=s.pk, canonical_label=s.canonical_label) for s in changed],
+            ["canonical_label"],
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # Each batch commits on its own so a large table is not locked for the whole backfill
+    atomic = False
+
+    dependencies = [
+        ('estimation_sessions', '0018_session_summary'),
+        ('estimates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_canonical_label, migrations.RunPython.noop),
+    ]
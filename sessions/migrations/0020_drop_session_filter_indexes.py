@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Since 0018 the history list filters SessionSummary by status and category,
+    # so nothing reads these indexes any more; they only cost writes
+    dependencies = [
+        ('estimation_sessions', '0019_backfill_canonical_label'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='estimationsession',
+            name='session_user_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='estimationsession',
+            name='session_user_category_idx',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estimation_sessions', '0020_drop_session_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sessionsummary',
+            index=models.Index(fields=['user', 'status', '-created_at', '-session'], name='summary_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionsummary',
+            index=models.Index(fields=['user', 'category', '-created_at', '-session'], name='summary_user_category_idx'),
+        ),
+    ]
@@ -1,9 +1,15 @@
+import hashlib
+import json
 import uuid
+from typing import Any, Dict, Iterable, List
+
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from media_store.models import UploadedImage
 
 class SessionStatus(models.TextChoices):
+    PROCESSING = "PROCESSING", "Processing"
     QUESTIONS_ASKED = "QUESTIONS_ASKED", "Questions Asked"
     IN_PROGRESS = "IN_PROGRESS", "In Progress"
     ESTIMATED = "ESTIMATED", "Estimated"
@@ -12,18 +18,80 @@ class SessionStatus(models.TextChoices):
 class EstimationSession(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="estimation_sessions")
-    image = models.ForeignKey(UploadedImage, on_delete=models.PROTECT, related_name="sessions")
+    # Empty for sessions created from a text description
+    image = models.ForeignKey(UploadedImage, on_delete=models.PROTECT, related_name="sessions", null=True, blank=True)
+
+    # Session this one was forked from by a what-if re-estimate
+    parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="forks")
 
     object_label = models.CharField(max_length=200, blank=True)
+    # Normalized taxonomy id (e.g. "food:apple") shared by all spellings of a label
+    canonical_label = models.CharField(max_length=120, blank=True, db_index=True)
     object_summary = models.TextField(blank=True)
     object_json = models.JSONField(default=dict, blank=True)
+    # Detected category (object_json["detected_category"]); empty until identified
+    category = models.CharField(max_length=20, blank=True, default="")
+
+    # Models that served the identification and estimation calls (see services.ModelRouter)
+    vision_model = models.CharField(max_length=100, blank=True)
+    text_model = models.CharField(max_length=100, blank=True)
 
     status = models.CharField(max_length=32, choices=SessionStatus.choices, default=SessionStatus.QUESTIONS_ASKED)
 
+    # Running counters kept by the answer writes so readiness needs no recount
+    required_question_count = models.PositiveIntegerField(default=0)
+    required_answered_count = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-class Question(models.Model):
+    class Meta:
+        # The history list filters SessionSummary, which has its own (user, ...) indexes
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="session_user_created_idx"),
+        ]
+
+def question_content_hash(text: str, answer_type: str, unit: str, options: List[str], required: bool) -> str:
+    """Stable id for a question's content; identical questions share one template."""
+    content = json.dumps(
+        [text, answer_type, unit, list(options or []), bool(required)],
+        separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class QuestionTemplateManager(models.Manager):
+    def for_specs(self, specs: Iterable[Dict[str, Any]]) -> List["QuestionTemplate"]:
+        """
+        Templates for question specs, inserting the ones not stored yet.
+
+        Args:
+            specs: Dicts with text, answer_type, unit, options and required
+
+        Returns:
+            One template per spec, in order. All of them exist afterwards: a
+            single INSERT skips hashes that are already stored.
+        """
+        templates = []
+        for spec in specs:
+            fields = {
+                "text": spec["text"],
+                "answer_type": spec.get("answer_type", "text"),
+                "unit": spec.get("unit", ""),
+                "options": list(spec.get("options") or []),
+                "required": bool(spec.get("required", True)),
+            }
+            templates.append(self.model(content_hash=question_content_hash(**fields), **fields))
+
+        unique = {t.content_hash: t for t in templates}
+        if unique:
+            self.bulk_create(unique.values(), ignore_conflicts=True)
+        return templates
+
+
+class QuestionTemplate(models.Model):
+    """Question content shared by every session that asks the same question."""
+
     ANSWER_TYPES = (
         ("text", "Text"),
         ("number", "Number"),
@@ -31,9 +99,8 @@ class Question(models.Model):
         ("select", "Select"),
     )
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    session = models.ForeignKey(EstimationSession, on_delete=models.CASCADE, related_name="questions")
-    order = models.PositiveIntegerField(default=0)
+    # sha256 of the content (question_content_hash), so inserts need no lookup
+    content_hash = models.CharField(max_length=64, primary_key=True, editable=False)
 
     text = models.TextField()
     answer_type = models.CharField(max_length=16, choices=ANSWER_TYPES, default="text")
@@ -41,8 +108,62 @@ class Question(models.Model):
     options = models.JSONField(default=list, blank=True)
     required = models.BooleanField(default=True)
 
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = QuestionTemplateManager()
+
+    def __str__(self):
+        return self.text[:80]
+
+
+class QuestionManager(models.Manager):
+    def get_queryset(self):
+        # Question content lives on the template; always load it with the row
+        return super().get_queryset().select_related("template")
+
+
+class Question(models.Model):
+    """A template asked in one session, at a position in its question list."""
+
+    ANSWER_TYPES = QuestionTemplate.ANSWER_TYPES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    session = models.ForeignKey(EstimationSession, on_delete=models.CASCADE, related_name="questions")
+    template = models.ForeignKey(QuestionTemplate, on_delete=models.PROTECT, related_name="questions")
+    order = models.PositiveIntegerField(default=0)
+    # Semantic id of a category question ("height", "breed"); empty for free-form questions
+    key = models.CharField(max_length=40, blank=True)
+
+    objects = QuestionManager()
+
     class Meta:
         ordering = ["order"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "key"], condition=~models.Q(key=""), name="unique_question_key_per_session",
+            ),
+        ]
+
+    # Read-only views of the template so existing callers and serializers keep working
+    @property
+    def text(self) -> str:
+        return self.template.text
+
+    @property
+    def answer_type(self) -> str:
+        return self.template.answer_type
+
+    @property
+    def unit(self) -> str:
+        return self.template.unit
+
+    @property
+    def options(self) -> List[str]:
+        return self.template.options
+
+    @property
+    def required(self) -> bool:
+        return self.template.required
 
 class Answer(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -59,3 +180,180 @@ class Answer(models.Model):
     class Meta:
         unique_together = [("session", "question")]
 
+
+class PipelineStage(models.TextChoices):
+    VALIDATION = "validation", "Validation"
+    IDENTIFICATION = "identification", "Identification"
+    ESTIMATION = "estimation", "Estimation"
+    CATEGORY = "category", "Category post-processing"
+
+class CheckpointStatus(models.TextChoices):
+    RUNNING = "RUNNING", "Running"
+    COMPLETED = "COMPLETED", "Completed"
+    SKIPPED = "SKIPPED", "Skipped"
+    FAILED = "FAILED", "Failed"
+
+class PipelineCheckpoint(models.Model):
+    """Outcome of one pipeline stage; completed stages are never re-run for the same input."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    session = models.ForeignKey(EstimationSession, on_delete=models.CASCADE, related_name="checkpoints")
+    stage = models.CharField(max_length=16, choices=PipelineStage.choices)
+    status = models.CharField(max_length=16, choices=CheckpointStatus.choices, default=CheckpointStatus.RUNNING)
+
+    # Hash of the stage input; a completed output is reused only for the same input
+    fingerprint = models.CharField(max_length=64, blank=True)
+    output = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [("session", "stage")]
+        ordering = ["started_at"]
+
+class IdempotencyKey(models.Model):
+    """Claim on a request key; stores the response so repeats replay it instead of re-executing."""
+
+    IN_FLIGHT = "IN_FLIGHT"
+    COMPLETED = "COMPLETED"
+    STATES = ((IN_FLIGHT, "In flight"), (COMPLETED, "Completed"))
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys")
+    # Endpoint (and object) the key applies to, e.g. "answers:<session id>"
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    # Hash of the request body; a key reused with a different body is rejected
+    fingerprint = models.CharField(max_length=64)
+
+    state = models.CharField(max_length=16, choices=STATES, default=IN_FLIGHT)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = [("user", "scope", "key")]
+
+
+# Categories counted in the history statistics, with their UserSessionStats column
+STATS_CATEGORIES = ("food", "package", "pet", "person", "general")
+
+
+class UserSessionStats(models.Model):
+    """
+    Per-user history statistics, kept current by signals (see sessions/stats.py).
+
+    Counters are plain integers (not positive-only) so a delta applied to a
+    row that drifted cannot fail the write that triggered it.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="session_stats"
+    )
+    total_sessions = models.IntegerField(default=0)
+    completed_sessions = models.IntegerField(default=0)
+    estimate_count = models.IntegerField(default=0)
+    confidence_sum = models.FloatField(default=0.0)
+
+    food_sessions = models.IntegerField(default=0)
+    package_sessions = models.IntegerField(default=0)
+    pet_sessions = models.IntegerField(default=0)
+    person_sessions = models.IntegerField(default=0)
+    general_sessions = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField()
+
+    def as_statistics(self) -> Dict[str, Any]:
+        """The statistics block in the shape the history page uses."""
+        avg_confidence = self.confidence_sum / self.estimate_count if self.estimate_count > 0 else 0
+        breakdown = {}
+        for category in STATS_CATEGORIES:
+            count = getattr(self, f"{category}_sessions")
+            if count > 0:
+                breakdown[category] = count
+        return {
+            "total_sessions": self.total_sessions,
+            "completed_sessions": self.completed_sessions,
+            "pending_sessions": self.total_sessions - self.completed_sessions,
+            "average_confidence": round(avg_confidence * 100, 1) if avg_confidence else 0,
+            "category_breakdown": breakdown,
+        }
+
+
+class SessionSearchDocument(models.Model):
+    """
+    Searchable text of a session, kept current by signals (see sessions/search.py).
+
+    The database indexes these rows: an FTS5 table on SQLite and a generated
+    tsvector column on PostgreSQL, both created by migration 0017 rather
+    than declared here.
+    """
+
+    session = models.OneToOneField(EstimationSession, on_delete=models.CASCADE, related_name="search_document")
+    label = models.CharField(max_length=200, blank=True)
+    summary = models.TextField(blank=True)
+    rationale = models.TextField(blank=True)
+
+
+# Sort value of sessions without an estimate; below every real weight/confidence
+MISSING_SORT_VALUE = -1.0
+
+
+class SessionSummary(models.Model):
+    """
+    Narrow, denormalized history row per session, kept current by signals (see sessions/summary.py).
+
+    The history list, statistics and export read this table alone instead of
+    joining sessions to estimates. weight_sort and confidence_sort repeat the
+    estimate values with MISSING_SORT_VALUE instead of NULL, so each history
+    sort is one (user, sort, created_at, session) index scan. The status and
+    category filters have their own (user, filter, created_at, session)
+    indexes for the default date order; a filter combined with a weight or
+    confidence sort reads the filter's index and sorts its rows.
+    """
+
+    session = models.OneToOneField(
+        EstimationSession, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="session_summaries")
+    parent_id = models.UUIDField(null=True, blank=True)
+    image_id = models.UUIDField(null=True, blank=True)
+    # Storage name of the uploaded image, for building its URL without a join
+    thumbnail = models.CharField(max_length=255, blank=True)
+
+    label = models.CharField(max_length=200, blank=True)
+    canonical_label = models.CharField(max_length=120, blank=True)
+    category = models.CharField(max_length=20, blank=True)
+    status = models.CharField(max_length=32, choices=SessionStatus.choices)
+
+    # Estimate values; NULL until the session is estimated
+    value_grams = models.FloatField(null=True, blank=True)
+    min_grams = models.FloatField(null=True, blank=True)
+    max_grams = models.FloatField(null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    estimate_category = models.CharField(max_length=20, blank=True)
+    rationale = models.TextField(blank=True)
+
+    weight_sort = models.FloatField(default=MISSING_SORT_VALUE)
+    confidence_sort = models.FloatField(default=MISSING_SORT_VALUE)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-session"], name="summary_user_date_idx"),
+            models.Index(fields=["user", "-weight_sort", "-created_at", "-session"], name="summary_user_weight_idx"),
+            models.Index(
+                fields=["user", "-confidence_sort", "-created_at", "-session"], name="summary_user_confidence_idx",
+            ),
+            models.Index(fields=["user", "status", "-created_at", "-session"], name="summary_user_status_idx"),
+            models.Index(fields=["user", "category", "-created_at", "-session"], name="summary_user_category_idx"),
+        ]
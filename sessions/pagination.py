@@ -0,0 +1,139 @@
+"""
+Keyset (cursor) pagination for the session history.
+
+Offset pagination gets slower with every page and skips or repeats rows
+when sessions are created or estimated between requests. Here each page
+continues strictly after the last row of the previous one, using the sort
+key plus created_at and the primary key (the session id) as tie-breakers,
+so pages stay stable under all history sort orders. The cursor is an opaque
+base64 token of those values.
+
+The history pages SessionSummary rows, whose sort columns are never NULL
+and are covered by (user, sort, created_at, session) indexes.
+"""
+
+import base64
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import F, Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+# Sort orders: query value -> non-null field sorted descending (None = date only)
+SORT_FIELDS = {
+    "date": None,
+    "weight": "weight_sort",
+    "confidence": "confidence_sort",
+    # Annotated by search.search_sessions; only valid on searched querysets
+    "relevance": "search_rank",
+}
+
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Invalid cursor.")
+    if not isinstance(values, dict) or "created_at" not in values or "id" not in values:
+        raise InvalidCursor("Invalid cursor.")
+    try:
+        values["id"] = uuid.UUID(str(values["id"]))
+    except ValueError:
+        raise InvalidCursor("Invalid cursor.")
+    return values
+
+
+class SessionKeysetPagination:
+    """
+    Paginate a session queryset by (sort value, created_at, pk), newest first.
+
+    Usage:
+        paginator = SessionKeysetPagination(request, sort_by)
+        page = paginator.paginate(qs)
+        paginator.next_cursor  # None on the last page
+    """
+
+    def __init__(self, request, sort_by: str = "date"):
+        self.request = request
+        self.sort_by = sort_by if sort_by in SORT_FIELDS else "date"
+        self.page_size = self._page_size(request)
+        self.next_cursor: Optional[str] = None
+
+    @staticmethod
+    def _page_size(request) -> int:
+        default = settings.REST_FRAMEWORK.get("PAGE_SIZE", 20)
+        try:
+            size = int(request.query_params.get("page_size", default))
+        except ValueError:
+            size = default
+        return max(1, min(size, MAX_PAGE_SIZE))
+
+    def order(self, qs: QuerySet) -> QuerySet:
+        """Annotate the sort key and apply the matching total order."""
+        field = SORT_FIELDS[self.sort_by]
+        if field is None:
+            return qs.order_by("-created_at", "-pk")
+        qs = qs.annotate(sort_value=F(field))
+        return qs.order_by("-sort_value", "-created_at", "-pk")
+
+    def _after(self, qs: QuerySet, cursor: Dict[str, Any]) -> QuerySet:
+        created_at = parse_datetime(str(cursor["created_at"]))
+        if created_at is None:
+            raise InvalidCursor("Invalid cursor.")
+
+        # Rows strictly after the cursor row in (created_at, pk) descending order
+        after = Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=cursor["id"])
+        if SORT_FIELDS[self.sort_by] is not None:
+            try:
+                sort_value = float(cursor["sort_value"])
+            except (KeyError, TypeError, ValueError):
+                raise InvalidCursor("Invalid cursor.")
+            after = Q(sort_value__lt=sort_value) | (Q(sort_value=sort_value) & after)
+        return qs.filter(after)
+
+    def paginate(self, qs: QuerySet) -> List[Any]:
+        """
+        Return one page of the queryset.
+
+        Raises:
+            InvalidCursor: If the cursor query parameter is malformed
+        """
+        qs = self.order(qs)
+        cursor = self.request.query_params.get("cursor", "").strip()
+        if cursor:
+            qs = self._after(qs, decode_cursor(cursor))
+
+        # One extra row tells whether another page exists
+        rows = list(qs[:self.page_size + 1])
+        page = rows[:self.page_size]
+        if len(rows) > self.page_size:
+            self.next_cursor = encode_cursor(self._cursor_for(page[-1]))
+        return page
+
+    def _cursor_for(self, row) -> Dict[str, Any]:
+        values = {"created_at": row.created_at.isoformat(), "id": str(row.pk)}
+        if SORT_FIELDS[self.sort_by] is not None:
+            values["sort_value"] = row.sort_value
+        return values
+
+    def next_link(self) -> Optional[str]:
+        """Absolute URL of the next page, keeping the current filters."""
+        if self.next_cursor is None:
+            return None
+        params = self.request.query_params.copy()
+        params["cursor"] = self.next_cursor
+        return self.request.build_absolute_uri(f"{self.request.path}?{params.urlencode()}")
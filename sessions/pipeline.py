@@ -0,0 +1,952 @@
+"""
+Estimation pipeline shared by every session entry point.
+
+The pipeline is a small state machine over four stages:
+
+    validation -> identification -> (user answers) -> estimation -> category
+
+Each stage runs through run_stage, which stores a PipelineCheckpoint with the
+stage output, timing and error. A completed stage is never re-run for the same
+input, so resume_pipeline (the retry endpoint) continues from the first
+incomplete stage without repeating paid provider calls.
+
+Helpers:
+- create_questions: persist identification questions on a session
+- create_provided_answers: store caller-supplied question/answer pairs
+- set_answer_value: parse a submitted value into an Answer
+- load_answer_map / save_answers: prefetched question/answer map and bulk answer upsert
+- save_answer: single-answer autosave that keeps the required-answered counter
+- fork_session: copy a session's identification, questions and answers for a what-if
+- build_qa_items: question/answer pairs in the shape the estimation prompt uses
+- answers_by_key: answered values by semantic question key, for category post-processing
+- create_weight_estimate: persist a normalized LLM estimate
+- apply_category_calculations: nutrition, shipping, pet health and BMI extras
+"""
+
+import copy
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from estimates.models import (
+    WeightEstimate, FoodEstimate, PackageEstimate,
+    PetEstimate, BodyCompositionEstimate, FoodNutrition, BMICategory
+)
+from estimates.calculations import (
+    calculate_nutrition, calculate_shipping_costs,
+    assess_pet_health, calculate_bmi_insights
+)
+
+from estimates.taxonomy import canonicalize_label
+from media_store.quality import QualityGrade, image_complexity
+
+from .local_classifier import classify_locally, is_fast_path, is_usable_fallback
+from .models import (
+    Answer, EstimationSession, Question, QuestionTemplate, SessionStatus,
+    PipelineCheckpoint, PipelineStage, CheckpointStatus,
+)
+from .services import (
+    detect_category,
+    estimate_weight_cascade,
+    express_estimate,
+    identify_object_and_questions,
+    image_file_to_data_url,
+    local_identification,
+    question_keys_by_text,
+    route_model,
+    validate_image_content,
+    ProviderUnavailableError,
+)
+
+
+# ============================================
+# CHECKPOINTS
+# ============================================
+
+def fingerprint(data: Any) -> str:
+    """Stable hash of a stage input."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _finish(cp: PipelineCheckpoint, started: float, status: str, output: Any = None, error: str = "") -> None:
+    cp.status = status
+    cp.output = output if output is not None else {}
+    cp.error = error
+    cp.finished_at = timezone.now()
+    cp.duration_ms = round((time.monotonic() - started) * 1000, 1)
+    cp.save()
+
+
+def run_stage(session: EstimationSession, stage: str, fn: Callable[[], Any], inputs: Any = None) -> Any:
+    """
+    Run a pipeline stage once per input and checkpoint its outcome.
+
+    Args:
+        session: Session the stage belongs to
+        stage: PipelineStage value
+        fn: Does the work and returns a JSON-serializable output
+        inputs: Stage input; a completed checkpoint with the same fingerprint
+            is returned without calling fn
+
+    Returns:
+        The stage output, fresh or from the checkpoint
+
+    Raises:
+        Whatever fn raises, after the checkpoint is marked FAILED
+    """
+    fp = fingerprint(inputs)
+    cp, _ = PipelineCheckpoint.objects.get_or_create(session=session, stage=stage)
+    if cp.status == CheckpointStatus.COMPLETED and cp.fingerprint == fp:
+        return cp.output
+
+    cp.status = CheckpointStatus.RUNNING
+    cp.fingerprint = fp
+    cp.error = ""
+    cp.attempts += 1
+    cp.started_at = timezone.now()
+    cp.finished_at = None
+    cp.save()
+
+    started = time.monotonic()
+    try:
+        output = fn()
+    except Exception as e:
+        _finish(cp, started, CheckpointStatus.FAILED, error=str(e)[:2000])
+        raise
+    _finish(cp, started, CheckpointStatus.COMPLETED, output=output)
+    return output
+
+
+def skip_stage(session: EstimationSession, stage: str, reason: str) -> None:
+    """Record a stage that was deliberately not run."""
+    now = timezone.now()
+    PipelineCheckpoint.objects.update_or_create(
+        session=session,
+        stage=stage,
+        defaults={
+            "status": CheckpointStatus.SKIPPED,
+            "fingerprint": "",
+            "output": {"reason": reason},
+            "error": "",
+            "started_at": now,
+            "finished_at": now,
+            "duration_ms": 0.0,
+        },
+    )
+
+
+def stage_done(session: EstimationSession, stage: str) -> bool:
+    return session.checkpoints.filter(
+        stage=stage, status__in=[CheckpointStatus.COMPLETED, CheckpointStatus.SKIPPED]
+    ).exists()
+
+
+def mark_failed(session: EstimationSession) -> None:
+    """Mark a session FAILED unless it already has a usable estimate."""
+    if WeightEstimate.objects.filter(session=session).exists():
+        return
+    session.status = SessionStatus.FAILED
+    session.save(update_fields=["status", "updated_at"])
+
+
+# ============================================
+# STORAGE HELPERS
+# ============================================
+
+
+def create_questions(session: EstimationSession, questions: List[Dict[str, Any]]) -> List[Question]:
+    """Store LLM/local questions on a session in the given order, sharing identical templates."""
+    templates = QuestionTemplate.objects.for_specs(
+        {
+            "text": str(q.get("question", "") or "").strip(),
+            "answer_type": str(q.get("answer_type", "text") or "text").strip(),
+            "unit": str(q.get("unit", "") or "").strip(),
+            "options": q.get("options", []) or [],
+            "required": bool(q.get("required", True)),
+        }
+        for q in questions
+    )
+    return Question.objects.bulk_create([
+        Question(session=session, order=idx, template=template, key=key)
+        for idx, (template, key) in enumerate(zip(templates, question_keys(questions)), start=1)
+    ])
+
+
+def question_keys(questions: List[Dict[str, Any]]) -> List[str]:
+    """Semantic key per question; a key already used earlier in the list is dropped."""
+    keys, seen = [], set()
+    for q in questions:
+        key = str(q.get("key", "") or "").strip()[:40]
+        if key in seen:
+            key = ""
+        seen.add(key)
+        keys.append(key)
+    return keys
+
+
+def infer_answer_type(value: Any) -> str:
+    """Answer type for a caller-supplied value that has no question definition."""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    try:
+        float(str(value))
+        return "number"
+    except ValueError:
+        return "text"
+
+
+def create_provided_answers(session: EstimationSession, items: List[Dict[str, Any]]) -> None:
+    """
+    Store answers given together with their question text (text-only sessions).
+
+    Each item is {"question": str, "value": any, "unit": optional str,
+    "key": optional semantic key}; a question and its answer are created for
+    each one. Items without a key that repeat one of the session category's
+    built-in questions word for word get that question's key, as migration
+    0011 did for existing questions.
+    """
+    keys_by_text = question_keys_by_text(session.category or "general")
+    items = [
+        item if item.get("key") else {**item, "key": keys_by_text.get(str(item["question"]).strip(), "")}
+        for item in items
+    ]
+    specs = [
+        {
+            "text": str(item["question"]).strip(),
+            "answer_type": infer_answer_type(item["value"]),
+            "unit": str(item.get("unit", "") or "").strip()[:32],
+            "required": False,
+        }
+        for item in items
+    ]
+
+    with transaction.atomic():
+        templates = QuestionTemplate.objects.for_specs(specs)
+        questions = Question.objects.bulk_create([
+            Question(session=session, order=idx, template=template, key=key)
+            for idx, (template, key) in enumerate(zip(templates, question_keys(items)), start=1)
+        ])
+
+        answers = []
+        for q, item in zip(questions, items):
+            val = item["value"]
+            answers.append(Answer(
+                session=session,
+                question=q,
+                value_number=float(val) if q.answer_type == "number" else None,
+                value_boolean=val if q.answer_type == "boolean" else None,
+                value_text=str(val) if q.answer_type == "text" else "",
+            ))
+        Answer.objects.bulk_create(answers)
+
+
+def set_answer_value(ans: Answer, question: Question, val: Any) -> None:
+    """
+    Parse a submitted value into the answer's typed column.
+
+    Raises:
+        ValueError: If a number question gets a non-numeric value
+    """
+    ans.value_text = ""
+    ans.value_number = None
+    ans.value_boolean = None
+    ans.value_json = {}
+
+    if question.answer_type == "number":
+        try:
+            ans.value_number = float(val)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid number for question {question.id}")
+    elif question.answer_type == "boolean":
+        # Accept true/false, "true"/"false", 1/0
+        if isinstance(val, str):
+            ans.value_boolean = val.strip().lower() in ["true", "1", "yes", "y"]
+        else:
+            ans.value_boolean = bool(val)
+    else:
+        ans.value_text = str(val)
+
+
+def fork_session(session: EstimationSession, overrides: Dict[str, Any]) -> EstimationSession:
+    """
+    Fork a session for a what-if re-estimate.
+
+    The fork reuses the stored identification (label, summary, object_json,
+    questions) so no vision call is repeated, copies every answer and then
+    applies the overrides.
+
+    Args:
+        session: Session to fork
+        overrides: {source question id (str): new value}
+
+    Returns:
+        The new session (status IN_PROGRESS, parent set to the source)
+
+    Raises:
+        ValueError: If an override value is invalid for its question; nothing is saved
+    """
+    questions = list(session.questions.all())
+    source_answers = list(session.answers.all())
+    required_ids = {str(q.id) for q in questions if q.required}
+    answered_ids = {str(a.question_id) for a in source_answers} | set(overrides)
+
+    with transaction.atomic():
+        object_json = copy.deepcopy(session.object_json)
+        object_json["_forked_from"] = str(session.id)
+
+        fork = EstimationSession.objects.create(
+            user=session.user,
+            image=session.image,
+            parent=session,
+            object_label=session.object_label,
+            canonical_label=session.canonical_label,
+            object_summary=session.object_summary,
+            object_json=object_json,
+            category=session.category,
+            vision_model=session.vision_model,
+            status=SessionStatus.IN_PROGRESS,
+            required_question_count=len(required_ids),
+            required_answered_count=len(required_ids & answered_ids),
+        )
+
+        question_map = {
+            str(q.id): Question(session=fork, order=q.order, template=q.template, key=q.key)
+            for q in questions
+        }
+        Question.objects.bulk_create(question_map.values())
+
+        answers = {}
+        for a in source_answers:
+            answers[str(a.question_id)] = Answer(
+                session=fork,
+                question=question_map[str(a.question_id)],
+                value_text=a.value_text,
+                value_number=a.value_number,
+                value_boolean=a.value_boolean,
+                value_json=a.value_json,
+            )
+
+        for qid, val in overrides.items():
+            q = question_map[qid]
+            ans = answers.setdefault(qid, Answer(session=fork, question=q))
+            try:
+                set_answer_value(ans, q, val)
+            except ValueError:
+                # Report the id the caller sent, not the fork's copy
+                raise ValueError(f"Invalid number for question {qid}")
+
+        Answer.objects.bulk_create(answers.values())
+
+    return fork
+
+
+def answer_value(question, answer):
+    """Typed value of an answer (None when unanswered)."""
+    if not answer:
+        return None
+    if question.answer_type == "number":
+        return answer.value_number
+    if question.answer_type == "boolean":
+        return answer.value_boolean
+    return answer.value_text
+
+
+ANSWER_VALUE_FIELDS = ["value_text", "value_number", "value_boolean", "value_json"]
+
+
+def load_answer_map(session: EstimationSession) -> Tuple[List[Question], Dict[str, Answer]]:
+    """
+    Load a session's questions and answers in two queries.
+
+    Returns:
+        (questions in order, {question id (str): Answer})
+    """
+    questions = list(session.questions.all())
+    answers = {str(a.question_id): a for a in session.answers.all()}
+    return questions, answers
+
+
+def save_answers(session: EstimationSession, q_by_id: Dict[str, Question],
+                 answers: Dict[str, Answer], items: Dict[str, Any]) -> None:
+    """
+    Upsert submitted answers in one statement.
+
+    Existing Answer instances from the map are updated in place and new ones
+    are added to it, so the map reflects the saved state afterwards. The
+    session row is locked for the upsert, and required_answered_count is
+    recounted from the saved answers in the same transaction.
+
+    Args:
+        session: Session the answers belong to
+        q_by_id: {question id (str): Question}
+        answers: {question id (str): Answer}, as returned by load_answer_map
+        items: {question id (str): submitted value}; ids must be in q_by_id
+
+    Raises:
+        ValueError: If a value is invalid for its question; nothing is saved
+    """
+    changed = []
+    for qid, val in items.items():
+        q = q_by_id[qid]
+        ans = answers.get(qid) or Answer(session=session, question=q)
+        set_answer_value(ans, q, val)
+        changed.append((qid, ans))
+
+    with transaction.atomic():
+        _lock_session(session)
+        Answer.objects.bulk_create(
+            [ans for _, ans in changed],
+            update_conflicts=True,
+            unique_fields=["session", "question"],
+            update_fields=ANSWER_VALUE_FIELDS,
+        )
+        # The map was loaded before the lock, so a concurrent or repeated submit may
+        # already have inserted some of these answers: recount rather than add
+        if any(q_by_id[qid].required for qid in items):
+            _recount_required_answered(session)
+    answers.update(changed)
+
+
+def save_answer(session: EstimationSession, question: Question, val: Any) -> bool:
+    """
+    Upsert a single answer (autosave); never calls a provider.
+
+    Changing an existing answer is one UPDATE on the (session, question)
+    unique index. A first answer is inserted and, for a required question,
+    bumps the session's required_answered_count in the same transaction.
+
+    Returns:
+        True if the answer was created, False if an existing one was updated
+
+    Raises:
+        ValueError: If the value is invalid for the question
+    """
+    ans = Answer(session=session, question=question)
+    set_answer_value(ans, question, val)
+    values = {field: getattr(ans, field) for field in ANSWER_VALUE_FIELDS}
+
+    existing = Answer.objects.filter(session=session, question=question)
+    if existing.update(**values):
+        return False
+
+    try:
+        with transaction.atomic():
+            # Serialised with save_answers, which recounts under the same lock
+            _lock_session(session)
+            ans.save(force_insert=True)
+            if question.required:
+                _count_required_answered(session, 1)
+    except IntegrityError:
+        # A concurrent request inserted it first; that one was counted
+        existing.update(**values)
+        return False
+    return True
+
+
+def _lock_session(session: EstimationSession) -> None:
+    """Lock the session row until the end of the current transaction."""
+    list(EstimationSession.objects.select_for_update().filter(pk=session.pk).values_list("pk", flat=True))
+
+
+def _count_required_answered(session: EstimationSession, n: int) -> None:
+    EstimationSession.objects.filter(pk=session.pk).update(
+        required_answered_count=F("required_answered_count") + n
+    )
+    session.required_answered_count += n
+
+
+def _recount_required_answered(session: EstimationSession) -> None:
+    count = Answer.objects.filter(session=session, question__template__required=True).count()
+    EstimationSession.objects.filter(pk=session.pk).update(required_answered_count=count)
+    session.required_answered_count = count
+
+
+def answers_by_key(questions: List[Question], answers: Dict[str, Answer]) -> Dict[str, Any]:
+    """
+    Answered values of keyed questions, e.g. {"height": 180.0, "breed": "Beagle"}.
+
+    Built once per estimation so category lookups are exact dict hits.
+    Unanswered questions are left out, so callers' defaults apply.
+    """
+    values = {}
+    for q in questions:
+        if not q.key:
+            continue
+        val = answer_value(q, answers.get(str(q.id)))
+        if val is not None:
+            values[q.key] = val
+    return values
+
+
+def build_qa_items(session: EstimationSession, questions: Optional[List[Question]] = None,
+                   answers: Optional[Dict[str, Answer]] = None) -> List[Dict[str, Any]]:
+    """Question/answer pairs for the estimation prompt, in question order."""
+    if questions is None or answers is None:
+        questions, answers = load_answer_map(session)
+
+    qa_items = []
+    for q in questions:
+        a = answers.get(str(q.id))
+        qa_items.append({
+            "question": q.text,
+            "answer_type": q.answer_type,
+            "unit": q.unit,
+            "answer": answer_value(q, a),
+            "options": q.options,
+            "required": q.required,
+        })
+    return qa_items
+
+
+def estimate_category(session: EstimationSession) -> str:
+    """Category for the estimate: from the label, else the one stored at identification."""
+    category = detect_category(session.object_label)
+    if not category:
+        category = session.category or "general"
+    return category
+
+
+def create_weight_estimate(session: EstimationSession, llm_est: Dict[str, Any], category: str) -> WeightEstimate:
+    """Persist an estimate_weight-shaped output as the session's WeightEstimate."""
+    grams = llm_est.get("_normalized_grams", {}) or {}
+    ew = llm_est.get("estimated_weight", {}) or {}
+
+    return WeightEstimate.objects.create(
+        session=session,
+        value_grams=float(grams.get("value_g", 0.0) or 0.0),
+        min_grams=float(grams.get("min_g", grams.get("value_g", 0.0)) or 0.0),
+        max_grams=float(grams.get("max_g", grams.get("value_g", 0.0)) or 0.0),
+        confidence=float(llm_est.get("confidence", 0.3) or 0.3),
+        unit_display=str(ew.get("unit", "g") or "g"),
+        rationale=str(llm_est.get("rationale", "") or "")[:2000],
+        raw_json=llm_est,
+        category=category,
+    )
+
+
+def apply_category_calculations(est: WeightEstimate, session: EstimationSession,
+                                answers: Dict[str, Any], category: str) -> Dict[str, Any]:
+    """
+    Attach category-specific details to an estimate.
+
+    Details left by an earlier, partially failed run are replaced. Errors
+    propagate; run_category_calculations records and swallows them.
+
+    Args:
+        answers: Answered values by question key (see answers_by_key)
+
+    Returns:
+        The estimate's category_metadata
+    """
+    for details in (FoodEstimate, PackageEstimate, PetEstimate, BodyCompositionEstimate):
+        details.objects.filter(estimate=est).delete()
+
+    weight_kg = est.value_grams / 1000.0
+
+    if category == "food":
+        # Calculate nutrition information
+        nutrition_data = calculate_nutrition(
+            weight_grams=est.value_grams,
+            food_name=session.object_label,
+            answers=answers,
+        )
+
+        if nutrition_data.get("found"):
+            food_ref_id = nutrition_data.get("food_reference_id")
+            food_ref = FoodNutrition.objects.filter(id=food_ref_id).first() if food_ref_id else None
+
+            FoodEstimate.objects.create(
+                estimate=est,
+                food_reference=food_ref,
+                estimated_calories=nutrition_data.get("estimated_calories", 0),
+                estimated_protein=nutrition_data.get("estimated_protein", 0),
+                estimated_carbs=nutrition_data.get("estimated_carbs", 0),
+                estimated_fat=nutrition_data.get("estimated_fat", 0),
+                estimated_fiber=nutrition_data.get("estimated_fiber", 0),
+                is_cooked=str(answers.get("is_cooked", "")).lower() == "cooked",
+                portion_status=str(answers.get("portion_status", ""))[:50],
+            )
+            est.category_metadata = nutrition_data
+            est.save(update_fields=["category_metadata"])
+
+    elif category == "package":
+        # Extract dimensions from answers
+        length_cm = answers.get("length", 0)
+        width_cm = answers.get("width", 0)
+        height_cm = answers.get("height", 0)
+        destination = answers.get("destination", "Domestic")
+
+        if length_cm and width_cm and height_cm:
+            shipping_data = calculate_shipping_costs(
+                weight_grams=est.value_grams,
+                dimensions={
+                    "length_cm": length_cm,
+                    "width_cm": width_cm,
+                    "height_cm": height_cm,
+                },
+                destination_type=destination
+            )
+
+            PackageEstimate.objects.create(
+                estimate=est,
+                length_cm=length_cm,
+                width_cm=width_cm,
+                height_cm=height_cm,
+                volumetric_weight_g=shipping_data.get("volumetric_weight_g"),
+                chargeable_weight_g=shipping_data.get("chargeable_weight_g", est.value_grams),
+                estimated_shipping_costs=shipping_data.get("shipping_costs", {}),
+                destination_type=destination,
+            )
+            est.category_metadata = shipping_data
+            est.save(update_fields=["category_metadata"])
+
+    elif category == "pet":
+        # Extract pet details from answers
+        breed_name = answers.get("breed", "")
+        age_category = answers.get("age_category", "adult")
+        gender = answers.get("gender", "")
+
+        # Extract species from object label
+        species = "dog"  # default
+        if "cat" in session.object_label.lower():
+            species = "cat"
+        elif "rabbit" in session.object_label.lower():
+            species = "rabbit"
+
+        health_data = assess_pet_health(
+            weight_kg=weight_kg,
+            species=species,
+            breed_name=breed_name,
+            age_category=age_category
+        )
+
+        if age_category and "puppy" in age_category.lower() or "kitten" in age_category.lower():
+            age_cat = "puppy" if species == "dog" else "kitten"
+        elif "senior" in age_category.lower():
+            age_cat = "senior"
+        else:
+            age_cat = "adult"
+
+        breed_ref_id = health_data.get("breed_reference_id")
+        from estimates.models import BreedReference
+        breed_ref = BreedReference.objects.filter(id=breed_ref_id).first() if breed_ref_id else None
+
+        PetEstimate.objects.create(
+            estimate=est,
+            species=species,
+            breed=breed_name or health_data.get("breed_name", ""),
+            breed_reference=breed_ref,
+            age_category=age_cat,
+            gender=gender,
+            health_status=health_data.get("health_status", "unknown"),
+            ideal_weight_min=health_data.get("ideal_weight_min"),
+            ideal_weight_max=health_data.get("ideal_weight_max"),
+            weight_recommendation=health_data.get("weight_recommendation", ""),
+        )
+        est.category_metadata = health_data
+        est.save(update_fields=["category_metadata"])
+
+    elif category == "person":
+        # Extract person details from answers
+        height_cm = answers.get("height")
+        age = answers.get("age")
+        gender = answers.get("gender")
+        activity = answers.get("activity")
+
+        if height_cm:
+            bmi_data = calculate_bmi_insights(
+                weight_kg=weight_kg,
+                height_cm=float(height_cm),
+                age=int(age) if age else None,
+                gender=gender,
+                activity_level=activity
+            )
+
+            bmi_cat_id = bmi_data.get("bmi_category_id")
+            bmi_cat = BMICategory.objects.filter(id=bmi_cat_id).first() if bmi_cat_id else None
+
+            BodyCompositionEstimate.objects.create(
+                estimate=est,
+                height_cm=float(height_cm),
+                age=int(age) if age else None,
+                gender=gender or "",
+                activity_level=activity or "",
+                bmi=bmi_data.get("bmi", 0),
+                bmi_category=bmi_data.get("bmi_category", ""),
+                bmi_category_ref=bmi_cat,
+                ideal_weight_min_kg=bmi_data.get("ideal_weight_min_kg", 0),
+                ideal_weight_max_kg=bmi_data.get("ideal_weight_max_kg", 0),
+                body_fat_estimate=bmi_data.get("body_fat_estimate"),
+                lean_mass_estimate=bmi_data.get("lean_mass_estimate"),
+                health_recommendation=bmi_data.get("health_recommendation", ""),
+            )
+            est.category_metadata = bmi_data
+            est.save(update_fields=["category_metadata"])
+
+    return est.category_metadata
+
+
+# ============================================
+# STAGES
+# ============================================
+
+def required_answered(session: EstimationSession) -> bool:
+    """True when every required question has an answer (from the session's running counters)."""
+    return session.required_answered_count >= session.required_question_count
+
+
+def apply_identification(session: EstimationSession, llm_out: Dict[str, Any]) -> None:
+    """
+    Store an identification output on the session and create its questions.
+
+    One atomic write path: a single UPDATE of the session (label, category and
+    model together) and one bulk INSERT for the questions, so the query count
+    does not grow with the number of questions. Only called for sessions that
+    are not identified yet, so there are no earlier questions to replace.
+    """
+    category = llm_out.get("category", "general")
+    object_label = str(llm_out.get("object_label", "") or "")[:200]
+
+    if llm_out.get("source") == "local":
+        vision_model = f"local:{llm_out['local_classifier'].get('backend', '')}"
+    else:
+        vision_model = (llm_out.get("_llm") or {}).get("model", "")
+
+    # Keep request context stored at creation (user_hint, _source)
+    object_json = {**session.object_json, **llm_out}
+    object_json["detected_category"] = category
+
+    session.object_label = object_label
+    session.canonical_label = canonicalize_label(object_label, category)
+    session.object_summary = str(llm_out.get("object_summary", "") or "")
+    session.object_json = object_json
+    session.category = category
+    session.vision_model = vision_model[:100]
+    session.status = SessionStatus.QUESTIONS_ASKED
+
+    questions = llm_out.get("questions", []) or []
+    session.required_question_count = sum(1 for q in questions if bool(q.get("required", True)))
+    session.required_answered_count = 0
+
+    with transaction.atomic():
+        session.save(update_fields=[
+            "object_label", "canonical_label", "object_summary", "object_json", "category",
+            "vision_model", "status", "required_question_count", "required_answered_count", "updated_at",
+        ])
+        create_questions(session, questions)
+
+
+def run_identification(session: EstimationSession) -> Dict[str, Any]:
+    """
+    Validation and identification stages for an image session.
+
+    Raises:
+        ImageValidationError: The image was rejected by the validation call
+        ProviderUnavailableError: The provider is down and no local result is usable
+        LLMError: Any other provider failure
+    """
+    img = session.image
+    user_hint = session.object_json.get("user_hint", "")
+    complexity = image_complexity(img.blur_score)
+
+    # Optional on-CPU classifier: confident results skip the vision model
+    local = classify_locally(img.image.path)
+
+    def identify():
+        try:
+            if is_fast_path(local):
+                skip_stage(session, PipelineStage.VALIDATION, "local classifier fast path")
+                return local_identification(local)
+
+            data_url = image_file_to_data_url(img.image.path, mime_type=img.mime_type or "image/jpeg")
+
+            # Images the local pre-check graded as clearly good skip the paid validation call
+            if settings.SKIP_LLM_VALIDATION_FOR_GOOD_IMAGES and img.quality_grade == QualityGrade.GOOD:
+                skip_stage(session, PipelineStage.VALIDATION, "local quality grade: good")
+            else:
+                run_stage(
+                    session, PipelineStage.VALIDATION,
+                    lambda: validate_image_content(data_url, model=route_model("validation", complexity=complexity)),
+                    inputs={"image": str(img.id)},
+                )
+
+            return identify_object_and_questions(
+                data_url,
+                user_hint=user_hint,
+                model=route_model("identification", complexity=complexity, has_hint=bool(user_hint)),
+            )
+        except ProviderUnavailableError:
+            if not is_usable_fallback(local):
+                raise
+            return local_identification(local)
+
+    llm_out = run_stage(
+        session, PipelineStage.IDENTIFICATION, identify,
+        inputs={"image": str(img.id), "user_hint": user_hint},
+    )
+    apply_identification(session, llm_out)
+    return llm_out
+
+
+def run_express(session: EstimationSession) -> WeightEstimate:
+    """
+    Identification and estimation in one vision call (express sessions).
+
+    The single call is checkpointed as the identification stage; its estimate
+    part is recorded as the estimation stage so a later answers-based
+    estimate (different input) still runs.
+    """
+    img = session.image
+    user_hint = session.object_json.get("user_hint", "")
+
+    out = run_stage(
+        session, PipelineStage.IDENTIFICATION,
+        lambda: express_estimate(
+            image_file_to_data_url(img.image.path, mime_type=img.mime_type or "image/jpeg"),
+            user_hint=user_hint,
+            model=route_model("express", complexity=image_complexity(img.blur_score), has_hint=bool(user_hint)),
+        ),
+        inputs={"image": str(img.id), "user_hint": user_hint, "express": True},
+    )
+    # Uploads already passed the local quality pre-check
+    skip_stage(session, PipelineStage.VALIDATION, "express")
+
+    identification = {
+        k: out[k] for k in ("object_label", "object_summary", "questions", "category", "_llm") if k in out
+    }
+    apply_identification(session, identification)
+
+    estimate = {k: v for k, v in out.items() if k not in ("object_label", "object_summary", "questions", "_llm")}
+    estimate["_source"] = "express"
+    run_stage(session, PipelineStage.ESTIMATION, lambda: estimate, inputs={"express": True})
+
+    category = identification["category"]
+    est = create_weight_estimate(session, estimate, category)
+    run_category_calculations(est, session, {}, category)
+
+    session.text_model = session.vision_model
+    session.status = SessionStatus.ESTIMATED
+    session.save(update_fields=["text_model", "status", "updated_at"])
+    return est
+
+
+def run_estimation(session: EstimationSession) -> WeightEstimate:
+    """
+    Estimation and category stages for a session whose required questions are answered.
+
+    An existing estimate (an express one being refined) is replaced; the
+    replaced express output is kept under "_replaced_express".
+
+    Raises:
+        LLMError: The estimation call failed
+    """
+    questions, answers = load_answer_map(session)
+    qa_items = build_qa_items(session, questions, answers)
+    category = estimate_category(session)
+
+    llm_est = run_stage(
+        session, PipelineStage.ESTIMATION,
+        lambda: estimate_weight_cascade(
+            object_label=session.object_label,
+            object_summary=session.object_summary,
+            qa={"items": qa_items},
+            model=route_model(
+                "estimation",
+                category=session.category or "general",
+                complexity=image_complexity(session.image.blur_score if session.image else None),
+            ),
+        ),
+        inputs={"object_label": session.object_label, "object_summary": session.object_summary, "qa": qa_items},
+    )
+
+    existing = WeightEstimate.objects.filter(session=session).first()
+    if existing:
+        if existing.raw_json.get("_source") == "express":
+            llm_est["_replaced_express"] = {k: v for k, v in existing.raw_json.items() if k != "_source"}
+        existing.delete()
+
+    try:
+        with transaction.atomic():
+            est = create_weight_estimate(session, llm_est, category)
+    except IntegrityError:
+        # A concurrent request stored its estimate first (OneToOne); use that one
+        return WeightEstimate.objects.get(session=session)
+
+    run_category_calculations(est, session, answers_by_key(questions, answers), category)
+
+    session.text_model = (llm_est.get("_llm") or {}).get("model", "")[:100]
+    session.status = SessionStatus.ESTIMATED
+    session.save(update_fields=["text_model", "status", "updated_at"])
+    return est
+
+
+def run_category_calculations(est: WeightEstimate, session: EstimationSession,
+                              answers: Dict[str, Any], category: str) -> None:
+    """
+    Category post-processing stage.
+
+    Errors are logged and swallowed: the calculations are optional extras and
+    must not fail an estimate that was already stored. The failed checkpoint
+    lets the retry endpoint run them again.
+    """
+    try:
+        run_stage(
+            session, PipelineStage.CATEGORY,
+            lambda: apply_category_calculations(est, session, answers, category),
+            inputs={"estimate": str(est.id), "category": category},
+        )
+    except Exception as e:
+        # Log error but don't fail the estimation
+        print(f"Category calculation error: {str(e)}")
+
+
+def _identified(session: EstimationSession) -> bool:
+    # Sessions created before checkpoints existed have a label but no checkpoint
+    return bool(session.object_label) or stage_done(session, PipelineStage.IDENTIFICATION)
+
+
+def resume_pipeline(session: EstimationSession) -> str:
+    """
+    Continue a session from its first incomplete stage.
+
+    Returns:
+        "identified": identification ran; questions now await answers
+        "awaiting_answers": required questions are still unanswered
+        "estimated": the estimate was created
+        "category": only category post-processing was re-run
+        "complete": nothing was left to do
+
+    Raises:
+        The errors of the stage that was run (see run_identification, run_estimation)
+    """
+    if session.image_id and not _identified(session):
+        if session.object_json.get("_source") == "express":
+            run_express(session)
+            return "estimated"
+        run_identification(session)
+        return "identified"
+
+    estimate = WeightEstimate.objects.filter(session=session).first()
+    if estimate is None:
+        if not required_answered(session):
+            session.status = SessionStatus.IN_PROGRESS if session.answers.exists() else SessionStatus.QUESTIONS_ASKED
+            session.save(update_fields=["status", "updated_at"])
+            return "awaiting_answers"
+        run_estimation(session)
+        return "estimated"
+
+    if not stage_done(session, PipelineStage.CATEGORY):
+        run_category_calculations(estimate, session, answers_by_key(*load_answer_map(session)), estimate.category)
+        session.status = SessionStatus.ESTIMATED
+        session.save(update_fields=["status", "updated_at"])
+        return "category"
+
+    return "complete"
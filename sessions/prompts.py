@@ -0,0 +1,189 @@
+"""
+Versioned prompt templates for the LLM calls.
+
+Each template splits its prompt into:
+- a static system prefix (instructions, rules, output schema) that is identical
+  on every call, so providers with prompt caching can reuse it, and
+- a small dynamic user part holding only per-request data.
+
+Both parts are serialized as compact JSON. Bump a template's version whenever
+its text changes; the version is stored with every output (_llm.prompt).
+token_budget is checked by the prompt_token_report command.
+"""
+
+import json
+from typing import Any, Dict
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without the default whitespace after separators."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class PromptTemplate:
+    def __init__(self, name: str, version: int, instructions: str, rules: Dict[str, Any],
+                 token_budget: int):
+        self.name = name
+        self.version = version
+        self.instructions = instructions
+        self.rules = rules
+        self.token_budget = token_budget
+        self.system = instructions + "\n" + compact_json(rules)
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def render_user(self, **data: Any) -> str:
+        """Serialize the per-request part of the prompt."""
+        return compact_json(data)
+
+
+IMAGE_VALIDATION = PromptTemplate(
+    name="image_validation",
+    version=2,
+    instructions=(
+        "You validate images for weight estimation. Check if the image meets quality requirements. "
+        "Be lenient with composite objects (like food items with multiple ingredients, salads, meals). "
+        "For composite objects, focus on visibility and clarity rather than requiring reference objects or plain backgrounds. "
+        "Return ONLY valid JSON (no markdown) following the rules below."
+    ),
+    rules={
+        "task": "validate_image_quality",
+        "validation_rules": {
+            "person": [
+                "Full Body Clear View - person should be fully visible from head to toe",
+                "Minimal Clothing - person should wear minimal clothing",
+                "Standard standing pose - person should be in a standard standing position",
+                "Plain Background - background should be simple and uniform"
+            ],
+            "single_object": [
+                "Reference Object Inclusion - image should include a reference object (coin, ruler, etc.) - OPTIONAL but recommended",
+                "Visibility and Clarity - object should be clearly visible and distinct",
+                "Uniform Lighting - lighting should be even across the image - OPTIONAL",
+                "Plain Contrasting Background - background should be plain and contrast with object - OPTIONAL",
+                "Sharp Focus - image should be in sharp focus"
+            ],
+            "composite_object": [
+                "Visibility and Clarity - main object(s) should be clearly visible",
+                "Sharp Focus - image should be in sharp focus",
+                "Multiple items are acceptable - composite objects like salads, meals, or collections are valid",
+                "Reference objects are OPTIONAL - not required for composite objects",
+                "Plain background is OPTIONAL - natural backgrounds are acceptable"
+            ]
+        },
+        "instructions": [
+            "First, determine if the image contains a single object, composite object (multiple items together like a salad), or a person",
+            "For composite objects (food items with multiple ingredients, salads, meals, collections), use 'composite_object' rules",
+            "For single distinct objects, use 'single_object' rules",
+            "Be lenient - only reject images that are truly unusable (blurry, too dark, completely obscured)",
+            "Accept images with multiple objects if they form a cohesive whole (like a salad with ingredients)"
+        ],
+        "output_schema": {
+            "image_type": "person|single_object|composite_object|unknown",
+            "valid": "boolean",
+            "issues": ["array of strings describing validation failures - only include critical issues"],
+            "summary": "short string summarizing validation result"
+        }
+    },
+    token_budget=680,
+)
+
+OBJECT_IDENTIFICATION = PromptTemplate(
+    name="object_identification",
+    version=2,
+    instructions=(
+        "You identify the main object in an image and generate the minimum set of questions "
+        "needed to estimate its weight. Return ONLY valid JSON (no markdown) following the rules below."
+    ),
+    rules={
+        "objectives": [
+            "Identify the main object in the image (simple label).",
+            "Provide a short summary of what you see that matters for weight.",
+            "Ask 4-8 practical questions that a user can answer."
+        ],
+        "output_schema": {
+            "object_label": "string",
+            "object_summary": "string",
+            "questions": [
+                {
+                    "question": "string",
+                    "answer_type": "text|number|boolean|select",
+                    "unit": "optional string",
+                    "options": "optional list of strings (select only)",
+                    "required": "boolean"
+                }
+            ]
+        }
+    },
+    token_budget=200,
+)
+
+WEIGHT_ESTIMATION = PromptTemplate(
+    name="weight_estimation",
+    version=2,
+    instructions=(
+        "You estimate object weight from user answers. Return ONLY valid JSON (no markdown) following the rules below. "
+        "If uncertain, give a realistic range and lower confidence."
+    ),
+    rules={
+        "task": "estimate_weight",
+        "output_schema": {
+            "estimated_weight": {"value": "number", "unit": "g|kg|lb|oz", "min": "number", "max": "number"},
+            "confidence": "number between 0 and 1",
+            "rationale": "short string",
+            "key_factors": ["string"]
+        },
+        "constraints": [
+            "min <= value <= max",
+            "do not invent facts not supported by user answers",
+            "if dimensions are missing, widen range and reduce confidence"
+        ],
+    },
+    token_budget=400,
+)
+
+EXPRESS_ESTIMATION = PromptTemplate(
+    name="express_estimation",
+    version=1,
+    instructions=(
+        "You identify the main object in an image and estimate its weight directly from what is visible, "
+        "without asking the user first. Return ONLY valid JSON (no markdown) following the rules below. "
+        "If uncertain, give a realistic range and lower confidence."
+    ),
+    rules={
+        "objectives": [
+            "Identify the main object in the image (simple label).",
+            "Provide a short summary of what you see that matters for weight.",
+            "Estimate the weight from visible size, material and typical weights of such objects.",
+            "Ask 2-5 practical questions whose answers would most narrow the range."
+        ],
+        "output_schema": {
+            "object_label": "string",
+            "object_summary": "string",
+            "estimated_weight": {"value": "number", "unit": "g|kg|lb|oz", "min": "number", "max": "number"},
+            "confidence": "number between 0 and 1",
+            "rationale": "short string",
+            "key_factors": ["string"],
+            "questions": [
+                {
+                    "question": "string",
+                    "answer_type": "text|number|boolean|select",
+                    "unit": "optional string",
+                    "options": "optional list of strings (select only)",
+                    "required": "boolean"
+                }
+            ]
+        },
+        "constraints": [
+            "min <= value <= max",
+            "without a reference object in view, widen the range and reduce confidence"
+        ],
+    },
+    token_budget=400,
+)
+
+PROMPTS = {
+    template.name: template
+    for template in (IMAGE_VALIDATION, OBJECT_IDENTIFICATION, WEIGHT_ESTIMATION, EXPRESS_ESTIMATION)
+}
@@ -0,0 +1,325 @@
+"""
+Output schemas for the LLM calls and compiled validators for them.
+
+Each schema is sent to providers that support structured outputs
+(response_format with a JSON schema) and is also compiled once into a
+validator that checks model output locally. Fixable problems (numbers sent as
+strings, enum case, a min above max, an out-of-range confidence) are repaired
+in place instead of triggering a paid retry; anything else is rejected.
+
+Validators return (output, repairs) where repairs lists the repaired paths;
+filling an omitted field from its default (or from a sibling field, like an
+estimate's min and max from its value) is not counted as a repair.
+repairs.rescued lists the repairs without which the output could not have
+been used at all (an unparseable number, a question that is not an object);
+only those stand for a retry or failed request that was avoided.
+"""
+
+import copy
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Validator = Callable[[Any], Tuple[Any, List[str]]]
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_TRUE_WORDS = {"true", "yes", "y", "1"}
+_FALSE_WORDS = {"false", "no", "n", "0"}
+
+
+class SchemaError(ValueError):
+    """Model output does not match the schema and cannot be repaired."""
+    pass
+
+
+class Repairs(list):
+    """Repaired paths, plus the subset (rescued) the output was unusable without."""
+
+    def __init__(self):
+        super().__init__()
+        self.rescued: List[str] = []
+
+    def rescue(self, path: str) -> None:
+        self.append(path)
+        self.rescued.append(path)
+
+
+# ============================================
+# SCHEMAS
+# ============================================
+
+VALIDATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "image_type": {
+            "type": "string",
+            "enum": ["person", "single_object", "composite_object", "unknown"],
+            "default": "unknown",
+        },
+        "valid": {"type": "boolean"},
+        "issues": {"type": "array", "items": {"type": "string"}, "default": []},
+        "summary": {"type": "string", "default": ""},
+    },
+    "required": ["image_type", "valid", "issues", "summary"],
+    "additionalProperties": False,
+}
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "answer_type": {
+            "type": "string",
+            "enum": ["text", "number", "boolean", "select"],
+            "default": "text",
+        },
+        "unit": {"type": ["string", "null"], "default": None},
+        "options": {"type": ["array", "null"], "items": {"type": "string"}, "default": None},
+        "required": {"type": "boolean", "default": True},
+    },
+    "required": ["question", "answer_type", "unit", "options", "required"],
+    "additionalProperties": False,
+}
+
+IDENTIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "object_label": {"type": "string"},
+        "object_summary": {"type": "string", "default": ""},
+        "questions": {"type": "array", "items": QUESTION_SCHEMA, "default": []},
+    },
+    "required": ["object_label", "object_summary", "questions"],
+    "additionalProperties": False,
+}
+
+ESTIMATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "estimated_weight": {
+            "type": "object",
+            "properties": {
+                "value": {"type": "number", "minimum": 0},
+                "unit": {"type": "string", "enum": ["g", "kg", "lb", "oz"], "default": "g"},
+                "min": {"type": "number", "minimum": 0, "default_from": "value"},
+                "max": {"type": "number", "minimum": 0, "default_from": "value"},
+            },
+            "required": ["value", "unit", "min", "max"],
+            "additionalProperties": False,
+        },
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1, "default": 0.3},
+        "rationale": {"type": "string", "default": ""},
+        "key_factors": {"type": "array", "items": {"type": "string"}, "default": []},
+    },
+    "required": ["estimated_weight", "confidence", "rationale", "key_factors"],
+    "additionalProperties": False,
+}
+
+EXPRESS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "object_label": IDENTIFICATION_SCHEMA["properties"]["object_label"],
+        "object_summary": IDENTIFICATION_SCHEMA["properties"]["object_summary"],
+        **ESTIMATION_SCHEMA["properties"],
+        "questions": IDENTIFICATION_SCHEMA["properties"]["questions"],
+    },
+    "required": ["object_label", "object_summary"] + ESTIMATION_SCHEMA["required"] + ["questions"],
+    "additionalProperties": False,
+}
+
+# Keywords only used by the local validator; stripped before sending to providers
+_LOCAL_KEYWORDS = {"default", "default_from"}
+
+
+def provider_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of the schema without local-only keywords."""
+    if isinstance(schema, dict):
+        return {k: provider_schema(v) for k, v in schema.items() if k not in _LOCAL_KEYWORDS}
+    if isinstance(schema, list):
+        return [provider_schema(v) for v in schema]
+    return schema
+
+
+def response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the OpenAI-compatible response_format for a schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": provider_schema(schema)},
+    }
+
+
+# ============================================
+# COMPILER
+# ============================================
+
+def _compile(schema: Dict[str, Any], path: str) -> Callable[[Any, List[str]], Any]:
+    types = schema.get("type", "object")
+    types = types if isinstance(types, list) else [types]
+    nullable = "null" in types
+    kind = next(t for t in types if t != "null")
+
+    if kind == "object":
+        fields = {
+            key: (_compile(sub, f"{path}.{key}"), sub)
+            for key, sub in schema.get("properties", {}).items()
+        }
+        required = set(schema.get("required", []))
+
+        def check(value, repairs):
+            if not isinstance(value, dict):
+                raise SchemaError(f"{path}: expected object")
+            for key, (check_field, sub) in fields.items():
+                if key in value and value[key] is not None:
+                    value[key] = check_field(value[key], repairs)
+                elif key in value and _is_nullable(sub):
+                    continue
+                elif "default" in sub:
+                    # Omitted optional fields were always tolerated; not a repair
+                    value[key] = copy.deepcopy(sub["default"])
+                elif value.get(sub.get("default_from")) is not None:
+                    # Checked already: "default_from" names an earlier property
+                    value[key] = value[sub["default_from"]]
+                elif key in required:
+                    raise SchemaError(f"{path}.{key}: missing")
+            return value
+
+    elif kind == "array":
+        check_item = _compile(schema["items"], f"{path}[]") if "items" in schema else None
+        items_are_objects = schema.get("items", {}).get("type") == "object"
+
+        def check(value, repairs):
+            if not isinstance(value, list):
+                value = [value]
+                repairs.append(path)
+            if check_item is None:
+                return value
+            items = []
+            for item in value:
+                try:
+                    items.append(check_item(item, repairs))
+                except SchemaError:
+                    # Drop a malformed item (e.g. one bad question) instead of failing the call
+                    if items_are_objects and not isinstance(item, dict):
+                        repairs.rescue(f"{path}[]")
+                    else:
+                        repairs.append(f"{path}[]")
+            return items
+
+    elif kind == "number":
+        minimum = schema.get("minimum")
+        maximum = schema.get("maximum")
+
+        def check(value, repairs):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                match = _NUMBER_RE.search(str(value).replace(",", ""))
+                if not match:
+                    raise SchemaError(f"{path}: expected number")
+                if _is_float(value):
+                    repairs.append(path)
+                else:
+                    repairs.rescue(path)
+                value = float(match.group())
+            if math.isnan(value) or math.isinf(value):
+                raise SchemaError(f"{path}: not a finite number")
+            if minimum is not None and value < minimum:
+                value = minimum
+                repairs.append(path)
+            if maximum is not None and value > maximum:
+                value = maximum
+                repairs.append(path)
+            return value
+
+    elif kind == "boolean":
+        def check(value, repairs):
+            if isinstance(value, bool):
+                return value
+            word = str(value).strip().lower()
+            if word in _TRUE_WORDS or word in _FALSE_WORDS:
+                repairs.append(path)
+                return word in _TRUE_WORDS
+            raise SchemaError(f"{path}: expected boolean")
+
+    else:  # string
+        enum = schema.get("enum")
+        by_lower = {e.lower(): e for e in enum} if enum else {}
+
+        def check(value, repairs):
+            if not isinstance(value, str):
+                if isinstance(value, (dict, list)):
+                    raise SchemaError(f"{path}: expected string")
+                value = str(value)
+                repairs.append(path)
+            if enum and value not in enum:
+                fixed = by_lower.get(value.strip().lower())
+                if fixed is None:
+                    if "default" not in schema:
+                        raise SchemaError(f"{path}: {value!r} not in {enum}")
+                    fixed = schema["default"]
+                value = fixed
+                repairs.append(path)
+            return value
+
+    if not nullable:
+        return check
+
+    def check_nullable(value, repairs):
+        return None if value is None else check(value, repairs)
+
+    return check_nullable
+
+
+def _is_float(value: Any) -> bool:
+    """Whether float() accepts the value as it is (e.g. "150" but not "150 g")."""
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _is_nullable(schema: Dict[str, Any]) -> bool:
+    types = schema.get("type")
+    return isinstance(types, list) and "null" in types
+
+
+def compile_schema(schema: Dict[str, Any], post: Optional[Callable[[Any, List[str]], Any]] = None) -> Validator:
+    """
+    Compile a schema into a validator function.
+
+    Args:
+        schema: JSON-schema subset (object/array/string/number/boolean, enum,
+            minimum/maximum, required, nullable via ["type", "null"], default,
+            default_from naming an earlier sibling property to copy)
+        post: Optional cross-field check run after the per-field checks
+
+    Returns:
+        Function taking the parsed output and returning (output, Repairs)
+    """
+    check = _compile(schema, "$")
+
+    def validate(value):
+        repairs = Repairs()
+        value = check(value, repairs)
+        if post is not None:
+            value = post(value, repairs)
+        return value, repairs
+
+    return validate
+
+
+def _check_weight_range(out: Dict[str, Any], repairs: List[str]) -> Dict[str, Any]:
+    """Enforce min <= value <= max on the estimate."""
+    ew = out["estimated_weight"]
+    if ew["min"] > ew["max"]:
+        ew["min"], ew["max"] = ew["max"], ew["min"]
+        repairs.append("$.estimated_weight.min")
+    if not ew["min"] <= ew["value"] <= ew["max"]:
+        ew["min"] = min(ew["min"], ew["value"])
+        ew["max"] = max(ew["max"], ew["value"])
+        repairs.append("$.estimated_weight.value")
+    return out
+
+
+validate_validation_output = compile_schema(VALIDATION_SCHEMA)
+validate_identification_output = compile_schema(IDENTIFICATION_SCHEMA)
+validate_estimation_output = compile_schema(ESTIMATION_SCHEMA, post=_check_weight_range)
+validate_express_output = compile_schema(EXPRESS_SCHEMA, post=_check_weight_range)
@@ -0,0 +1,172 @@
+"""
+Full-text search over the session history.
+
+Each session has a SessionSearchDocument (label, summary and estimate
+rationale) kept current by the signal handlers in sessions/signals.py. The
+documents are indexed by the database:
+
+- SQLite: an external-content FTS5 table kept in sync by triggers, ranked
+  with bm25 (label weighted highest)
+- PostgreSQL: a generated, weighted tsvector column with a GIN index,
+  ranked with ts_rank
+
+Both are created by migration 0017. Every query term is prefix-matched, so
+"appl" finds "apple pie". Other backends (or SQLite builds without FTS5) fall
+back to case-insensitive substring matching on the documents.
+
+search_sessions filters any queryset keyed by session id (EstimationSession
+or SessionSummary) and annotates search_rank (higher is better) for the
+"relevance" history sort.
+"""
+
+import re
+from typing import Any, Dict, List
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, IntegerField, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import SessionSearchDocument
+
+FTS_TABLE = "estimation_sessions_search_fts"
+DOCUMENT_TABLE = SessionSearchDocument._meta.db_table
+
+# Relative weight of label, summary and rationale matches
+SQLITE_BM25_WEIGHTS = (10.0, 2.0, 1.0)
+
+# Query terms beyond this are ignored
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+_fts5_tables: Dict[str, bool] = {}
+
+
+def search_terms(query: str) -> List[str]:
+    """Lowercased word tokens of a search query; punctuation and operators are dropped."""
+    return _TERM_RE.findall((query or "").lower())[:MAX_TERMS]
+
+
+def search_backend() -> str:
+    """'sqlite', 'postgresql' or 'fallback' for the default database."""
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite" and _has_fts5_table():
+        return "sqlite"
+    return "fallback"
+
+
+def _has_fts5_table() -> bool:
+    # The migration skips the FTS5 table on SQLite builds without the extension
+    name = connection.settings_dict["NAME"]
+    if name not in _fts5_tables:
+        _fts5_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_tables[name]
+
+
+class _DocumentRank(Func):
+    """Rank of the row's session document for a query; NULL if it does not match."""
+
+    output_field = FloatField()
+    rank_sql = ""
+
+    def __init__(self, query: str):
+        super().__init__(Value(query), F("pk"))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        query, session_id = self.get_source_expressions()
+        query_sql, query_params = compiler.compile(query)
+        id_sql, id_params = compiler.compile(session_id)
+        return self.rank_sql.format(query=query_sql, session_id=id_sql), (*query_params, *id_params)
+
+
+class _Fts5Rank(_DocumentRank):
+    # bm25 is lower for better matches; negated so higher is better
+    rank_sql = (
+        f"(SELECT -bm25({FTS_TABLE}, {', '.join(str(w) for w in SQLITE_BM25_WEIGHTS)}) "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH {{query}} "
+        f"AND {FTS_TABLE}.rowid = (SELECT id FROM {DOCUMENT_TABLE} WHERE session_id = {{session_id}}))"
+    )
+
+
+class _TsRank(_DocumentRank):
+    rank_sql = (
+        f"(SELECT ts_rank(d.search_vector, to_tsquery('english', {{query}})) "
+        f"FROM {DOCUMENT_TABLE} d WHERE d.session_id = {{session_id}})"
+    )
+
+
+def _sqlite_query(terms: List[str]) -> str:
+    # Quoted so FTS5 syntax in the input is matched literally; * makes each term a prefix
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _postgres_query(terms: List[str]) -> str:
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_sessions(qs: QuerySet, query: str) -> QuerySet:
+    """
+    Filter sessions to those matching a search query and annotate search_rank.
+
+    Args:
+        qs: EstimationSession or SessionSummary queryset (usually already filtered by user)
+        query: Free-text search input
+
+    Returns:
+        The filtered queryset; unchanged if the query has no searchable terms
+    """
+    terms = search_terms(query)
+    if not terms:
+        return qs
+
+    backend = search_backend()
+    if backend == "sqlite":
+        match = _sqlite_query(terms)
+        return qs.filter(
+            pk__in=RawSQL(
+                f"SELECT d.session_id FROM {FTS_TABLE} JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s",
+                [match],
+            )
+        ).annotate(search_rank=_Fts5Rank(match))
+
+    if backend == "postgresql":
+        tsquery = _postgres_query(terms)
+        return qs.filter(
+            pk__in=RawSQL(
+                f"SELECT session_id FROM {DOCUMENT_TABLE} WHERE search_vector @@ to_tsquery('english', %s)",
+                [tsquery],
+            )
+        ).annotate(search_rank=_TsRank(tsquery))
+
+    return _fallback_search(qs, terms)
+
+
+def _fallback_search(qs: QuerySet, terms: List[str]) -> QuerySet:
+    """Every term must appear in the document; label matches rank above summary/rationale ones."""
+    documents = SessionSearchDocument.objects.values("session_id")
+    rank: Any = Value(0)
+    for term in terms:
+        in_label = Q(label__icontains=term)
+        qs = qs.filter(pk__in=documents.filter(
+            in_label | Q(summary__icontains=term) | Q(rationale__icontains=term)
+        ))
+        rank = rank + Case(
+            When(pk__in=documents.filter(in_label), then=Value(2)), default=Value(1), output_field=IntegerField(),
+        )
+    return qs.annotate(search_rank=Cast(rank, FloatField()))
+
+
+def sync_session_document(session, created: bool) -> None:
+    """Create or update the session's search document from its label and summary (one query)."""
+    values = {"label": session.object_label, "summary": session.object_summary}
+    if not created and SessionSearchDocument.objects.filter(session_id=session.pk).update(**values):
+        return
+    SessionSearchDocument.objects.create(session=session, **values)
+
+
+def sync_estimate_rationale(session_id, rationale: str) -> None:
+    """Store the estimate rationale on the session's search document."""
+    SessionSearchDocument.objects.filter(session_id=session_id).update(rationale=rationale)
@@ -1,37 +1,94 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import EstimationSession, Question, Answer
+from .models import EstimationSession, Question, Answer, PipelineCheckpoint, SessionSummary
 
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
-        fields = ["id", "order", "text", "answer_type", "unit", "options", "required"]
+        fields = ["id", "order", "key", "text", "answer_type", "unit", "options", "required"]
 
 class AnswerSerializer(serializers.ModelSerializer):
-    question_id = serializers.UUIDField(source="question.id", read_only=True)
+    question_id = serializers.UUIDField(read_only=True)
 
     class Meta:
         model = Answer
         fields = ["id", "question_id", "value_text", "value_number", "value_boolean", "value_json", "created_at"]
 
+class PipelineCheckpointSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PipelineCheckpoint
+        fields = ["stage", "status", "attempts", "duration_ms", "error", "started_at", "finished_at"]
+
 class SessionSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     answers = AnswerSerializer(many=True, read_only=True)
-    image_id = serializers.UUIDField(source="image.id", read_only=True)
+    checkpoints = PipelineCheckpointSerializer(many=True, read_only=True)
+    image_id = serializers.UUIDField(read_only=True)
+    parent_id = serializers.UUIDField(read_only=True)
 
     class Meta:
         model = EstimationSession
         fields = [
-            "id", "image_id",
-            "object_label", "object_summary", "object_json",
+            "id", "image_id", "parent_id",
+            "object_label", "canonical_label", "object_summary", "object_json", "category",
+            "vision_model", "text_model",
             "status",
-            "questions", "answers",
+            "questions", "answers", "checkpoints",
+            "created_at", "updated_at",
+        ]
+
+class SessionListSerializer(serializers.ModelSerializer):
+    """History list entry from a SessionSummary row (no questions, answers or LLM output)."""
+
+    id = serializers.UUIDField(source="session_id", read_only=True)
+    object_label = serializers.CharField(source="label", read_only=True)
+    category = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    estimate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SessionSummary
+        fields = [
+            "id", "image_id", "parent_id", "thumbnail_url",
+            "object_label", "canonical_label", "category",
+            "status", "estimate",
             "created_at", "updated_at",
         ]
 
+    def get_category(self, obj):
+        return obj.category or "general"
+
+    def get_thumbnail_url(self, obj):
+        return default_storage.url(obj.thumbnail) if obj.thumbnail else None
+
+    def get_estimate(self, obj):
+        if obj.value_grams is None:
+            return None
+        return {
+            "value_grams": obj.value_grams,
+            "min_grams": obj.min_grams,
+            "max_grams": obj.max_grams,
+            "confidence": obj.confidence,
+            "category": obj.estimate_category,
+        }
+
 class CreateSessionFromImageSerializer(serializers.Serializer):
     image_id = serializers.UUIDField()
     user_hint = serializers.CharField(required=False, allow_blank=True, max_length=200)
 
+class CreateSessionFromTextSerializer(serializers.Serializer):
+    description = serializers.CharField(max_length=500)
+    answers = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+
+    def validate_answers(self, items):
+        for it in items:
+            if not str(it.get("question", "")).strip() or "value" not in it:
+                raise serializers.ValidationError("Each answer must include question and value.")
+        keys = [str(it["key"]) for it in items if it.get("key")]
+        if len(keys) != len(set(keys)):
+            raise serializers.ValidationError("Answer keys must be unique.")
+        return items
+
 class SubmitAnswersSerializer(serializers.Serializer):
     answers = serializers.ListField(child=serializers.DictField(), allow_empty=False)
 
@@ -41,3 +98,5 @@ class SubmitAnswersSerializer(serializers.Serializer):
                 raise serializers.ValidationError("Each answer must include question_id and value.")
         return items
 
+class AutosaveAnswerSerializer(serializers.Serializer):
+    value = serializers.JSONField()
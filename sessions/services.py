@@ -3,10 +3,32 @@ import json
 import os
 import re
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import requests
 
+from .prompts import (
+    EXPRESS_ESTIMATION,
+    IMAGE_VALIDATION,
+    OBJECT_IDENTIFICATION,
+    WEIGHT_ESTIMATION,
+    PromptTemplate,
+)
+from .category_matcher import KeywordMatcher, load_keyword_table, normalize_keyword_table
+from .schemas import (
+    ESTIMATION_SCHEMA,
+    EXPRESS_SCHEMA,
+    IDENTIFICATION_SCHEMA,
+    VALIDATION_SCHEMA,
+    Repairs,
+    SchemaError,
+    response_format,
+    validate_estimation_output,
+    validate_express_output,
+    validate_identification_output,
+    validate_validation_output,
+)
+
 # Provider configuration
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openrouter").lower()  # "openrouter" or "groq"
 
@@ -37,9 +59,214 @@ else:  # openrouter (default)
     TEXT_MODEL = OPENROUTER_TEXT_MODEL
     BASE_URL = OPENROUTER_BASE_URL
 
+# Ask providers for schema-constrained JSON (response_format). Models that
+# reject it are remembered and called without it for the rest of the process.
+LLM_STRUCTURED_OUTPUTS = os.getenv("LLM_STRUCTURED_OUTPUTS", "1") == "1"
+_structured_unsupported_models = set()
+
+# Mark the static system prefix as cacheable. OpenRouter forwards cache_control
+# to providers that need explicit breakpoints; OpenAI-compatible providers
+# (including Groq) cache identical prefixes automatically.
+LLM_PROMPT_CACHE = os.getenv("LLM_PROMPT_CACHE", "1") == "1"
+
+# Per-process counters for the JSON call path (see get_llm_stats)
+LLM_STATS = {
+    "calls": 0,
+    "attempts": 0,
+    "parse_failures": 0,
+    "schema_rejections": 0,
+    "repaired_outputs": 0,
+    "retries_avoided": 0,
+    "structured_fallbacks": 0,
+    "cascade_fast": 0,
+    "cascade_escalated": 0,
+}
+
+# Estimation cascade: a cheap model answers first and the strong model is only
+# called when the cheap answer is unconfident or its range is too wide.
+# When enabled, these tiers replace routing for the estimation call.
+LLM_CASCADE_ENABLED = os.getenv("LLM_CASCADE_ENABLED", "0") == "1"
+LLM_CASCADE_FAST_MODEL = os.getenv(
+    "LLM_CASCADE_FAST_MODEL", "llama-3.1-8b-instant" if LLM_PROVIDER == "groq" else "openai/gpt-4o-mini"
+)
+LLM_CASCADE_STRONG_MODEL = os.getenv(
+    "LLM_CASCADE_STRONG_MODEL", "llama-3.3-70b-versatile" if LLM_PROVIDER == "groq" else "openai/gpt-4o"
+)
+LLM_CASCADE_MIN_CONFIDENCE = float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", "0.6"))
+# (max - min) / value above which the fast range is considered too wide
+LLM_CASCADE_MAX_RANGE_RATIO = float(os.getenv("LLM_CASCADE_MAX_RANGE_RATIO", "1.0"))
+
+# Optional JSON model routing table, re-read whenever the file changes (see ModelRouter)
+LLM_MODEL_ROUTES_FILE = os.getenv("LLM_MODEL_ROUTES_FILE", "")
+
+# Circuit breaker: after this many consecutive provider failures, stop calling
+# the provider for LLM_CIRCUIT_RESET_SECONDS (per worker process)
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "60"))
+
 class LLMError(RuntimeError):
     pass
 
+class ProviderUnavailableError(LLMError):
+    """Raised without calling the provider while the circuit is open."""
+    pass
+
+class StructuredOutputUnsupportedError(LLMError):
+    """The provider rejected response_format for this model."""
+    pass
+
+class _CircuitBreaker:
+    """Consecutive-failure circuit breaker around the chat endpoint."""
+
+    def __init__(self, failure_threshold: int, reset_after_s: float):
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at >= self.reset_after_s:
+            # Half-open: let the next request through as a probe
+            return False
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+_circuit = _CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+
+def provider_circuit_open() -> bool:
+    """True while provider calls are being short-circuited."""
+    return _circuit.is_open()
+
+# ============================================
+# MODEL ROUTING
+# ============================================
+
+class ModelStats:
+    """Exponentially weighted latency and error rate observed for one model."""
+
+    ALPHA = 0.2
+
+    def __init__(self):
+        self.calls = 0
+        self.latency_ms = 0.0
+        self.error_rate = 0.0
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        self.calls += 1
+        if self.calls == 1:
+            self.latency_ms = latency_ms
+            self.error_rate = 0.0 if ok else 1.0
+            return
+        self.latency_ms += self.ALPHA * (latency_ms - self.latency_ms)
+        self.error_rate += self.ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+
+
+class ModelRouter:
+    """
+    Pick a model per call from routing rules and observed model health.
+
+    The routes file looks like:
+        {
+          "max_error_rate": 0.5,
+          "routes": [
+            {"purpose": "estimation", "category": ["package"], "complexity": "simple",
+             "models": ["openai/gpt-4o-mini"]},
+            {"purpose": "identification", "complexity": "complex",
+             "models": ["qwen/qwen2.5-vl-72b-instruct", "qwen/qwen2.5-vl-32b-instruct"],
+             "max_latency_ms": 15000}
+          ]
+        }
+
+    Purposes are "validation", "identification", "express" and "estimation". Every
+    condition present on a route (category, complexity, has_hint) must match;
+    the first matching route wins. Its models are in preference order (cheapest
+    first); a model is skipped while its observed error rate or latency is
+    above the route's limits. Without a matching route the provider's
+    VISION_MODEL / TEXT_MODEL is used.
+    """
+
+    MIN_CALLS_FOR_STATS = 3
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.config: Dict[str, Any] = {}
+        self._mtime: Optional[float] = None
+        self.stats: Dict[str, ModelStats] = {}
+
+    def _reload_if_changed(self) -> None:
+        if not self.path:
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            # Record the mtime first so a broken file is reported once, not per call
+            self._mtime = mtime
+            with open(self.path, encoding="utf-8") as f:
+                self.config = json.load(f)
+
+    def default_model(self, purpose: str) -> str:
+        return TEXT_MODEL if purpose == "estimation" else VISION_MODEL
+
+    def record(self, model: str, latency_ms: float, ok: bool) -> None:
+        self.stats.setdefault(model, ModelStats()).record(latency_ms, ok)
+
+    def _healthy(self, model: str, max_error_rate: float, max_latency_ms: Optional[float]) -> bool:
+        stats = self.stats.get(model)
+        if stats is None or stats.calls < self.MIN_CALLS_FOR_STATS:
+            return True
+        if stats.error_rate > max_error_rate:
+            return False
+        return max_latency_ms is None or stats.latency_ms <= max_latency_ms
+
+    def choose(self, purpose: str, category: str = "", complexity: str = "", has_hint: bool = False) -> str:
+        try:
+            self._reload_if_changed()
+        except (OSError, ValueError) as e:
+            # Keep serving with the last good table
+            print(f"Model routes reload failed: {str(e)}")
+
+        max_error_rate = float(self.config.get("max_error_rate", 0.5))
+        for route in self.config.get("routes", []):
+            if route.get("purpose", purpose) != purpose:
+                continue
+            if "category" in route and category not in route["category"]:
+                continue
+            if "complexity" in route and route["complexity"] != complexity:
+                continue
+            if "has_hint" in route and bool(route["has_hint"]) != has_hint:
+                continue
+            models = route.get("models") or []
+            if not models:
+                continue
+            for model in models:
+                if self._healthy(model, max_error_rate, route.get("max_latency_ms")):
+                    return model
+            # Everything is degraded; fall back to the first preference
+            return models[0]
+
+        return self.default_model(purpose)
+
+
+model_router = ModelRouter(LLM_MODEL_ROUTES_FILE)
+
+
+def route_model(purpose: str, category: str = "", complexity: str = "", has_hint: bool = False) -> str:
+    """Choose the model for one call; see ModelRouter."""
+    return model_router.choose(purpose, category=category, complexity=complexity, has_hint=has_hint)
+
+
 def _get_headers() -> Dict[str, str]:
     """Get headers based on provider."""
     headers = {"Content-Type": "application/json"}
@@ -63,14 +290,37 @@ def _get_headers() -> Dict[str, str]:
 
 def _post_chat(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Send chat request to LLM provider."""
+    provider_name = LLM_PROVIDER.upper()
+    if _circuit.is_open():
+        raise ProviderUnavailableError(f"{provider_name} is temporarily unavailable (circuit open).")
+
     url = f"{BASE_URL}/chat/completions"
     headers = _get_headers()
-    
-    resp = requests.post(url, headers=headers, json=payload, timeout=90)
+    model = payload.get("model", "")
+    started = time.monotonic()
+
+    try:
+        resp = requests.post(url, headers=headers, json=payload, timeout=90)
+    except requests.RequestException as e:
+        _circuit.record_failure()
+        model_router.record(model, (time.monotonic() - started) * 1000, ok=False)
+        raise LLMError(f"{provider_name} request failed: {e}")
+
+    model_router.record(model, (time.monotonic() - started) * 1000, ok=resp.status_code < 500 and resp.status_code != 429)
+
     if resp.status_code >= 400:
-        provider_name = LLM_PROVIDER.upper()
+        # Only outages and rate limits count towards opening the circuit
+        if resp.status_code >= 500 or resp.status_code == 429:
+            _circuit.record_failure()
+        if (
+            resp.status_code == 400
+            and "response_format" in payload
+            and ("response_format" in resp.text or "json_schema" in resp.text)
+        ):
+            raise StructuredOutputUnsupportedError(f"{provider_name} rejected response_format: {resp.text}")
         raise LLMError(f"{provider_name} error {resp.status_code}: {resp.text}")
-    
+
+    _circuit.record_success()
     return resp.json()
 
 def _extract_json(text: str) -> Dict[str, Any]:
@@ -85,21 +335,97 @@ def _extract_json(text: str) -> Dict[str, Any]:
         raise ValueError("No JSON object found in model output.")
     return json.loads(text[start:end + 1])
 
-def _call_with_json_retry(payload: Dict[str, Any], retries: int = 2, backoff_s: float = 1.2) -> Dict[str, Any]:
-    """Call LLM with retry logic and JSON extraction."""
-    last_err = None
-    for i in range(retries + 1):
+def _parse_json(content: Optional[str]) -> Dict[str, Any]:
+    """Parse model output: plain JSON (structured outputs) first, then fenced/embedded JSON."""
+    try:
+        out = json.loads(content or "")
+        if isinstance(out, dict):
+            return out
+    except ValueError:
+        pass
+    return _extract_json(content)
+
+def with_structured_output(payload: Dict[str, Any], name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Add a JSON-schema response_format to the payload when enabled and supported."""
+    if LLM_STRUCTURED_OUTPUTS and payload.get("model") not in _structured_unsupported_models:
+        payload["response_format"] = response_format(name, schema)
+    return payload
+
+def system_message(template: PromptTemplate) -> Dict[str, Any]:
+    """Build the static, cacheable system message for a prompt template."""
+    if LLM_PROMPT_CACHE and LLM_PROVIDER == "openrouter":
+        return {
+            "role": "system",
+            "content": [{"type": "text", "text": template.system, "cache_control": {"type": "ephemeral"}}],
+        }
+    return {"role": "system", "content": template.system}
+
+def get_llm_stats() -> Dict[str, int]:
+    """Snapshot of this process's JSON call counters."""
+    return dict(LLM_STATS)
+
+def _call_with_json_retry(payload: Dict[str, Any], retries: int = 2, backoff_s: float = 1.2,
+                          validator=None, prompt: Optional[PromptTemplate] = None) -> Dict[str, Any]:
+    """
+    Call LLM with retry logic, JSON extraction and optional schema validation.
+
+    The validator repairs fixable output locally; only unparseable or
+    unrepairable output is retried. Call metadata (attempts, repaired paths,
+    latency) is attached to the result under "_llm".
+    """
+    LLM_STATS["calls"] += 1
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        LLM_STATS["attempts"] += 1
         try:
             data = _post_chat(payload)
             content = data["choices"][0]["message"]["content"]
-            return _extract_json(content)
-        except Exception as e:
-            last_err = e
-            if i < retries:
-                time.sleep(backoff_s * (i + 1))
+            try:
+                out = _parse_json(content)
+            except ValueError:
+                LLM_STATS["parse_failures"] += 1
+                raise
+            repairs = Repairs()
+            if validator is not None:
+                try:
+                    out, repairs = validator(out)
+                except SchemaError:
+                    LLM_STATS["schema_rejections"] += 1
+                    raise
+        except ProviderUnavailableError:
+            raise
+        except StructuredOutputUnsupportedError:
+            # Resend without response_format; does not use up a retry
+            _structured_unsupported_models.add(payload.get("model"))
+            payload = {k: v for k, v in payload.items() if k != "response_format"}
+            LLM_STATS["structured_fallbacks"] += 1
+            attempt -= 1
+            continue
+        except Exception:
+            if attempt <= retries:
+                time.sleep(backoff_s * attempt)
                 continue
             raise
 
+        if repairs:
+            LLM_STATS["repaired_outputs"] += 1
+        if repairs.rescued:
+            # Only these outputs were unusable as sent: a paid retry (or a failed request) that did not happen
+            LLM_STATS["retries_avoided"] += 1
+
+        out["_llm"] = {
+            "model": payload.get("model"),
+            "prompt": prompt.id if prompt else None,
+            "structured": "response_format" in payload,
+            "attempts": attempt,
+            "repairs": list(repairs),
+            "rescued": repairs.rescued,
+            "latency_ms": round((time.monotonic() - started) * 1000),
+        }
+        return out
+
 def image_file_to_data_url(image_path: str, mime_type: str = "image/jpeg") -> str:
     """Convert image file to base64 data URL."""
     with open(image_path, "rb") as f:
@@ -135,25 +461,31 @@ CATEGORY_KEYWORDS = {
     ],
     "person": [
         "person", "man", "woman", "human", "body", "people", "adult", "child",
-        "male", "female", "guy", "girl", "boy", "individual"
+        "male", "female", "guy", "girl", "boy", "individual",
+        "men", "women", "children"
     ]
 }
 
+# "key" is a stable semantic id stored on the Question row; category
+# post-processing looks answers up by key (see pipeline.answers_by_key)
 CATEGORY_SPECIFIC_QUESTIONS = {
     "food": [
         {
+            "key": "is_cooked",
             "question": "Is this food raw or cooked?",
             "answer_type": "select",
             "options": ["Raw", "Cooked", "Processed"],
             "required": True
         },
         {
+            "key": "portion_status",
             "question": "Is any portion missing or already eaten?",
             "answer_type": "select",
             "options": ["No, it's whole", "Partially eaten", "Just a portion"],
             "required": True
         },
         {
+            "key": "peel",
             "question": "Does it have skin, peel, or shell on?",
             "answer_type": "boolean",
             "required": False
@@ -161,29 +493,34 @@ CATEGORY_SPECIFIC_QUESTIONS = {
     ],
     "package": [
         {
+            "key": "length",
             "question": "Estimated length in cm?",
             "answer_type": "number",
             "unit": "cm",
             "required": True
         },
         {
+            "key": "width",
             "question": "Estimated width in cm?",
             "answer_type": "number",
             "unit": "cm",
             "required": True
         },
         {
+            "key": "height",
             "question": "Estimated height in cm?",
             "answer_type": "number",
             "unit": "cm",
             "required": True
         },
         {
+            "key": "fragile",
             "question": "Is the package fragile?",
             "answer_type": "boolean",
             "required": False
         },
         {
+            "key": "destination",
             "question": "Shipping destination?",
             "answer_type": "select",
             "options": ["Domestic", "International"],
@@ -192,23 +529,27 @@ CATEGORY_SPECIFIC_QUESTIONS = {
     ],
     "pet": [
         {
+            "key": "breed",
             "question": "What breed is this pet? (if known)",
             "answer_type": "text",
             "required": False
         },
         {
+            "key": "age_category",
             "question": "What is the pet's age category?",
             "answer_type": "select",
             "options": ["Puppy/Kitten (< 1 year)", "Adult (1-7 years)", "Senior (7+ years)"],
             "required": True
         },
         {
+            "key": "gender",
             "question": "Is the pet male or female?",
             "answer_type": "select",
             "options": ["Male", "Female", "Unknown"],
             "required": False
         },
         {
+            "key": "neutered",
             "question": "Is the pet spayed or neutered?",
             "answer_type": "select",
             "options": ["Yes", "No", "Unknown"],
@@ -217,24 +558,28 @@ CATEGORY_SPECIFIC_QUESTIONS = {
     ],
     "person": [
         {
+            "key": "height",
             "question": "What is the person's height in cm?",
             "answer_type": "number",
             "unit": "cm",
             "required": True
         },
         {
+            "key": "age",
             "question": "What is the person's age? (optional)",
             "answer_type": "number",
             "unit": "years",
             "required": False
         },
         {
+            "key": "gender",
             "question": "Gender?",
             "answer_type": "select",
             "options": ["Male", "Female", "Prefer not to say"],
             "required": False
         },
         {
+            "key": "activity",
             "question": "Activity level?",
             "answer_type": "select",
             "options": ["Sedentary", "Lightly active", "Moderately active", "Very active"],
@@ -244,9 +589,44 @@ CATEGORY_SPECIFIC_QUESTIONS = {
 }
 
 
+# Generic words that should not outvote a specific keyword in another category
+CATEGORY_KEYWORD_WEIGHTS = {
+    "food": {"food": 0.75, "meal": 0.75},
+    "package": {"container": 0.5, "mail": 0.5},
+    "pet": {"animal": 0.5, "pet": 0.75},
+    "person": {"body": 0.5, "individual": 0.5, "adult": 0.75, "male": 0.75, "female": 0.75},
+}
+
+# Optional JSON file ({category: [keywords]} or {category: {keyword: weight}})
+# merged over the built-in table; lets the keyword set grow without code changes
+CATEGORY_KEYWORDS_FILE = os.getenv("CATEGORY_KEYWORDS_FILE", "")
+
+_category_matcher: Optional[KeywordMatcher] = None
+
+
+def get_category_matcher() -> KeywordMatcher:
+    """Return the compiled category matcher, building it on first use."""
+    global _category_matcher
+    if _category_matcher is None:
+        table = normalize_keyword_table(CATEGORY_KEYWORDS)
+        for category, weights in CATEGORY_KEYWORD_WEIGHTS.items():
+            table[category].update(weights)
+        if CATEGORY_KEYWORDS_FILE:
+            for category, keywords in load_keyword_table(CATEGORY_KEYWORDS_FILE).items():
+                table.setdefault(category, {}).update(keywords)
+        _category_matcher = KeywordMatcher(table, default="general")
+    return _category_matcher
+
+
+def reload_category_keywords() -> None:
+    """Drop the compiled matcher so the keyword tables are re-read on next use."""
+    global _category_matcher
+    _category_matcher = None
+
+
 def detect_category(object_label: str) -> str:
     """
-    Detect category from object label using keyword matching.
+    Detect category from object label using weighted keyword matching.
     
     Args:
         object_label: The identified object label from vision model
@@ -256,15 +636,31 @@ def detect_category(object_label: str) -> str:
     """
     if not object_label:
         return "general"
-    
-    label_lower = object_label.lower()
-    
-    # Check each category's keywords
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        if any(keyword in label_lower for keyword in keywords):
-            return category
-    
-    return "general"
+
+    return get_category_matcher().classify(object_label)
+
+
+def detect_categories(object_labels: List[str]) -> List[str]:
+    """Batch version of detect_category."""
+    return get_category_matcher().classify_many(object_labels)
+
+
+# Base questions used when the object was identified without the vision model
+GENERIC_QUESTIONS = [
+    {
+        "key": "item_count",
+        "question": "How many items are shown in the photo?",
+        "answer_type": "number",
+        "required": True
+    },
+    {
+        "key": "longest_side",
+        "question": "Approximate size of the longest side in cm?",
+        "answer_type": "number",
+        "unit": "cm",
+        "required": False
+    }
+]
 
 
 def get_category_specific_questions(category: str, base_questions: list) -> list:
@@ -286,7 +682,11 @@ def get_category_specific_questions(category: str, base_questions: list) -> list
     all_questions = base_questions + category_questions
     return all_questions[:12]
 
-def validate_image_content(image_data_url: str) -> Dict[str, Any]:
+def question_keys_by_text(category: str) -> Dict[str, str]:
+    """Semantic key of each built-in question (generic and the category's), by exact question text."""
+    return {q["question"]: q["key"] for q in GENERIC_QUESTIONS + CATEGORY_SPECIFIC_QUESTIONS.get(category, [])}
+
+def validate_image_content(image_data_url: str, model: Optional[str] = None) -> Dict[str, Any]:
     """
     Validate image content against quality rules using vision model.
     
@@ -300,69 +700,24 @@ def validate_image_content(image_data_url: str) -> Dict[str, Any]:
     Returns validation result dict with 'valid' (bool) and 'issues' (list of strings).
     Raises ImageValidationError if validation fails.
     """
-    system = (
-        "You validate images for weight estimation. Check if the image meets quality requirements. "
-        "Be lenient with composite objects (like food items with multiple ingredients, salads, meals). "
-        "For composite objects, focus on visibility and clarity rather than requiring reference objects or plain backgrounds. "
-        "Return ONLY valid JSON (no markdown)."
-    )
-
-    user_prompt = {
-        "task": "validate_image_quality",
-        "validation_rules": {
-            "person": [
-                "Full Body Clear View - person should be fully visible from head to toe",
-                "Minimal Clothing - person should wear minimal clothing",
-                "Standard standing pose - person should be in a standard standing position",
-                "Plain Background - background should be simple and uniform"
-            ],
-            "single_object": [
-                "Reference Object Inclusion - image should include a reference object (coin, ruler, etc.) - OPTIONAL but recommended",
-                "Visibility and Clarity - object should be clearly visible and distinct",
-                "Uniform Lighting - lighting should be even across the image - OPTIONAL",
-                "Plain Contrasting Background - background should be plain and contrast with object - OPTIONAL",
-                "Sharp Focus - image should be in sharp focus"
-            ],
-            "composite_object": [
-                "Visibility and Clarity - main object(s) should be clearly visible",
-                "Sharp Focus - image should be in sharp focus",
-                "Multiple items are acceptable - composite objects like salads, meals, or collections are valid",
-                "Reference objects are OPTIONAL - not required for composite objects",
-                "Plain background is OPTIONAL - natural backgrounds are acceptable"
-            ]
-        },
-        "instructions": [
-            "First, determine if the image contains a single object, composite object (multiple items together like a salad), or a person",
-            "For composite objects (food items with multiple ingredients, salads, meals, collections), use 'composite_object' rules",
-            "For single distinct objects, use 'single_object' rules",
-            "Be lenient - only reject images that are truly unusable (blurry, too dark, completely obscured)",
-            "Accept images with multiple objects if they form a cohesive whole (like a salad with ingredients)"
-        ],
-        "output_schema": {
-            "image_type": "person|single_object|composite_object|unknown",
-            "valid": "boolean",
-            "issues": ["array of strings describing validation failures - only include critical issues"],
-            "summary": "short string summarizing validation result"
-        }
-    }
-
-    payload = {
-        "model": VISION_MODEL,
+    payload = with_structured_output({
+        "model": model or route_model("validation"),
         "messages": [
-            {"role": "system", "content": system},
+            system_message(IMAGE_VALIDATION),
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": json.dumps(user_prompt)},
+                    {"type": "text", "text": IMAGE_VALIDATION.render_user(image="attached")},
                     {"type": "image_url", "image_url": {"url": image_data_url}},
                 ],
             },
         ],
         "temperature": 0.2,
-    }
+    }, "image_validation", VALIDATION_SCHEMA)
 
     try:
-        out = _call_with_json_retry(payload, retries=2)
+        out = _call_with_json_retry(payload, retries=2, validator=validate_validation_output,
+                                    prompt=IMAGE_VALIDATION)
         valid = bool(out.get("valid", False))
         issues = out.get("issues", [])
         image_type = out.get("image_type", "unknown")
@@ -384,61 +739,33 @@ def validate_image_content(image_data_url: str) -> Dict[str, Any]:
             )
         
         return out
-    except ImageValidationError:
+    except (ImageValidationError, ProviderUnavailableError):
         raise
     except Exception as e:
         # If validation itself fails, we'll allow the image through but log the error
         # You might want to change this behavior based on your requirements
         raise LLMError(f"Image validation error: {str(e)}")
 
-def identify_object_and_questions(image_data_url: str, user_hint: str = "") -> Dict[str, Any]:
+def identify_object_and_questions(image_data_url: str, user_hint: str = "",
+                                  model: Optional[str] = None) -> Dict[str, Any]:
     """Identify object in image and generate questions using vision model."""
-    system = (
-        "You identify the main object in an image and generate the minimum set of questions "
-        "needed to estimate its weight. Return ONLY valid JSON (no markdown)."
-    )
-
-    user_prompt = {
-        "objectives": [
-            "Identify the main object in the image (simple label).",
-            "Provide a short summary of what you see that matters for weight.",
-            "Ask 4-8 practical questions that a user can answer."
-        ],
-        "output_schema": {
-            "object_label": "string",
-            "object_summary": "string",
-            "questions": [
-                {
-                    "question": "string",
-                    "answer_type": "text|number|boolean|select",
-                    "unit": "optional string",
-                    "options": "optional list of strings (select only)",
-                    "required": "boolean"
-                }
-            ]
-        },
-        "user_hint": user_hint
-    }
-
-    payload = {
-        "model": VISION_MODEL,
+    payload = with_structured_output({
+        "model": model or route_model("identification", has_hint=bool(user_hint)),
         "messages": [
-            {"role": "system", "content": system},
+            system_message(OBJECT_IDENTIFICATION),
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": json.dumps(user_prompt)},
+                    {"type": "text", "text": OBJECT_IDENTIFICATION.render_user(user_hint=user_hint)},
                     {"type": "image_url", "image_url": {"url": image_data_url}},
                 ],
             },
         ],
         "temperature": 0.2,
-    }
+    }, "object_identification", IDENTIFICATION_SCHEMA)
 
-    out = _call_with_json_retry(payload, retries=2)
-    out.setdefault("questions", [])
-    if not isinstance(out["questions"], list):
-        out["questions"] = []
+    out = _call_with_json_retry(payload, retries=2, validator=validate_identification_output,
+                                prompt=OBJECT_IDENTIFICATION)
     
     # Detect category from object label
     object_label = out.get("object_label", "")
@@ -451,6 +778,24 @@ def identify_object_and_questions(image_data_url: str, user_hint: str = "") -> D
     
     return out
 
+def local_identification(local: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build identify_object_and_questions-shaped output from a local classifier result.
+
+    Used for the on-CPU fast path and as a fallback while the provider circuit
+    is open. Questions are the generic ones plus the category-specific set.
+    """
+    object_label = local.get("object_label", "")
+    category = local.get("category") or detect_category(object_label)
+    return {
+        "object_label": object_label,
+        "object_summary": f"Identified locally as {object_label}.",
+        "questions": get_category_specific_questions(category, list(GENERIC_QUESTIONS)),
+        "category": category,
+        "source": "local",
+        "local_classifier": local,
+    }
+
 def _to_grams(value: float, unit: str) -> float:
     """Convert weight to grams."""
     u = (unit or "").strip().lower()
@@ -464,56 +809,150 @@ def _to_grams(value: float, unit: str) -> float:
         return value * 28.349523125
     return value
 
-def estimate_weight(object_label: str, object_summary: str, qa: Dict[str, Any]) -> Dict[str, Any]:
-    """Estimate weight using text model."""
-    system = (
-        "You estimate object weight from user answers. Return ONLY valid JSON (no markdown). "
-        "If uncertain, give a realistic range and lower confidence."
+def estimate_weight(object_label: str, object_summary: str, qa: Dict[str, Any],
+                    model: Optional[str] = None) -> Dict[str, Any]:
+    """Estimate weight using text model (routed by category when no model is given)."""
+    user_content = WEIGHT_ESTIMATION.render_user(
+        object_label=object_label,
+        object_summary=object_summary,
+        qa=qa,
     )
 
-    schema = {
-        "estimated_weight": {"value": "number", "unit": "g|kg|lb|oz", "min": "number", "max": "number"},
-        "confidence": "number between 0 and 1",
-        "rationale": "short string",
-        "key_factors": ["string"]
-    }
-
-    user_payload = {
-        "task": "estimate_weight",
-        "object_label": object_label,
-        "object_summary": object_summary,
-        "qa": qa,
-        "output_schema": schema,
-        "constraints": [
-            "min <= value <= max",
-            "do not invent facts not supported by user answers",
-            "if dimensions are missing, widen range and reduce confidence"
-        ],
-    }
-
-    payload = {
-        "model": TEXT_MODEL,
+    payload = with_structured_output({
+        "model": model or route_model("estimation", category=detect_category(object_label)),
         "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": json.dumps(user_payload)},
+            system_message(WEIGHT_ESTIMATION),
+            {"role": "user", "content": user_content},
         ],
         "temperature": 0.2,
-    }
+    }, "weight_estimate", ESTIMATION_SCHEMA)
+
+    out = _call_with_json_retry(payload, retries=2, validator=validate_estimation_output,
+                                prompt=WEIGHT_ESTIMATION)
+    _normalize_estimate(out)
+    return out
+
 
-    out = _call_with_json_retry(payload, retries=2)
-    ew = out.get("estimated_weight", {}) or {}
+def _normalize_estimate(out: Dict[str, Any]) -> None:
+    """Add the estimate converted to grams under "_normalized_grams"."""
+    ew = out["estimated_weight"]
 
-    unit = str(ew.get("unit", "g") or "g")
-    value = float(ew.get("value", 0) or 0)
-    minv = float(ew.get("min", value) or value)
-    maxv = float(ew.get("max", value) or value)
+    unit = ew["unit"]
+    value = float(ew["value"])
+    minv = float(ew["min"])
+    maxv = float(ew["max"])
 
     out["_normalized_grams"] = {
         "value_g": _to_grams(value, unit),
         "min_g": _to_grams(minv, unit),
         "max_g": _to_grams(maxv, unit),
     }
+
+
+def express_estimate(image_data_url: str, user_hint: str = "", model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Identify the object and estimate its weight in one vision call.
+
+    Returns identify_object_and_questions-shaped output (with category and
+    category-specific questions for later refinement) plus the estimate_weight
+    fields, including "_normalized_grams".
+    """
+    payload = with_structured_output({
+        "model": model or route_model("express", has_hint=bool(user_hint)),
+        "messages": [
+            system_message(EXPRESS_ESTIMATION),
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": EXPRESS_ESTIMATION.render_user(user_hint=user_hint)},
+                    {"type": "image_url", "image_url": {"url": image_data_url}},
+                ],
+            },
+        ],
+        "temperature": 0.2,
+    }, "express_estimation", EXPRESS_SCHEMA)
+
+    out = _call_with_json_retry(payload, retries=2, validator=validate_express_output,
+                                prompt=EXPRESS_ESTIMATION)
+    _normalize_estimate(out)
+
+    category = detect_category(out.get("object_label", ""))
+    out["category"] = category
+    out["questions"] = get_category_specific_questions(category, out["questions"][:5])
     return out
 
+def _escalation_reasons(out: Dict[str, Any]) -> List[str]:
+    """Why a fast-tier estimate is not good enough to return as is."""
+    reasons = []
+    if float(out.get("confidence", 0.0)) < LLM_CASCADE_MIN_CONFIDENCE:
+        reasons.append("low_confidence")
+    grams = out["_normalized_grams"]
+    if grams["value_g"] <= 0 or (grams["max_g"] - grams["min_g"]) / grams["value_g"] > LLM_CASCADE_MAX_RANGE_RATIO:
+        reasons.append("wide_range")
+    return reasons
+
+
+def _cascade_attempt(tier: str, out: Dict[str, Any]) -> Dict[str, Any]:
+    grams = out["_normalized_grams"]
+    return {
+        "tier": tier,
+        "model": out["_llm"]["model"],
+        "latency_ms": out["_llm"]["latency_ms"],
+        "confidence": out.get("confidence"),
+        "range_ratio": round((grams["max_g"] - grams["min_g"]) / grams["value_g"], 3) if grams["value_g"] > 0 else None,
+        "output": {k: v for k, v in out.items() if not k.startswith("_")},
+    }
+
+
+def estimate_weight_cascade(object_label: str, object_summary: str, qa: Dict[str, Any],
+                            model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Estimate weight with the fast/strong model cascade.
+
+    Falls back to a single estimate_weight call (with the given or routed
+    model) when LLM_CASCADE_ENABLED is off. Otherwise the fast model answers
+    first; low confidence or a wide range escalates to the strong model.
+
+    Returns:
+        The final estimate_weight output with "_cascade" holding the tier that
+        resolved the request, the escalation reasons and every attempt
+    """
+    if not LLM_CASCADE_ENABLED:
+        return estimate_weight(object_label, object_summary, qa, model=model)
+
+    fast = estimate_weight(object_label, object_summary, qa, model=LLM_CASCADE_FAST_MODEL)
+    attempts = [_cascade_attempt("fast", fast)]
+    reasons = _escalation_reasons(fast)
+
+    final, tier = fast, "fast"
+    if reasons:
+        LLM_STATS["cascade_escalated"] += 1
+        started = time.monotonic()
+        try:
+            final = estimate_weight(object_label, object_summary, qa, model=LLM_CASCADE_STRONG_MODEL)
+            tier = "strong"
+            attempts.append(_cascade_attempt("strong", final))
+        except Exception as e:
+            # Any strong-tier failure (provider error, open breaker, malformed output):
+            # the fast answer is still usable, so keep it and record why
+            print(f"Cascade strong tier failed: {str(e)}")
+            reasons.append(f"strong_failed: {str(e)[:200]}")
+            attempts.append({
+                "tier": "strong",
+                "model": LLM_CASCADE_STRONG_MODEL,
+                "latency_ms": round((time.monotonic() - started) * 1000),
+                "error": f"{type(e).__name__}: {str(e)[:200]}",
+            })
+    else:
+        LLM_STATS["cascade_fast"] += 1
+
+    final["_cascade"] = {
+        "tier": tier,
+        "escalation_reasons": reasons,
+        "latency_ms": round(sum(a["latency_ms"] for a in attempts), 1),
+        "attempts": attempts,
+    }
+    return final
+
 # Keep OpenRouterError for backward compatibility
 OpenRouterError = LLMError
@@ -0,0 +1,87 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from estimates.models import WeightEstimate
+
+from .models import EstimationSession
+from .search import sync_estimate_rationale, sync_session_document
+from .summary import sync_estimate_summary, sync_session_summary
+from .stats import (
+    apply_estimate_save,
+    apply_session_change,
+    apply_session_delete,
+    apply_session_save,
+    session_state,
+)
+
+# Fields whose changes move the history statistics
+SESSION_STATS_FIELDS = {"status", "category"}
+
+# Fields copied into the search document
+SESSION_SEARCH_FIELDS = {"object_label", "object_summary"}
+
+# Fields copied into the history summary
+SESSION_SUMMARY_FIELDS = {"object_label", "canonical_label", "category", "status", "parent", "updated_at"}
+
+
+# Statistics handlers are registered first: they read the previous state from the
+# summary row (swapping it to the new one) before the summary handlers overwrite it
+
+@receiver(post_save, sender=EstimationSession)
+def update_stats_on_session_save(sender, instance: EstimationSession, created: bool, update_fields=None, **kwargs):
+    if created:
+        apply_session_change(instance.user_id, None, session_state(instance))
+        return
+    fields = SESSION_STATS_FIELDS if update_fields is None else SESSION_STATS_FIELDS & set(update_fields)
+    if fields:
+        apply_session_save(instance, fields)
+
+
+@receiver(pre_delete, sender=EstimationSession)
+def update_stats_on_session_delete(sender, instance: EstimationSession, **kwargs):
+    # Before the cascade: the summary row still holds the session's counted state
+    apply_session_delete(instance)
+
+
+@receiver(post_save, sender=WeightEstimate)
+def update_stats_on_estimate_save(sender, instance: WeightEstimate, update_fields=None, **kwargs):
+    if update_fields is None or "confidence" in update_fields:
+        apply_estimate_save(instance.session_id, instance.confidence)
+
+
+@receiver(post_delete, sender=WeightEstimate)
+def update_stats_on_estimate_delete(sender, instance: WeightEstimate, **kwargs):
+    apply_estimate_save(instance.session_id, None)
+
+
+@receiver(post_save, sender=EstimationSession)
+def update_summary_on_session_save(sender, instance: EstimationSession, created: bool, update_fields=None, **kwargs):
+    if update_fields is None or SESSION_SUMMARY_FIELDS & set(update_fields):
+        sync_session_summary(instance, created)
+
+
+@receiver(post_save, sender=WeightEstimate)
+def update_summary_on_estimate_save(sender, instance: WeightEstimate, **kwargs):
+    sync_estimate_summary(instance.session_id, instance)
+
+
+@receiver(post_delete, sender=WeightEstimate)
+def update_summary_on_estimate_delete(sender, instance: WeightEstimate, **kwargs):
+    sync_estimate_summary(instance.session_id, None)
+
+
+@receiver(post_save, sender=EstimationSession)
+def update_search_on_session_save(sender, instance: EstimationSession, created: bool, update_fields=None, **kwargs):
+    if update_fields is None or SESSION_SEARCH_FIELDS & set(update_fields):
+        sync_session_document(instance, created)
+
+
+@receiver(post_save, sender=WeightEstimate)
+def update_search_on_estimate_save(sender, instance: WeightEstimate, update_fields=None, **kwargs):
+    if update_fields is None or "rationale" in update_fields:
+        sync_estimate_rationale(instance.session_id, instance.rationale)
+
+
+@receiver(post_delete, sender=WeightEstimate)
+def update_search_on_estimate_delete(sender, instance: WeightEstimate, **kwargs):
+    sync_estimate_rationale(instance.session_id, "")
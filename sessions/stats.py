@@ -0,0 +1,208 @@
+"""
+Per-user history statistics.
+
+compute_statistics derives every counter in one conditional-aggregate query
+over the SessionSummary table (no join to estimates).
+That result seeds a UserSessionStats row the first time a user's statistics
+are requested; from then on the signal handlers in sessions/signals.py apply
+deltas with F() expressions whenever a session or estimate is created,
+changed or deleted, so reading the statistics is a single primary-key lookup.
+
+The state a change moves away from is read from the session's summary row,
+not from the Python instance being saved (which may be stale), and the
+summary row is swapped to the new state with an UPDATE conditional on the
+values just read. When several writers race on one session, each transition
+is therefore claimed, and counted, by exactly one of them.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import EstimationSession, SessionStatus, SessionSummary, STATS_CATEGORIES, UserSessionStats
+
+# (completed, category) of a session as counted in the statistics
+SessionState = Tuple[bool, Optional[str]]
+
+
+def compute_statistics(user_id) -> Dict[str, Any]:
+    """All UserSessionStats counters for a user, in one query."""
+    category_counts = {
+        f"{category}_sessions": Count("pk", filter=Q(category=category))
+        for category in STATS_CATEGORIES
+    }
+    values = SessionSummary.objects.filter(user_id=user_id).aggregate(
+        total_sessions=Count("pk"),
+        completed_sessions=Count("pk", filter=Q(status=SessionStatus.ESTIMATED)),
+        estimate_count=Count("confidence"),
+        confidence_sum=Sum("confidence"),
+        **category_counts,
+    )
+    values["confidence_sum"] = values["confidence_sum"] or 0.0
+    return values
+
+
+def refresh_user_stats(user_id) -> None:
+    """Recompute an existing statistics row from scratch (no-op if the user has none yet)."""
+    UserSessionStats.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(), **compute_statistics(user_id)
+    )
+
+
+def get_user_stats(user_id) -> UserSessionStats:
+    """Return the user's statistics row, computing it on first use."""
+    stats = UserSessionStats.objects.filter(user_id=user_id).first()
+    if stats is not None:
+        return stats
+    try:
+        with transaction.atomic():
+            return UserSessionStats.objects.create(
+                user_id=user_id, updated_at=timezone.now(), **compute_statistics(user_id)
+            )
+    except IntegrityError:
+        # A concurrent request created it first
+        return UserSessionStats.objects.get(user_id=user_id)
+
+
+def _apply(stats_filter: Q, deltas: Dict[str, Any]) -> None:
+    deltas = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if deltas:
+        # No row yet means nothing to keep current; it is computed on first read
+        UserSessionStats.objects.filter(stats_filter).update(updated_at=timezone.now(), **deltas)
+
+
+def _state(status: str, category: str) -> SessionState:
+    return status == SessionStatus.ESTIMATED, category if category in STATS_CATEGORIES else None
+
+
+def session_state(session: EstimationSession) -> SessionState:
+    """(completed, category) of a session as counted in the statistics."""
+    return _state(session.status, session.category)
+
+
+# Conditional swaps tried before a contended row is overwritten and recounted
+SWAP_ATTEMPTS = 3
+
+_CONTENDED = object()
+
+
+def _swap_summary(session_id, values: Dict[str, Any]) -> Any:
+    """
+    Set summary columns of a session and return the values they replaced.
+
+    Returns:
+        The replaced values, None if the row is missing or already held the
+        new values (another writer claimed the change), or _CONTENDED if the
+        row kept changing under us; it was then overwritten unconditionally
+        and the caller must recompute instead of applying a delta
+    """
+    rows = SessionSummary.objects.filter(pk=session_id)
+    for _ in range(SWAP_ATTEMPTS):
+        old = rows.values(*values).first()
+        if old is None or old == values:
+            return None
+        if rows.filter(**old).update(**values):
+            return old
+    rows.update(**values)
+    return _CONTENDED
+
+
+def apply_session_save(session: EstimationSession, fields: Iterable[str]) -> None:
+    """
+    Update the counters for a saved (not new) session.
+
+    Args:
+        session: The saved session
+        fields: Which of status and category were written
+    """
+    values = {field: getattr(session, field) for field in fields}
+    old = _swap_summary(session.pk, values)
+    if old is _CONTENDED:
+        refresh_user_stats(session.user_id)
+    elif old is not None:
+        # A field that was not written keeps both states at None: no delta for it
+        apply_session_change(session.user_id, _state(old.get("status"), old.get("category")),
+                             _state(values.get("status"), values.get("category")))
+
+
+def apply_session_delete(session: EstimationSession) -> None:
+    """
+    Remove a session (and its estimate) from the counters before it is deleted.
+
+    Deletes the summary row, conditional on the state just read, so that only
+    one of several concurrent deletes counts the session.
+    """
+    rows = SessionSummary.objects.filter(pk=session.pk)
+    for _ in range(SWAP_ATTEMPTS):
+        old = rows.values("status", "category", "confidence").first()
+        if old is None:
+            return
+        if rows.filter(**old).delete()[0]:
+            apply_session_change(session.user_id, _state(old["status"], old["category"]), None)
+            if old["confidence"] is not None:
+                apply_estimate_change(session.pk, old["confidence"], None, user_id=session.user_id)
+            return
+    rows.delete()
+    refresh_user_stats(session.user_id)
+
+
+def apply_estimate_save(session_id, confidence: Optional[float]) -> None:
+    """
+    Update the counters for an estimate saved (or, with None, deleted) on a session.
+
+    The summary's confidence column holds the counted estimate: NULL for none.
+    """
+    old = _swap_summary(session_id, {"confidence": confidence})
+    if old is _CONTENDED:
+        user_id = EstimationSession.objects.filter(pk=session_id).values_list("user_id", flat=True).first()
+        if user_id is not None:
+            refresh_user_stats(user_id)
+    elif old is not None:
+        apply_estimate_change(session_id, old["confidence"], confidence)
+
+
+def apply_session_change(user_id, old: Optional[SessionState], new: Optional[SessionState]) -> None:
+    """
+    Update the counters for a session moving from one state to another.
+
+    Args:
+        user_id: Owner of the session
+        old: State before the change (None for a new session)
+        new: State after the change (None for a deleted session)
+    """
+    deltas: Dict[str, int] = {}
+    if old is None:
+        deltas["total_sessions"] = 1
+    if new is None:
+        deltas["total_sessions"] = -1
+
+    old_completed, old_category = old or (False, None)
+    new_completed, new_category = new or (False, None)
+    deltas["completed_sessions"] = int(new_completed) - int(old_completed)
+    if old_category != new_category:
+        if old_category:
+            deltas[f"{old_category}_sessions"] = -1
+        if new_category:
+            deltas[f"{new_category}_sessions"] = 1
+
+    _apply(Q(user_id=user_id), deltas)
+
+
+def apply_estimate_change(session_id, old_confidence: Optional[float], new_confidence: Optional[float],
+                          user_id=None) -> None:
+    """
+    Update the estimate counters of the session's owner.
+
+    Args:
+        session_id: Session the estimate belongs to
+        old_confidence: Confidence before the change (None for a new estimate)
+        new_confidence: Confidence after the change (None for a deleted estimate)
+        user_id: Owner, when known (required once the session row is being deleted)
+    """
+    deltas: Dict[str, Any] = {
+        "estimate_count": int(new_confidence is not None) - int(old_confidence is not None),
+        "confidence_sum": (new_confidence or 0.0) - (old_confidence or 0.0),
+    }
+    _apply(Q(user_id=user_id) if user_id is not None else Q(user__estimation_sessions=session_id), deltas)
@@ -0,0 +1,60 @@
+"""
+Maintenance of the denormalized SessionSummary rows.
+
+The signal handlers in sessions/signals.py call these on every session and
+estimate write, so the history list, statistics and export never have to
+join sessions to estimates. Each write is a single INSERT or UPDATE.
+"""
+
+from typing import Any, Dict, Optional
+
+from estimates.models import WeightEstimate
+
+from .models import MISSING_SORT_VALUE, EstimationSession, SessionSummary
+
+def sync_session_summary(session: EstimationSession, created: bool) -> None:
+    """Create or update the session's summary row from the session (one query)."""
+    values = {
+        "user_id": session.user_id,
+        "parent_id": session.parent_id,
+        "label": session.object_label,
+        "canonical_label": session.canonical_label,
+        "category": session.category,
+        "status": session.status,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+    }
+    if not created and SessionSummary.objects.filter(session_id=session.pk).update(**values):
+        return
+    # The image (thumbnail) never changes after creation, so it is only read here
+    SessionSummary.objects.create(
+        session=session,
+        image_id=session.image_id,
+        thumbnail=session.image.image.name if session.image_id else "",
+        **values,
+    )
+
+
+def estimate_summary_fields(estimate: Optional[WeightEstimate]) -> Dict[str, Any]:
+    """Summary columns for a session's estimate (or for no estimate)."""
+    if estimate is None:
+        return {
+            "value_grams": None, "min_grams": None, "max_grams": None, "confidence": None,
+            "estimate_category": "", "rationale": "",
+            "weight_sort": MISSING_SORT_VALUE, "confidence_sort": MISSING_SORT_VALUE,
+        }
+    return {
+        "value_grams": estimate.value_grams,
+        "min_grams": estimate.min_grams,
+        "max_grams": estimate.max_grams,
+        "confidence": estimate.confidence,
+        "estimate_category": estimate.category,
+        "rationale": estimate.rationale,
+        "weight_sort": estimate.value_grams,
+        "confidence_sort": estimate.confidence,
+    }
+
+
+def sync_estimate_summary(session_id, estimate: Optional[WeightEstimate]) -> None:
+    """Copy an estimate (None after it was deleted) into its session's summary row."""
+    SessionSummary.objects.filter(session_id=session_id).update(**estimate_summary_fields(estimate))
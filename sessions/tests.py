@@ -0,0 +1,390 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from estimates.models import BodyCompositionEstimate, WeightEstimate
+from estimates.taxonomy import get_taxonomy
+from media_store.models import UploadedImage
+
+from .idempotency import claim, complete, request_fingerprint, single_flight
+from .local_classifier import imagenet_category
+from .models import Answer, EstimationSession, IdempotencyKey, SessionStatus, UserSessionStats
+from .pipeline import (
+    apply_identification,
+    load_answer_map,
+    required_answered,
+    run_identification,
+    save_answer,
+    save_answers,
+)
+from .stats import compute_statistics, get_user_stats
+
+
+def identification_output(n_questions):
+    """Identification provider output with n required questions."""
+    return {
+        "object_label": "red apple",
+        "object_summary": "A single red apple.",
+        "category": "food",
+        "questions": [
+            {"question": f"Question {i}?", "answer_type": "number", "unit": "cm", "options": None, "required": True}
+            for i in range(n_questions)
+        ],
+        "_llm": {"model": "test-model"},
+    }
+
+
+def estimation_output():
+    """estimate_weight_cascade output for a 150 g estimate."""
+    return {
+        "estimated_weight": {"value": 150, "unit": "g", "min": 130, "max": 170},
+        "confidence": 0.8,
+        "rationale": "Typical medium apple.",
+        "key_factors": [],
+        "_normalized_grams": {"value_g": 150, "min_g": 130, "max_g": 170},
+        "_llm": {"model": "test-model"},
+    }
+
+
+class IdentificationQueryCountTests(TestCase):
+    """Identification writes a constant number of queries, whatever the question count."""
+
+    # Two checkpointed stages (12, savepoints included), the session UPDATE with the
+    # summary state swap, stats, summary and search-document sync (6), question
+    # templates and questions (2) inside one savepoint (2)
+    QUERIES = 22
+
+    def setUp(self):
+        self.user = User.objects.create_user("tester", password="pw")
+        self.image = UploadedImage.objects.create(
+            uploaded_by=self.user, image="uploads/apple.jpg", mime_type="image/jpeg",
+        )
+        # Built once per process; keep its reference-data queries out of the count
+        get_taxonomy()
+
+    def identify(self, n_questions):
+        session = EstimationSession.objects.create(
+            user=self.user, image=self.image, object_json={"user_hint": ""}, status=SessionStatus.PROCESSING,
+        )
+        with mock.patch("sessions.pipeline.classify_locally", return_value=None), \
+                mock.patch("sessions.pipeline.image_file_to_data_url", return_value="data:image/jpeg;base64,"), \
+                mock.patch("sessions.pipeline.validate_image_content", return_value={"valid": True}), \
+                mock.patch("sessions.pipeline.identify_object_and_questions",
+                           return_value=identification_output(n_questions)):
+            with self.assertNumQueries(self.QUERIES):
+                run_identification(session)
+        return session
+
+    def test_constant_queries(self):
+        for n_questions in (1, 4, 12):
+            with self.subTest(questions=n_questions):
+                session = self.identify(n_questions)
+                self.assertEqual(session.questions.count(), n_questions)
+                self.assertEqual(session.required_question_count, n_questions)
+                self.assertEqual(session.status, SessionStatus.QUESTIONS_ASKED)
+
+
+class LocalClassifierFastPathTests(TestCase):
+    """Only confident local results with a known category skip the vision model."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("tester", password="pw")
+        self.image = UploadedImage.objects.create(
+            uploaded_by=self.user, image="uploads/apple.jpg", mime_type="image/jpeg",
+        )
+
+    def identify(self, local):
+        session = EstimationSession.objects.create(
+            user=self.user, image=self.image, object_json={"user_hint": ""}, status=SessionStatus.PROCESSING,
+        )
+        with mock.patch("sessions.pipeline.classify_locally", return_value=local), \
+                mock.patch("sessions.pipeline.image_file_to_data_url", return_value="data:image/jpeg;base64,"), \
+                mock.patch("sessions.pipeline.validate_image_content", return_value={"valid": True}), \
+                mock.patch("sessions.pipeline.identify_object_and_questions",
+                           return_value=identification_output(2)) as identify:
+            llm_out = run_identification(session)
+        return llm_out, identify
+
+    def local_result(self, label, category):
+        return {
+            "object_label": label, "category": category, "confidence": 0.99,
+            "candidates": [], "backend": "test", "latency_ms": 1.0,
+        }
+
+    def test_known_category_takes_fast_path(self):
+        llm_out, identify = self.identify(self.local_result("Granny Smith", "food"))
+        identify.assert_not_called()
+        self.assertEqual(llm_out["category"], "food")
+
+    def test_general_category_falls_back_to_vision_model(self):
+        llm_out, identify = self.identify(self.local_result("rocking chair", "general"))
+        identify.assert_called_once()
+        self.assertEqual(llm_out["object_label"], "red apple")
+
+    def test_imagenet_categories(self):
+        self.assertEqual(imagenet_category(948), "food")  # Granny Smith
+        self.assertEqual(imagenet_category(208), "pet")  # Labrador retriever
+        self.assertEqual(imagenet_category(478), "package")  # carton
+        self.assertIsNone(imagenet_category(958))  # hay
+        self.assertIsNone(imagenet_category(765))  # rocking chair
+
+
+class AnswerSubmitQueryCountTests(TestCase):
+    """Submitting answers costs the same number of queries for any number of answers."""
+
+    # Session, questions and answers (3), the session lock, one answer upsert and the
+    # required-answered recount inside a savepoint (6), estimate lookup, status update
+    # with the summary state swap and summary sync (5) and the serialized session (3)
+    SAVE_QUERIES = 17
+    # Every answer answered: the single-flight claim, estimation and category
+    # checkpoints, the estimate with its category details and the summary/stats/search sync
+    ESTIMATE_QUERIES = 58
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("tester", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        get_taxonomy()
+
+    def identified_session(self, n_questions):
+        session = EstimationSession.objects.create(user=self.user, status=SessionStatus.PROCESSING)
+        apply_identification(session, identification_output(n_questions))
+        return session
+
+    def submit(self, session, questions, queries):
+        answers = [{"question_id": str(q.id), "value": str(10 + i)} for i, q in enumerate(questions)]
+        with mock.patch("sessions.pipeline.estimate_weight_cascade", return_value=estimation_output()):
+            with self.assertNumQueries(queries):
+                response = self.client.post(f"/api/sessions/{session.id}/answers/", {"answers": answers}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_constant_queries_with_estimation(self):
+        for n_questions in (4, 12):
+            with self.subTest(questions=n_questions):
+                session = self.identified_session(n_questions)
+                response = self.submit(session, list(session.questions.all()), self.ESTIMATE_QUERIES)
+                self.assertIn("estimate", response.data)
+                self.assertEqual(Answer.objects.filter(session=session).count(), n_questions)
+
+    def test_constant_queries_without_estimation(self):
+        for n_questions in (4, 12):
+            with self.subTest(questions=n_questions):
+                # Half the required questions: answers are saved, estimation does not run
+                session = self.identified_session(n_questions * 2)
+                response = self.submit(session, list(session.questions.all())[:n_questions], self.SAVE_QUERIES)
+                self.assertNotIn("estimate", response.data)
+
+    def test_upsert_of_answered_questions(self):
+        session = self.identified_session(12)
+        questions = list(session.questions.all())
+        self.submit(session, questions[:6], self.SAVE_QUERIES)
+
+        # 6 updates and 6 inserts cost the same as 12 inserts; the session is already
+        # IN_PROGRESS, so its status write has no summary state to swap (one query fewer)
+        self.submit(session, questions, self.ESTIMATE_QUERIES - 1)
+
+        session.refresh_from_db()
+        self.assertEqual(session.required_answered_count, 12)
+        self.assertEqual(
+            sorted(Answer.objects.filter(session=session).values_list("value_number", flat=True)),
+            [float(10 + i) for i in range(12)],
+        )
+
+
+class RequiredAnsweredCountTests(TestCase):
+    """required_answered_count matches the saved answers whatever the caller's answer map says."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("tester", password="pw")
+        self.session = EstimationSession.objects.create(user=self.user, status=SessionStatus.PROCESSING)
+        apply_identification(self.session, identification_output(4))
+
+    def test_repeated_submit_with_stale_answer_map(self):
+        questions, _ = load_answer_map(self.session)
+        q_by_id = {str(q.id): q for q in questions}
+        items = {str(q.id): "10" for q in questions[:2]}
+
+        # Both submits loaded their (empty) answer map before either saved
+        for _ in range(2):
+            save_answers(self.session, q_by_id, {}, items)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.required_answered_count, 2)
+        self.assertFalse(required_answered(self.session))
+
+    def test_autosave_after_submit(self):
+        questions, answers = load_answer_map(self.session)
+        save_answers(self.session, {str(q.id): q for q in questions}, answers, {str(questions[0].id): "10"})
+        self.assertFalse(save_answer(self.session, questions[0], "12"))
+        self.assertTrue(save_answer(self.session, questions[1], "12"))
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.required_answered_count, 2)
+
+
+class SingleFlightTests(TestCase):
+    """Coalesced work is shared for the TTL after it completes, and only with the same endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("tester", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        get_taxonomy()
+
+    def test_slow_result_is_shared_after_completion(self):
+        started = timezone.now() - timedelta(minutes=1)
+        record = claim(self.user, "single-flight:test", "key", request_fingerprint("key"), ttl_seconds=5)
+        # The work took longer than the TTL
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            claimed_at=started, expires_at=started + timedelta(seconds=5),
+        )
+        record.refresh_from_db()
+        complete(record, Response({"detail": "first"}, status=200))
+
+        response = single_flight(self.user, "test", "key", lambda: Response({"detail": "second"}, status=200))
+        self.assertEqual(response.data, {"detail": "first"})
+        self.assertEqual(response["Single-Flight-Shared"], "true")
+
+    def test_retry_after_submit_gets_its_own_response(self):
+        session = EstimationSession.objects.create(user=self.user, status=SessionStatus.PROCESSING)
+        apply_identification(session, identification_output(2))
+        answers = [{"question_id": str(q.id), "value": "10"} for q in session.questions.all()]
+        with mock.patch("sessions.pipeline.estimate_weight_cascade", return_value=estimation_output()):
+            submitted = self.client.post(f"/api/sessions/{session.id}/answers/", {"answers": answers}, format="json")
+            retried = self.client.post(f"/api/sessions/{session.id}/retry/")
+
+        self.assertEqual(submitted.data["detail"], "Estimated successfully.")
+        self.assertEqual(retried.status_code, 200, retried.data)
+        self.assertFalse(retried.has_header("Single-Flight-Shared"))
+        self.assertEqual(retried.data["detail"], "Nothing to retry.")
+        self.assertIn("session", retried.data)
+
+
+class TextSessionQuestionKeyTests(TestCase):
+    """Text-session answers are keyed like the built-in questions they repeat."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("tester", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, answers):
+        with mock.patch("sessions.pipeline.estimate_weight_cascade", return_value=estimation_output()):
+            response = self.client.post(
+                "/api/sessions/from-text/", {"description": "adult man", "answers": answers}, format="json",
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        return EstimationSession.objects.get(id=response.data["session"]["id"])
+
+    def test_category_question_text_gets_its_key(self):
+        session = self.create([
+            {"question": "What is the person's height in cm?", "value": 180},
+            {"question": "Activity level?", "value": "Very active"},
+            {"question": "Estimated height in cm?", "value": 20},
+            {"question": "Anything else?", "value": "no"},
+        ])
+        # The package question's text is not one the person category asks
+        self.assertEqual(
+            list(session.questions.order_by("order").values_list("key", flat=True)),
+            ["height", "activity", "", ""],
+        )
+        details = BodyCompositionEstimate.objects.get(estimate__session=session)
+        self.assertEqual(details.height_cm, 180)
+
+    def test_explicit_key_wins(self):
+        session = self.create([
+            {"question": "Height (cm)", "value": 175, "key": "height"},
+            {"question": "What is the person's height in cm?", "value": 180},
+        ])
+        self.assertEqual(list(session.questions.order_by("order").values_list("key", flat=True)), ["height", ""])
+        self.assertEqual(BodyCompositionEstimate.objects.get(estimate__session=session).height_cm, 175)
+
+
+class StatsConsistencyTests(TestCase):
+    """The per-user statistics row matches a full recompute after stale or repeated writes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("tester", password="pw")
+        self.session = EstimationSession.objects.create(
+            user=self.user, object_label="apple", category="food", status=SessionStatus.IN_PROGRESS,
+        )
+        # Create the row so the signal handlers keep it current
+        get_user_stats(self.user.id)
+
+    def assertStatsConsistent(self):
+        stats = UserSessionStats.objects.get(user=self.user)
+        for field, value in compute_statistics(self.user.id).items():
+            self.assertAlmostEqual(getattr(stats, field), value, msg=field)
+
+    def copies(self, n=2):
+        return [EstimationSession.objects.get(pk=self.session.pk) for _ in range(n)]
+
+    def test_same_transition_saved_by_two_copies(self):
+        for copy in self.copies():
+            copy.status = SessionStatus.ESTIMATED
+            copy.save(update_fields=["status", "updated_at"])
+        self.assertStatsConsistent()
+        self.assertEqual(UserSessionStats.objects.get(user=self.user).completed_sessions, 1)
+
+    def test_stale_full_save_reverts_transition(self):
+        fresh, stale = self.copies()
+        fresh.status = SessionStatus.ESTIMATED
+        fresh.save()
+        stale.category = "pet"
+        stale.save()  # writes IN_PROGRESS back as well
+        self.assertStatsConsistent()
+
+    def test_delete_through_stale_copy(self):
+        fresh, stale = self.copies()
+        fresh.status = SessionStatus.ESTIMATED
+        fresh.save(update_fields=["status", "updated_at"])
+        stale.delete()
+        self.assertStatsConsistent()
+        self.assertEqual(UserSessionStats.objects.get(user=self.user).completed_sessions, 0)
+
+    def test_repeated_delete(self):
+        first, second = self.copies()
+        first.delete()
+        second.delete()
+        self.assertStatsConsistent()
+        self.assertEqual(UserSessionStats.objects.get(user=self.user).total_sessions, 0)
+
+    def test_deferred_fields(self):
+        session = EstimationSession.objects.only("id", "user_id", "status").get(pk=self.session.pk)
+        session.status = SessionStatus.ESTIMATED
+        session.save()
+        self.assertStatsConsistent()
+
+    def test_estimate_replaced_and_deleted_twice(self):
+        WeightEstimate.objects.create(
+            session=self.session, value_grams=150, min_grams=130, max_grams=170, confidence=0.8, raw_json={},
+        )
+        first, second = [WeightEstimate.objects.get(session=self.session) for _ in range(2)]
+        first.confidence = 0.6
+        first.save()
+        second.confidence = 0.6
+        second.save()
+        self.assertStatsConsistent()
+
+        first.delete()
+        second.delete()
+        self.assertStatsConsistent()
+        self.assertEqual(UserSessionStats.objects.get(user=self.user).estimate_count, 0)
+
+    def test_session_delete_removes_its_estimate(self):
+        WeightEstimate.objects.create(
+            session=self.session, value_grams=150, min_grams=130, max_grams=170, confidence=0.8, raw_json={},
+        )
+        self.session.delete()
+        self.assertStatsConsistent()
+        self.assertEqual(UserSessionStats.objects.get(user=self.user).estimate_count, 0)
@@ -1,15 +1,29 @@
 from django.urls import path
 from .views import (
     CreateSessionFromImageAPIView,
+    ExpressEstimateAPIView,
+    CreateSessionFromTextAPIView,
     SessionListAPIView,
+    SessionStatsAPIView,
+    SessionExportAPIView,
     SessionDetailAPIView,
     SubmitAnswersAPIView,
+    AutosaveAnswerAPIView,
+    WhatIfAPIView,
+    RetrySessionAPIView,
 )
 
 urlpatterns = [
     path("", SessionListAPIView.as_view(), name="session-list"),
+    path("stats/", SessionStatsAPIView.as_view(), name="session-stats"),
+    path("export/", SessionExportAPIView.as_view(), name="session-export"),
     path("from-image/", CreateSessionFromImageAPIView.as_view(), name="session-from-image"),
+    path("express/", ExpressEstimateAPIView.as_view(), name="session-express"),
+    path("from-text/", CreateSessionFromTextAPIView.as_view(), name="session-from-text"),
     path("<uuid:session_id>/", SessionDetailAPIView.as_view(), name="session-detail"),
     path("<uuid:session_id>/answers/", SubmitAnswersAPIView.as_view(), name="session-submit-answers"),
+    path("<uuid:session_id>/answers/<uuid:question_id>/", AutosaveAnswerAPIView.as_view(), name="session-autosave-answer"),
+    path("<uuid:session_id>/what-if/", WhatIfAPIView.as_view(), name="session-what-if"),
+    path("<uuid:session_id>/retry/", RetrySessionAPIView.as_view(), name="session-retry"),
 ]
 
@@ -1,32 +1,48 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from media_store.models import UploadedImage
-from estimates.models import (
-    WeightEstimate, FoodEstimate, PackageEstimate, 
-    PetEstimate, BodyCompositionEstimate, FoodNutrition, BMICategory
-)
+from estimates.models import WeightEstimate
 from estimates.serializers import WeightEstimateSerializer
-from estimates.calculations import (
-    calculate_nutrition, calculate_shipping_costs,
-    assess_pet_health, calculate_bmi_insights, extract_answer_value
-)
+from estimates.taxonomy import canonicalize_label
 
-from .models import EstimationSession, Question, Answer, SessionStatus
+from .models import EstimationSession, Question, SessionStatus, SessionSummary
 from .serializers import (
     SessionSerializer,
+    SessionListSerializer,
     CreateSessionFromImageSerializer,
+    CreateSessionFromTextSerializer,
     SubmitAnswersSerializer,
+    AutosaveAnswerSerializer,
+)
+from .export import EXPORT_FORMATS, export_lines
+from .idempotency import idempotent, single_flight
+from .pagination import InvalidCursor, SessionKeysetPagination
+from .search import search_sessions
+from .stats import get_user_stats
+from .pipeline import (
+    create_provided_answers,
+    fork_session,
+    load_answer_map,
+    mark_failed,
+    required_answered,
+    resume_pipeline,
+    run_estimation,
+    run_express,
+    run_identification,
+    save_answer,
+    save_answers,
 )
 from .services import (
-    image_file_to_data_url,
-    validate_image_content,
-    identify_object_and_questions,
-    estimate_weight,
     detect_category,
     LLMError,
+    ProviderUnavailableError,
     ImageValidationError,
     OpenRouterError,  # Backward compatibility
 )
@@ -35,6 +51,7 @@ class CreateSessionFromImageAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     throttle_scope = "llm"
 
+    @idempotent("from-image")
     def post(self, request):
         ser = CreateSessionFromImageSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
@@ -47,146 +64,227 @@ class CreateSessionFromImageAPIView(APIView):
 
         user_hint = ser.validated_data.get("user_hint", "")
 
+        # Double clicks and parallel tabs on the same image share one identification
+        return single_flight(
+            request.user, "from-image", f"{img.id}:{user_hint}",
+            lambda: self.create_session(request, img, user_hint),
+        )
+
+    def create_session(self, request, img, user_hint):
+        # Created before any provider call so a failed run can be resumed
+        session = EstimationSession.objects.create(
+            user=request.user,
+            image=img,
+            object_json={"user_hint": user_hint},
+            status=SessionStatus.PROCESSING,
+        )
+
         try:
-            data_url = image_file_to_data_url(img.image.path, mime_type=img.mime_type or "image/jpeg")
-            
-            # Validate image content before processing
-            try:
-                validate_image_content(data_url)
-            except ImageValidationError as e:
-                return Response({"detail": str(e)}, status=400)
-            
-            llm_out = identify_object_and_questions(data_url, user_hint=user_hint)
+            run_identification(session)
+        except ImageValidationError as e:
+            # A rejected image is final, not resumable
+            session.delete()
+            return Response({"detail": str(e)}, status=400)
+        except ProviderUnavailableError as e:
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=503)
         except (LLMError, Exception) as e:
-            return Response({"detail": str(e)}, status=502)
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=502)
+
+        return Response(SessionSerializer(session).data, status=201)
+
+class ExpressEstimateAPIView(APIView):
+    """Identify and estimate in a single vision call, without the question round trip."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "llm"
+
+    @idempotent("express")
+    def post(self, request):
+        ser = CreateSessionFromImageSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        img = get_object_or_404(
+            UploadedImage,
+            id=ser.validated_data["image_id"],
+            uploaded_by=request.user
+        )
 
-        # Extract category from LLM output
-        category = llm_out.get("category", "general")
-        
         session = EstimationSession.objects.create(
             user=request.user,
             image=img,
-            object_label=str(llm_out.get("object_label", "") or "")[:200],
-            object_summary=str(llm_out.get("object_summary", "") or ""),
-            object_json=llm_out,
-            status=SessionStatus.QUESTIONS_ASKED,
+            object_json={"user_hint": ser.validated_data.get("user_hint", ""), "_source": "express"},
+            status=SessionStatus.PROCESSING,
         )
-        
-        # Store category in session metadata for later use
-        session.object_json["detected_category"] = category
-        session.save()
-
-        questions = llm_out.get("questions", []) or []
-        for idx, q in enumerate(questions, start=1):
-            Question.objects.create(
-                session=session,
-                order=idx,
-                text=str(q.get("question", "") or "").strip(),
-                answer_type=str(q.get("answer_type", "text") or "text").strip(),
-                unit=str(q.get("unit", "") or "").strip(),
-                options=q.get("options", []) or [],
-                required=bool(q.get("required", True)),
-            )
 
-        return Response(SessionSerializer(session).data, status=201)
+        try:
+            est = run_express(session)
+        except ProviderUnavailableError as e:
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=503)
+        except (LLMError, Exception) as e:
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=502)
+
+        return Response(
+            {"session": SessionSerializer(session).data, "estimate": WeightEstimateSerializer(est).data},
+            status=201
+        )
+
+class CreateSessionFromTextAPIView(APIView):
+    """Estimate from a text description (and optional answers) without an image."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "llm"
+
+    @idempotent("from-text")
+    def post(self, request):
+        ser = CreateSessionFromTextSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        description = ser.validated_data["description"].strip()
+        category = detect_category(description)
+
+        session = EstimationSession.objects.create(
+            user=request.user,
+            image=None,
+            object_label=description[:200],
+            canonical_label=canonicalize_label(description, category),
+            object_summary=description,
+            object_json={"category": category, "detected_category": category, "questions": [], "_source": "text"},
+            category=category,
+            status=SessionStatus.IN_PROGRESS,
+        )
+        create_provided_answers(session, ser.validated_data["answers"])
+
+        try:
+            est = run_estimation(session)
+        except (LLMError, Exception) as e:
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=502)
+
+        return Response(
+            {"session": SessionSerializer(session).data, "estimate": WeightEstimateSerializer(est).data},
+            status=201
+        )
+
+def filter_history(request):
+    """
+    The user's history rows with the list's search and filter query parameters applied.
+
+    Returns:
+        (SessionSummary queryset, search text)
+    """
+    # Denormalized history rows; no join to sessions or estimates (see sessions/summary.py)
+    qs = SessionSummary.objects.filter(user=request.user)
+    
+    # ============================================
+    # SEARCH & FILTERING
+    # ============================================
+    
+    # Full-text search over label, summary and rationale (see sessions/search.py)
+    search = request.query_params.get("search", "").strip()
+    if search:
+        qs = search_sessions(qs, search)
+    
+    # Filter by status
+    status_filter = request.query_params.get("status", "").strip()
+    if status_filter:
+        qs = qs.filter(status=status_filter)
+    
+    # Filter by category
+    category_filter = request.query_params.get("category", "").strip()
+    if category_filter:
+        qs = qs.filter(category=category_filter)
+    
+    # Filter by date range
+    date_from = request.query_params.get("date_from", "").strip()
+    date_to = request.query_params.get("date_to", "").strip()
+    
+    if date_from:
+        try:
+            from datetime import datetime
+            date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+            qs = qs.filter(created_at__gte=date_from_obj)
+        except ValueError:
+            pass
+    
+    if date_to:
+        try:
+            from datetime import datetime
+            date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+            qs = qs.filter(created_at__lte=date_to_obj)
+        except ValueError:
+            pass
+
+    return qs, search
+
 
 class SessionListAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        qs = EstimationSession.objects.filter(user=request.user)
-        
-        # ============================================
-        # SEARCH & FILTERING
-        # ============================================
-        
-        # Search by object label or summary
-        search = request.query_params.get("search", "").strip()
-        if search:
-            from django.db.models import Q
-            qs = qs.filter(
-                Q(object_label__icontains=search) | 
-                Q(object_summary__icontains=search)
-            )
-        
-        # Filter by status
-        status_filter = request.query_params.get("status", "").strip()
-        if status_filter:
-            qs = qs.filter(status=status_filter)
-        
-        # Filter by category (from object_json)
-        category_filter = request.query_params.get("category", "").strip()
-        if category_filter:
-            qs = qs.filter(object_json__detected_category=category_filter)
-        
-        # Filter by date range
-        date_from = request.query_params.get("date_from", "").strip()
-        date_to = request.query_params.get("date_to", "").strip()
-        
-        if date_from:
-            try:
-                from datetime import datetime
-                date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                qs = qs.filter(created_at__gte=date_from_obj)
-            except ValueError:
-                pass
-        
-        if date_to:
-            try:
-                from datetime import datetime
-                date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                qs = qs.filter(created_at__lte=date_to_obj)
-            except ValueError:
-                pass
-        
-        # Sorting
-        sort_by = request.query_params.get("sort_by", "date").strip().lower()
-        if sort_by == "confidence":
-            # Sort by estimate confidence (requires join)
-            qs = qs.select_related("estimate").order_by("-estimate__confidence", "-created_at")
-        elif sort_by == "weight":
-            # Sort by estimate weight
-            qs = qs.select_related("estimate").order_by("-estimate__value_grams", "-created_at")
-        else:  # Default: date
-            qs = qs.order_by("-created_at")
-        
-        # ============================================
-        # STATISTICS CALCULATION
-        # ============================================
-        
-        all_sessions = EstimationSession.objects.filter(user=request.user)
-        total_count = all_sessions.count()
-        completed_count = all_sessions.filter(status=SessionStatus.ESTIMATED).count()
-        pending_count = total_count - completed_count
-        
-        # Calculate average confidence
-        from django.db.models import Avg
-        avg_confidence = all_sessions.filter(
-            estimate__isnull=False
-        ).aggregate(
-            avg_conf=Avg("estimate__confidence")
-        )["avg_conf"] or 0
-        
-        # Category breakdown
-        category_counts = {}
-        for category in ["food", "package", "pet", "person", "general"]:
-            count = all_sessions.filter(object_json__detected_category=category).count()
-            if count > 0:
-                category_counts[category] = count
-        
-        statistics = {
-            "total_sessions": total_count,
-            "completed_sessions": completed_count,
-            "pending_sessions": pending_count,
-            "average_confidence": round(avg_confidence * 100, 1) if avg_confidence else 0,
-            "category_breakdown": category_counts,
+        qs, search = filter_history(request)
+
+        # Sorting and keyset pagination (see pagination.SORT_FIELDS)
+        default_sort = "relevance" if search else "date"
+        sort_by = request.query_params.get("sort_by", default_sort).strip().lower()
+        if sort_by == "relevance" and "search_rank" not in qs.query.annotations:
+            sort_by = "date"
+        paginator = SessionKeysetPagination(request, sort_by)
+
+        # The rationale is only needed by exports
+        qs = qs.defer("rationale")
+        try:
+            page = paginator.paginate(qs)
+        except InvalidCursor as e:
+            return Response({"detail": str(e)}, status=400)
+
+        data = {
+            "sessions": SessionListSerializer(page, many=True).data,
+            "next_cursor": paginator.next_cursor,
+            "next": paginator.next_link(),
         }
-        
-        # Return sessions with statistics
-        return Response({
-            "sessions": SessionSerializer(qs, many=True).data,
-            "statistics": statistics,
-        })
+
+        # Statistics are served by SessionStatsAPIView
+        return Response(data)
+
+class SessionStatsAPIView(APIView):
+    """History statistics from the per-user stats row (see sessions/stats.py)."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        stats = get_user_stats(request.user.id)
+        etag = f'"{int(stats.updated_at.timestamp() * 1000000)}"'
+
+        if request.headers.get("If-None-Match") == etag:
+            response = Response(status=304)
+        else:
+            response = Response(stats.as_statistics())
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, max_age=settings.SESSION_STATS_MAX_AGE_SECONDS)
+        return response
+
+class SessionExportAPIView(APIView):
+    """Stream the filtered history as CSV or NDJSON (see sessions/export.py), newest first."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        export_format = request.query_params.get("file_format", "csv").strip().lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": f"file_format must be one of: {', '.join(EXPORT_FORMATS)}."}, status=400)
+
+        qs, _ = filter_history(request)
+        qs = qs.order_by("-created_at", "-pk")
+
+        response = StreamingHttpResponse(export_lines(qs, export_format), content_type=EXPORT_FORMATS[export_format])
+        filename = f"weight_estimates_{timezone.now():%Y%m%d_%H%M%S}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 class SessionDetailAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -203,267 +301,167 @@ class SubmitAnswersAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     throttle_scope = "llm"
 
+    @idempotent("answers")
     def post(self, request, session_id):
         session = get_object_or_404(EstimationSession, id=session_id, user=request.user)
 
         ser = SubmitAnswersSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
 
-        q_by_id = {str(q.id): q for q in session.questions.all()}
+        questions, answers = load_answer_map(session)
+        q_by_id = {str(q.id): q for q in questions}
 
+        items = {}
         for item in ser.validated_data["answers"]:
             qid = str(item["question_id"])
             if qid not in q_by_id:
                 return Response({"detail": f"Unknown question_id: {qid}"}, status=400)
+            items[qid] = item["value"]
 
-            q = q_by_id[qid]
-            val = item["value"]
-
-            ans, _ = Answer.objects.get_or_create(session=session, question=q)
-            ans.value_text = ""
-            ans.value_number = None
-            ans.value_boolean = None
-            ans.value_json = {}
-
-            if q.answer_type == "number":
-                try:
-                    ans.value_number = float(val)
-                except Exception:
-                    return Response({"detail": f"Invalid number for question {qid}"}, status=400)
-            elif q.answer_type == "boolean":
-                # Accept true/false, "true"/"false", 1/0
-                if isinstance(val, str):
-                    ans.value_boolean = val.strip().lower() in ["true", "1", "yes", "y"]
-                else:
-                    ans.value_boolean = bool(val)
-            elif q.answer_type == "select":
-                ans.value_text = str(val)
-            else:
-                ans.value_text = str(val)
-
-            ans.save()
-
-        session.status = SessionStatus.IN_PROGRESS
-        session.save(update_fields=["status", "updated_at"])
-
-        required_qs = session.questions.filter(required=True).count()
-        answered_required = Answer.objects.filter(session=session, question__required=True).count()
-
-        if required_qs and answered_required < required_qs:
+        try:
+            save_answers(session, q_by_id, answers, items)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        # An express estimate stays visible while the user refines it
+        estimate = getattr(session, "estimate", None)
+        express = estimate is not None and estimate.raw_json.get("_source") == "express"
+        if not express:
+            session.status = SessionStatus.IN_PROGRESS
+            session.save(update_fields=["status", "updated_at"])
+
+        if not required_answered(session):
             return Response(
                 {"detail": "Answers saved. More required questions remain.", "session": SessionSerializer(session).data},
                 status=200
             )
 
-        if hasattr(session, "estimate"):
+        if estimate is not None and not express:
             return Response(
-                {"detail": "Session already estimated.", "estimate": WeightEstimateSerializer(session.estimate).data},
+                {"detail": "Session already estimated.", "estimate": WeightEstimateSerializer(estimate).data},
                 status=200
             )
 
-        qa_items = []
-        for q in session.questions.all():
-            a = Answer.objects.filter(session=session, question=q).first()
-            if not a:
-                av = None
-            elif q.answer_type == "number":
-                av = a.value_number
-            elif q.answer_type == "boolean":
-                av = a.value_boolean
-            else:
-                av = a.value_text
-
-            qa_items.append({
-                "question": q.text,
-                "answer_type": q.answer_type,
-                "unit": q.unit,
-                "answer": av,
-                "options": q.options,
-                "required": q.required,
-            })
+        # Concurrent submits for one session share a single estimation call
+        return single_flight(request.user, "estimate", str(session.id), lambda: self.estimate(session))
+
+    def estimate(self, session):
+        try:
+            est = run_estimation(session)
+        except (LLMError, Exception) as e:
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=502)
+
+        return Response({"detail": "Estimated successfully.", "estimate": WeightEstimateSerializer(est).data}, status=200)
+
+class AutosaveAnswerAPIView(APIView):
+    """Save one answer as the user types; never triggers estimation."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, session_id, question_id):
+        question = get_object_or_404(
+            Question.objects.select_related("session"),
+            id=question_id, session_id=session_id, session__user=request.user,
+        )
+        session = question.session
+
+        ser = AutosaveAnswerSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        try:
+            created = save_answer(session, question, ser.validated_data["value"])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response({
+            "detail": "Answer saved.",
+            "question_id": str(question.id),
+            "created": created,
+            "required_answered": session.required_answered_count,
+            "required_total": session.required_question_count,
+            "ready": required_answered(session),
+        }, status=200)
+
+class WhatIfAPIView(APIView):
+    """Fork a session with changed answers and re-run only the estimation stage."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "llm"
+
+    @idempotent("what-if")
+    def post(self, request, session_id):
+        source = get_object_or_404(EstimationSession, id=session_id, user=request.user)
+
+        ser = SubmitAnswersSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        question_ids = {str(qid) for qid in source.questions.values_list("id", flat=True)}
+        overrides = {}
+        for item in ser.validated_data["answers"]:
+            qid = str(item["question_id"])
+            if qid not in question_ids:
+                return Response({"detail": f"Unknown question_id: {qid}"}, status=400)
+            overrides[qid] = item["value"]
 
         try:
-            llm_est = estimate_weight(
-                object_label=session.object_label,
-                object_summary=session.object_summary,
-                qa={"items": qa_items}
+            session = fork_session(source, overrides)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        if not required_answered(session):
+            return Response(
+                {"detail": "Fork created. More required questions remain.", "session": SessionSerializer(session).data},
+                status=201
             )
+
+        try:
+            est = run_estimation(session)
         except (LLMError, Exception) as e:
-            session.status = SessionStatus.FAILED
-            session.save(update_fields=["status", "updated_at"])
-            return Response({"detail": str(e)}, status=502)
+            mark_failed(session)
+            return Response({"detail": str(e), "session_id": str(session.id)}, status=502)
 
-        grams = llm_est.get("_normalized_grams", {}) or {}
-        ew = llm_est.get("estimated_weight", {}) or {}
-        
-        # Detect category from object label
-        category = detect_category(session.object_label)
-        if not category:
-            category = session.object_json.get("detected_category", "general")
-
-        est = WeightEstimate.objects.create(
-            session=session,
-            value_grams=float(grams.get("value_g", 0.0) or 0.0),
-            min_grams=float(grams.get("min_g", grams.get("value_g", 0.0)) or 0.0),
-            max_grams=float(grams.get("max_g", grams.get("value_g", 0.0)) or 0.0),
-            confidence=float(llm_est.get("confidence", 0.3) or 0.3),
-            unit_display=str(ew.get("unit", "g") or "g"),
-            rationale=str(llm_est.get("rationale", "") or "")[:2000],
-            raw_json=llm_est,
-            category=category,
+        return Response(
+            {"session": SessionSerializer(session).data, "estimate": WeightEstimateSerializer(est).data},
+            status=201
         )
-        
-        # ============================================
-        # CATEGORY-SPECIFIC CALCULATIONS
-        # ============================================
-        
-        weight_kg = est.value_grams / 1000.0
-        
+
+class RetrySessionAPIView(APIView):
+    """Resume a failed or interrupted session from its first incomplete stage."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "llm"
+
+    MESSAGES = {
+        "identified": "Object identified. Answer the questions to continue.",
+        "awaiting_answers": "Nothing to retry. More required questions remain.",
+        "estimated": "Estimated successfully.",
+        "category": "Category details recalculated.",
+        "complete": "Nothing to retry.",
+    }
+
+    def post(self, request, session_id):
+        session = get_object_or_404(EstimationSession, id=session_id, user=request.user)
+
+        # A double-clicked retry shares one provider call. Retries are keyed apart from
+        # answer submits: the two respond differently, so neither may replay the other.
+        return single_flight(request.user, "retry", str(session.id), lambda: self.resume(session))
+
+    def resume(self, session):
         try:
-            if category == "food":
-                # Calculate nutrition information
-                nutrition_data = calculate_nutrition(
-                    weight_grams=est.value_grams,
-                    food_name=session.object_label,
-                    answers={}  # Could extract cooking status from answers
-                )
-                
-                if nutrition_data.get("found"):
-                    food_ref_id = nutrition_data.get("food_reference_id")
-                    food_ref = FoodNutrition.objects.filter(id=food_ref_id).first() if food_ref_id else None
-                    
-                    FoodEstimate.objects.create(
-                        estimate=est,
-                        food_reference=food_ref,
-                        estimated_calories=nutrition_data.get("estimated_calories", 0),
-                        estimated_protein=nutrition_data.get("estimated_protein", 0),
-                        estimated_carbs=nutrition_data.get("estimated_carbs", 0),
-                        estimated_fat=nutrition_data.get("estimated_fat", 0),
-                        estimated_fiber=nutrition_data.get("estimated_fiber", 0),
-                    )
-                    est.category_metadata = nutrition_data
-                    est.save(update_fields=["category_metadata"])
-                    
-            elif category == "package":
-                # Extract dimensions from answers
-                length_cm = extract_answer_value(qa_items, "length", 0)
-                width_cm = extract_answer_value(qa_items, "width", 0)
-                height_cm = extract_answer_value(qa_items, "height", 0)
-                destination = extract_answer_value(qa_items, "destination", "Domestic")
-                
-                if length_cm and width_cm and height_cm:
-                    shipping_data = calculate_shipping_costs(
-                        weight_grams=est.value_grams,
-                        dimensions={
-                            "length_cm": length_cm,
-                            "width_cm": width_cm,
-                            "height_cm": height_cm,
-                        },
-                        destination_type=destination
-                    )
-                    
-                    PackageEstimate.objects.create(
-                        estimate=est,
-                        length_cm=length_cm,
-                        width_cm=width_cm,
-                        height_cm=height_cm,
-                        volumetric_weight_g=shipping_data.get("volumetric_weight_g"),
-                        chargeable_weight_g=shipping_data.get("chargeable_weight_g", est.value_grams),
-                        estimated_shipping_costs=shipping_data.get("shipping_costs", {}),
-                        destination_type=destination,
-                    )
-                    est.category_metadata = shipping_data
-                    est.save(update_fields=["category_metadata"])
-                    
-            elif category == "pet":
-                # Extract pet details from answers
-                breed_name = extract_answer_value(qa_items, "breed", "")
-                age_category = extract_answer_value(qa_items, "age", "adult")
-                gender = extract_answer_value(qa_items, "gender", "")
-                
-                # Extract species from object label
-                species = "dog"  # default
-                if "cat" in session.object_label.lower():
-                    species = "cat"
-                elif "rabbit" in session.object_label.lower():
-                    species = "rabbit"
-                
-                health_data = assess_pet_health(
-                    weight_kg=weight_kg,
-                    species=species,
-                    breed_name=breed_name,
-                    age_category=age_category
-                )
-                
-                if age_category and "puppy" in age_category.lower() or "kitten" in age_category.lower():
-                    age_cat = "puppy" if species == "dog" else "kitten"
-                elif "senior" in age_category.lower():
-                    age_cat = "senior"
-                else:
-                    age_cat = "adult"
-                
-                breed_ref_id = health_data.get("breed_reference_id")
-                from estimates.models import BreedReference
-                breed_ref = BreedReference.objects.filter(id=breed_ref_id).first() if breed_ref_id else None
-                
-                PetEstimate.objects.create(
-                    estimate=est,
-                    species=species,
-                    breed=breed_name or health_data.get("breed_name", ""),
-                    breed_reference=breed_ref,
-                    age_category=age_cat,
-                    gender=gender,
-                    health_status=health_data.get("health_status", "unknown"),
-                    ideal_weight_min=health_data.get("ideal_weight_min"),
-                    ideal_weight_max=health_data.get("ideal_weight_max"),
-                    weight_recommendation=health_data.get("weight_recommendation", ""),
-                )
-                est.category_metadata = health_data
-                est.save(update_fields=["category_metadata"])
-                
-            elif category == "person":
-                # Extract person details from answers
-                height_cm = extract_answer_value(qa_items, "height", None)
-                age = extract_answer_value(qa_items, "age", None)
-                gender = extract_answer_value(qa_items, "gender", None)
-                activity = extract_answer_value(qa_items, "activity", None)
-                
-                if height_cm:
-                    bmi_data = calculate_bmi_insights(
-                        weight_kg=weight_kg,
-                        height_cm=float(height_cm),
-                        age=int(age) if age else None,
-                        gender=gender,
-                        activity_level=activity
-                    )
-                    
-                    bmi_cat_id = bmi_data.get("bmi_category_id")
-                    bmi_cat = BMICategory.objects.filter(id=bmi_cat_id).first() if bmi_cat_id else None
-                    
-                    BodyCompositionEstimate.objects.create(
-                        estimate=est,
-                        height_cm=float(height_cm),
-                        age=int(age) if age else None,
-                        gender=gender or "",
-                        activity_level=activity or "",
-                        bmi=bmi_data.get("bmi", 0),
-                        bmi_category=bmi_data.get("bmi_category", ""),
-                        bmi_category_ref=bmi_cat,
-                        ideal_weight_min_kg=bmi_data.get("ideal_weight_min_kg", 0),
-                        ideal_weight_max_kg=bmi_data.get("ideal_weight_max_kg", 0),
-                        body_fat_estimate=bmi_data.get("body_fat_estimate"),
-                        lean_mass_estimate=bmi_data.get("lean_mass_estimate"),
-                        health_recommendation=bmi_data.get("health_recommendation", ""),
-                    )
-                    est.category_metadata = bmi_data
-                    est.save(update_fields=["category_metadata"])
-                    
-        except Exception as e:
-            # Log error but don't fail the estimation
-            # Category calculations are optional enhancements
-            print(f"Category calculation error: {str(e)}")
-
-        session.status = SessionStatus.ESTIMATED
-        session.save(update_fields=["status", "updated_at"])
+            outcome = resume_pipeline(session)
+        except ImageValidationError as e:
+            mark_failed(session)
+            return Response({"detail": str(e)}, status=400)
+        except ProviderUnavailableError as e:
+            mark_failed(session)
+            return Response({"detail": str(e)}, status=503)
+        except (LLMError, Exception) as e:
+            mark_failed(session)
+            return Response({"detail": str(e)}, status=502)
 
-        return Response({"detail": "Estimated successfully.", "estimate": WeightEstimateSerializer(est).data}, status=200)
+        data = {"detail": self.MESSAGES[outcome], "session": SessionSerializer(session).data}
+        est = WeightEstimate.objects.filter(session=session).first()
+        if est:
+            data["estimate"] = WeightEstimateSerializer(est).data
+        return Response(data, status=200)
@@ -135,3 +135,50 @@ SIMPLE_JWT = {
 # Upload limit
 MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", "5242880"))  # default 5MB
 
+
+# Local image-quality pre-check (media_store.quality)
+IMAGE_QUALITY_THRESHOLDS = {
+    # Rejection limits: below/above these an upload is refused
+    "min_side_px": int(os.getenv("IMAGE_QUALITY_MIN_SIDE_PX", "200")),
+    "min_blur_score": float(os.getenv("IMAGE_QUALITY_MIN_BLUR_SCORE", "4")),
+    "min_brightness": float(os.getenv("IMAGE_QUALITY_MIN_BRIGHTNESS", "25")),
+    "max_brightness": float(os.getenv("IMAGE_QUALITY_MAX_BRIGHTNESS", "235")),
+    "max_dark_ratio": float(os.getenv("IMAGE_QUALITY_MAX_DARK_RATIO", "0.6")),
+    # White studio backgrounds are common, so allow many bright pixels
+    "max_bright_ratio": float(os.getenv("IMAGE_QUALITY_MAX_BRIGHT_RATIO", "0.9")),
+    "min_contrast": float(os.getenv("IMAGE_QUALITY_MIN_CONTRAST", "8")),
+    # "Clearly good" limits: above these the LLM validation call is skipped
+    "good_min_side_px": int(os.getenv("IMAGE_QUALITY_GOOD_MIN_SIDE_PX", "480")),
+    "good_blur_score": float(os.getenv("IMAGE_QUALITY_GOOD_BLUR_SCORE", "100")),
+    "good_contrast": float(os.getenv("IMAGE_QUALITY_GOOD_CONTRAST", "40")),
+    # Edge energy above which an image counts as "complex" for model routing
+    "complex_detail_score": float(os.getenv("IMAGE_QUALITY_COMPLEX_DETAIL_SCORE", "750")),
+}
+SKIP_LLM_VALIDATION_FOR_GOOD_IMAGES = os.getenv("SKIP_LLM_VALIDATION_FOR_GOOD_IMAGES", "1") == "1"
+
+# Optional on-CPU classifier (sessions.local_classifier): fast path when
+# confident, fallback while the LLM provider circuit is open
+LOCAL_CLASSIFIER = {
+    "BACKEND": os.getenv("LOCAL_CLASSIFIER_BACKEND", ""),  # "", "onnx" or dotted path
+    "MODEL_PATH": os.getenv("LOCAL_CLASSIFIER_MODEL_PATH", ""),
+    "LABELS_PATH": os.getenv("LOCAL_CLASSIFIER_LABELS_PATH", ""),
+    "INPUT_SIZE": int(os.getenv("LOCAL_CLASSIFIER_INPUT_SIZE", "224")),
+    "THREADS": int(os.getenv("LOCAL_CLASSIFIER_THREADS", "1")),
+    "FAST_PATH_CONFIDENCE": float(os.getenv("LOCAL_CLASSIFIER_FAST_PATH_CONFIDENCE", "0.85")),
+    "FALLBACK_CONFIDENCE": float(os.getenv("LOCAL_CLASSIFIER_FALLBACK_CONFIDENCE", "0.3")),
+}
+
+# Idempotency-Key support on the paid session endpoints (sessions.idempotency)
+IDEMPOTENCY = {
+    # How long a completed response is replayed for the same key
+    "TTL_SECONDS": int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+    # How long a repeated request waits for the in-flight original before giving up with 409
+    "WAIT_SECONDS": float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30")),
+    # In-flight claims older than this are treated as abandoned (crashed worker)
+    "LOCK_SECONDS": int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300")),
+    # Window in which identical concurrent work (same image / same session) shares one result
+    "SINGLE_FLIGHT_TTL_SECONDS": int(os.getenv("SINGLE_FLIGHT_TTL_SECONDS", "5")),
+}
+
+# Browser cache lifetime of /api/sessions/stats/ (revalidated with ETag afterwards)
+SESSION_STATS_MAX_AGE_SECONDS = int(os.getenv("SESSION_STATS_MAX_AGE_SECONDS", "30"))